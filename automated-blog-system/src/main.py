@@ -6,18 +6,20 @@ import threading
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 # Add the core directory for agent system
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'core'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'core'))
 
 from flask import Flask
 from flask_cors import CORS
 from src.config import Config
+from infrastructure.logging_setup import configure_logging
 
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def create_app():
+    # Route logging through a background queue listener so request and agent threads stay off I/O
+    configure_logging(logging.INFO)
+    
     app = Flask(__name__)
     app.config.from_object(Config)
     Config.init_app(app)  # This will print the database path
@@ -84,7 +86,7 @@ def create_app():
             sys.path.insert(0, core_path)
         
         from agents.agent_manager import AgentManager
-        app.agent_manager = AgentManager()
+        app.agent_manager = AgentManager(app=app)
         
         # Start agents in a separate thread
         def start_agents():
@@ -132,14 +132,14 @@ class AgentDecision(db.Model):
     __tablename__ = 'agent_decisions'
     
     id = Column(Integer, primary_key=True)
-    agent_name = Column(String(100), nullable=False)
+    agent_name = Column(String(100), nullable=False, index=True)
     decision_type = Column(String(100), nullable=False)  # content_publish, budget_allocation, etc.
     blog_instance_id = Column(Integer, ForeignKey('blog_instances.id'), nullable=True)
     decision_data = Column(JSON, nullable=False)  # Details of the decision
     requires_approval = Column(Boolean, default=False)
-    approval_status = Column(String(20), default='pending')  # pending, approved, rejected
+    approval_status = Column(String(20), default='pending', index=True)  # pending, approved, rejected
     approved_by = Column(String(100), nullable=True)  # User who approved/rejected
-    impact_level = Column(String(20), default='low')  # low, medium, high
+    impact_level = Column(String(20), default='low', index=True)  # low, medium, high
     created_at = Column(DateTime, default=datetime.utcnow)
     approved_at = Column(DateTime, nullable=True)
     
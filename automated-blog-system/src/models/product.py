@@ -6,6 +6,12 @@ class Product(db.Model):
     """Product model for storing affiliate products."""
     
     __tablename__ = 'products'
+    # Scraped products are upserted by URL; products without one (NULL or '') may repeat
+    __table_args__ = (
+        db.Index('ix_products_source_url', 'source_url', unique=True,
+                 sqlite_where=db.text("source_url IS NOT NULL AND source_url <> ''"),
+                 postgresql_where=db.text("source_url IS NOT NULL AND source_url <> ''")),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -497,6 +497,84 @@ def reject_decision(decision_id):
         logger.error(f"Error rejecting decision {decision_id}: {str(e)}")
         return jsonify({'error': 'Failed to reject decision'}), 500
 
+def _bulk_decide(approval_status):
+    """Apply one approval status to many pending decisions in a single transaction"""
+    data = request.get_json() or {}
+    decision_ids = data.get('decision_ids')
+    filters = data.get('filter', {})
+    decided_by = data.get('approved_by') or data.get('rejected_by') or 'admin'
+    reason = data.get('reason')
+    decided_at = datetime.utcnow()
+    
+    if decision_ids is None and not filters:
+        return jsonify({'error': 'decision_ids or filter is required'}), 400
+    
+    if AGENT_MODELS_AVAILABLE:
+        try:
+            query = AgentDecision.query.filter_by(approval_status='pending')
+            if decision_ids is not None:
+                query = query.filter(AgentDecision.id.in_(decision_ids))
+            for field in ('impact_level', 'agent_name', 'decision_type', 'blog_instance_id'):
+                if field in filters:
+                    query = query.filter(getattr(AgentDecision, field) == filters[field])
+            
+            decided_ids = [decision_id for (decision_id,) in query.with_entities(AgentDecision.id).all()]
+            if decided_ids:
+                AgentDecision.query.filter(AgentDecision.id.in_(decided_ids)).update({
+                    AgentDecision.approval_status: approval_status,
+                    AgentDecision.approved_by: decided_by,
+                    AgentDecision.approved_at: decided_at
+                }, synchronize_session=False)
+                if approval_status == 'rejected' and reason:
+                    # Same place ApprovalStore keeps it: AgentDecision has no reason column
+                    for decision in AgentDecision.query.filter(AgentDecision.id.in_(decided_ids)):
+                        decision.decision_data = {**(decision.decision_data or {}), 'rejection_reason': reason}
+                db.session.commit()
+            
+            return jsonify({
+                'status': 'success',
+                'message': f'{len(decided_ids)} decisions {approval_status}',
+                'decision_ids': decided_ids,
+                'approval_status': approval_status,
+                'decided_by': decided_by,
+                'reason': reason,
+                'decided_at': decided_at.isoformat()
+            })
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not bulk update decisions in database: {e}")
+    
+    # Fallback to mock bulk decision if database not available
+    logger.info(f"{len(decision_ids or [])} decisions {approval_status} by {decided_by}")
+    
+    return jsonify({
+        'status': 'success',
+        'message': f'{len(decision_ids or [])} decisions {approval_status}',
+        'decision_ids': decision_ids or [],
+        'approval_status': approval_status,
+        'decided_by': decided_by,
+        'reason': reason,
+        'decided_at': decided_at.isoformat()
+    })
+
+@agent_bp.route('/decisions/bulk-approve', methods=['POST'])
+def bulk_approve_decisions():
+    """Approve many pending decisions, selected by id list or by filter"""
+    try:
+        return _bulk_decide('approved')
+    except Exception as e:
+        logger.error(f"Error bulk approving decisions: {str(e)}")
+        return jsonify({'error': 'Failed to bulk approve decisions'}), 500
+
+@agent_bp.route('/decisions/bulk-reject', methods=['POST'])
+def bulk_reject_decisions():
+    """Reject many pending decisions, selected by id list or by filter"""
+    try:
+        return _bulk_decide('rejected')
+    except Exception as e:
+        logger.error(f"Error bulk rejecting decisions: {str(e)}")
+        return jsonify({'error': 'Failed to bulk reject decisions'}), 500
+
 @agent_bp.route('/market-data', methods=['GET'])
 def get_market_data():
     """Get recent market research data"""
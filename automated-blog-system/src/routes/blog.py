@@ -65,7 +65,7 @@ def create_product():
             affiliate_programs=json.dumps(data.get('affiliate_programs', [])),
             primary_keywords=json.dumps(data.get('primary_keywords', [])),
             secondary_keywords=json.dumps(data.get('secondary_keywords', [])),
-            source_url=data.get('source_url'),
+            source_url=data.get('source_url') or None,
             image_url=data.get('image_url'),
             niche_id=data.get('niche_id')
         )
@@ -117,6 +117,9 @@ def update_product(product_id):
                      'search_volume', 'competition_level', 'source_url', 'image_url', 'niche_id']:
             if field in data:
                 setattr(product, field, data[field])
+        # An empty URL is stored as NULL, which the source_url unique index allows to repeat
+        if 'source_url' in data and not data['source_url']:
+            product.source_url = None
         
         # Handle JSON fields
         for field in ['affiliate_programs', 'primary_keywords', 'secondary_keywords']:
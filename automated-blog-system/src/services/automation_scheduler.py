@@ -111,7 +111,11 @@ class AutomationScheduler:
             
             for product_data in trending_products:
                 # Check if product exists in database
+                source_url = product_data.get("source_url") or None
                 existing_product = Product.query.filter_by(name=product_data["name"]).first()
+                if not existing_product and source_url:
+                    # source_url is unique; a renamed product keeps its row
+                    existing_product = Product.query.filter_by(source_url=source_url).first()
                 
                 if not existing_product:
                     # Create new product
@@ -127,7 +131,7 @@ class AutomationScheduler:
                         affiliate_programs=json.dumps(product_data["affiliate_programs"]),
                         primary_keywords=json.dumps(product_data["primary_keywords"]),
                         secondary_keywords=json.dumps(product_data["secondary_keywords"]),
-                        source_url=product_data["source_url"],
+                        source_url=source_url,
                         image_url=product_data["image_url"]
                     )
                     db.session.add(product)
@@ -3,6 +3,13 @@ import openai
 from typing import Dict, Any, List
 from src.config import Config
 
+# The agent system's cancellation tokens, when core/ is on the path (always the case under the agents)
+try:
+    from infrastructure.cancellation import current_token, DeadlineExceeded
+    CANCELLATION_AVAILABLE = True
+except ImportError:
+    CANCELLATION_AVAILABLE = False
+
 class ContentGenerator:
     """Service for generating SEO-optimized blog content."""
     
@@ -14,11 +21,27 @@ class ContentGenerator:
         else:
             self.openai_client = None
     
-    def generate_article(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate a complete article for a product."""
+    def generate_article(self, product_data: Dict[str, Any], cancel_token=None) -> Dict[str, Any]:
+        """
+        Generate a complete article for a product.
+        
+        cancel_token is the agent task's cancellation token (by default the token of the
+        running task, if any): cancelled or expired work raises before the OpenAI call,
+        and the call's timeout is capped at the deadline; timing out there raises
+        DeadlineExceeded rather than falling back to a mock article.
+        """
+        if cancel_token is None and CANCELLATION_AVAILABLE:
+            cancel_token = current_token()
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        
         if not self.openai_client:
             return self._generate_mock_article(product_data)
         
+        request_options = {}
+        if cancel_token is not None and cancel_token.remaining() is not None:
+            request_options['timeout'] = cancel_token.remaining()
+        
         try:
             # Generate article content using OpenAI
             prompt = self._create_article_prompt(product_data)
@@ -30,7 +53,8 @@ class ContentGenerator:
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=4000,
-                temperature=0.7
+                temperature=0.7,
+                **request_options
             )
             
             content = response.choices[0].message.content
@@ -50,6 +74,10 @@ class ContentGenerator:
             }
             
         except Exception as e:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+                if 'timeout' in request_options and isinstance(e, openai.APITimeoutError):
+                    raise DeadlineExceeded(f"Article generation timed out at the task deadline: {e}") from e
             print(f"Error generating content with OpenAI: {e}")
             return self._generate_mock_article(product_data)
     
@@ -1,5 +1,5 @@
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class TrendAnalyzer:
     """Service for analyzing trending products and market data."""
@@ -101,6 +101,10 @@ class TrendAnalyzer:
     
     def analyze_product_trends(self, product_name: str) -> Dict[str, Any]:
         """Analyze trends for a specific product."""
+        scored = self._get_scored_trend(product_name)
+        if scored:
+            return scored
+        
         return {
             "product_name": product_name,
             "trend_direction": "increasing",
@@ -111,4 +115,29 @@ class TrendAnalyzer:
                 "market_share": random.uniform(10, 30)
             }
         }
-
+    
+    def _get_scored_trend(self, product_name: str) -> Optional[Dict[str, Any]]:
+        """Latest trend score computed by the market analytics agent, if any."""
+        if self.use_mock_data:
+            return None
+        
+        try:
+            from src.models.agent_models import MarketData
+            record = MarketData.query.filter(
+                MarketData.product_name == product_name,
+                MarketData.confidence_score > 0
+            ).order_by(MarketData.created_at.desc()).first()
+        except Exception:
+            # No app context or database available
+            return None
+        
+        if record is None:
+            return None
+        
+        return {
+            "product_name": product_name,
+            "trend_direction": "increasing" if record.trend_score >= 0.5 else "decreasing",
+            "trend_strength": round(record.trend_score * 100, 1),
+            "confidence": round(record.confidence_score, 3),
+            "scored_at": record.created_at.isoformat() if record.created_at else None
+        }
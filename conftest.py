@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Agents import from core/ and, when persisting, from the Flask backend's src package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, 'core'))
+sys.path.insert(0, os.path.join(current_dir, 'automated-blog-system'))
+
+
+@pytest.fixture
+def app():
+    """Flask app bound to an in-memory database with all models created"""
+    from flask import Flask
+    from src.models import db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
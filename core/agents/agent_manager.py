@@ -8,6 +8,7 @@ from agents.base_agent import BaseAgent
 from agents.orchestrator_agent import OrchestratorAgent
 from agents.market_analytics_agent import MarketAnalyticsAgent
 from infrastructure.message_broker import MessageBroker
+from infrastructure.logging_setup import configure_logging
 
 class AgentManager:
     """
@@ -15,10 +16,13 @@ class AgentManager:
     Handles agent lifecycle, coordination, and monitoring.
     """
     
-    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379):
+    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379, app=None):
         self.redis_host = redis_host
         self.redis_port = redis_port
         
+        # Flask app handed to agents for database persistence (optional)
+        self.app = app
+        
         # Set up logging
         self.logger = logging.getLogger('AgentManager')
         
@@ -53,6 +57,8 @@ class AgentManager:
                 return False
             
             self.agents[agent_name] = agent
+            if self.app is not None:
+                agent.attach_app(self.app)
             self.logger.info(f"Agent {agent_name} registered successfully")
             
             # Notify other agents of the new registration
@@ -341,11 +347,8 @@ def start_agent_system(redis_host: str = 'localhost', redis_port: int = 6379):
         manager.shutdown()
 
 if __name__ == "__main__":
-    # Set up logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Set up asynchronous logging
+    configure_logging(logging.INFO)
     
     # Start the agent system
     start_agent_system()
\ No newline at end of file
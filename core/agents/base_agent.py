@@ -5,6 +5,12 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from enum import Enum
+from infrastructure.logging_setup import LazyPayload
+from infrastructure.persistence import MODELS_AVAILABLE, database_session, commit_or_rollback
+from infrastructure.cancellation import CancellationRegistry, CancellationToken, TaskCancelled, use_token
+
+if MODELS_AVAILABLE:
+    from infrastructure.persistence import AgentState
 
 class AgentStatus(Enum):
     IDLE = "idle"
@@ -30,6 +36,12 @@ class BaseAgent(ABC):
         self.state_data = {}
         self.performance_metrics = {}
         
+        # Flask app used for database persistence (attached by the AgentManager)
+        self.app = None
+        
+        # Cancel tokens received via cancel_tasks messages
+        self.cancellations = CancellationRegistry()
+        
         # Set up logging
         self.logger = logging.getLogger(f"{agent_type}.{agent_name}")
         
@@ -72,6 +84,18 @@ class BaseAgent(ABC):
         """
         pass
     
+    def attach_app(self, app):
+        """
+        Attach the Flask app so the agent can persist to the shared database
+        """
+        self.app = app
+    
+    def db_session(self):
+        """
+        Context manager yielding a database session, or None when persistence is unavailable
+        """
+        return database_session(self.app)
+    
     def update_state(self, new_state: Dict[str, Any]):
         """
         Update the agent's internal state
@@ -86,9 +110,59 @@ class BaseAgent(ABC):
         """
         Persist agent state to database
         """
-        # This would interact with the AgentState model
-        # Implementation depends on database connection setup
-        pass
+        if not MODELS_AVAILABLE:
+            return
+        
+        try:
+            with self.db_session() as session:
+                if session is None:
+                    return
+                
+                record = self.state_record(session)
+                if record is None:
+                    record = AgentState(agent_name=self.agent_name, agent_type=self.agent_type)
+                    session.add(record)
+                
+                # Assign copies so SQLAlchemy sees the JSON columns change
+                record.state_data = dict(self.state_data)
+                record.performance_metrics = dict(self.performance_metrics)
+                record.status = self.status.value
+                record.last_action = datetime.utcnow()
+                commit_or_rollback(session, f"state for {self.agent_name}")
+        except Exception as e:
+            self.logger.error(f"Failed to persist state: {str(e)}")
+    
+    def restore_state(self) -> bool:
+        """
+        Load previously persisted state, e.g. after a restart
+        """
+        if not MODELS_AVAILABLE:
+            return False
+        
+        try:
+            with self.db_session() as session:
+                if session is None:
+                    return False
+                
+                record = self.state_record(session)
+                if record is None:
+                    return False
+                
+                self.state_data.update(record.state_data or {})
+                self.performance_metrics.update(record.performance_metrics or {})
+                return True
+        except Exception as e:
+            self.logger.error(f"Failed to restore state: {str(e)}")
+            return False
+    
+    def state_record(self, session):
+        """
+        The AgentState row holding this agent's global (not per-blog) state
+        """
+        return session.query(AgentState).filter(
+            AgentState.agent_name == self.agent_name,
+            AgentState.blog_instance_id.is_(None)
+        ).first()
     
     def send_message(self, target_agent: str, message: Dict[str, Any]):
         """
@@ -107,7 +181,7 @@ class BaseAgent(ABC):
         
         try:
             self.redis_client.publish(f'agents.{target_agent}', json.dumps(message_data))
-            self.logger.info(f"Message sent to {target_agent}")
+            self.logger.debug("Message sent to %s", target_agent)
             return True
         except Exception as e:
             self.logger.error(f"Failed to send message to {target_agent}: {str(e)}")
@@ -130,7 +204,7 @@ class BaseAgent(ABC):
         
         try:
             self.redis_client.publish('agents.global', json.dumps(message_data))
-            self.logger.info("Message broadcasted to all agents")
+            self.logger.debug("Message broadcasted to all agents")
             return True
         except Exception as e:
             self.logger.error(f"Failed to broadcast message: {str(e)}")
@@ -157,26 +231,38 @@ class BaseAgent(ABC):
         sender = message.get('from')
         data = message.get('data', {})
         
-        self.logger.info(f"Received message from {sender}: {data}")
-        
         # Process the message based on its type
         message_type = data.get('type')
+        self.logger.info("Received %s message from %s: %s", message_type, sender, LazyPayload(data))
+        
         if message_type == 'task_assignment':
             self.handle_task_assignment(data)
         elif message_type == 'status_request':
             self.handle_status_request(sender)
         elif message_type == 'coordination':
             self.handle_coordination_message(data)
+        elif message_type == 'cancel_tasks':
+            self.cancellations.cancel(data.get('cancel_token'), data.get('reason', 'cancelled'))
         else:
-            self.logger.warning(f"Unknown message type: {message_type}")
+            self.logger.warning("Unknown message type: %s", message_type)
     
     def handle_task_assignment(self, task_data: Dict[str, Any]):
         """
-        Handle a task assignment from another agent
+        Handle a task assignment from another agent.
+        Work whose deadline passed or whose cancel token was cancelled is dropped
+        before it starts; while it runs, the token is ambient for scrapers and generators.
         """
+        token = self.cancellations.token_for(task_data)
+        if token.is_cancelled:
+            self.logger.info("Dropping task %s: %s", task_data.get('task_id'),
+                             'deadline passed' if token.expired else token.reason)
+            self.report_task_cancelled(task_data, token)
+            return
+        
         try:
             self.status = AgentStatus.ACTIVE
-            result = self.execute_task(task_data)
+            with use_token(token):
+                result = self.execute_task(task_data)
             self.status = AgentStatus.IDLE
             
             # Send result back to the assigning agent
@@ -184,11 +270,39 @@ class BaseAgent(ABC):
                 self.send_message(task_data['assigned_by'], {
                     'type': 'task_result',
                     'task_id': task_data.get('task_id'),
+                    'workflow_id': task_data.get('workflow_id'),
                     'result': result
                 })
+        except TaskCancelled as e:
+            self.status = AgentStatus.IDLE
+            self.logger.info("Task %s abandoned: %s", task_data.get('task_id'), e)
+            self.report_task_cancelled(task_data, token)
         except Exception as e:
             self.status = AgentStatus.ERROR
             self.logger.error(f"Task execution failed: {str(e)}")
+            
+            # Report the failure so the assigning agent does not wait forever
+            if 'assigned_by' in task_data:
+                self.send_message(task_data['assigned_by'], {
+                    'type': 'task_result',
+                    'task_id': task_data.get('task_id'),
+                    'workflow_id': task_data.get('workflow_id'),
+                    'status': 'failed',
+                    'error': str(e)
+                })
+    
+    def report_task_cancelled(self, task_data: Dict[str, Any], token: CancellationToken):
+        """
+        Tell the assigning agent a task was dropped due to cancellation or deadline
+        """
+        if 'assigned_by' in task_data:
+            self.send_message(task_data['assigned_by'], {
+                'type': 'task_result',
+                'task_id': task_data.get('task_id'),
+                'workflow_id': task_data.get('workflow_id'),
+                'status': 'cancelled',
+                'error': 'deadline exceeded' if token.expired else f"cancelled: {token.reason}"
+            })
     
     def handle_status_request(self, requester: str):
         """
@@ -211,7 +325,7 @@ class BaseAgent(ABC):
         Handle coordination messages from other agents
         """
         # This can be overridden by specific agent types
-        self.logger.info(f"Coordination message received: {data}")
+        self.logger.info("Coordination message received: %s", LazyPayload(data))
     
     def make_decision(self, decision_type: str, decision_data: Dict[str, Any], 
                      impact_level: DecisionImpact = DecisionImpact.LOW) -> Dict[str, Any]:
@@ -246,7 +360,7 @@ class BaseAgent(ABC):
         """
         # This would interact with the approval system
         # For now, we'll just log it
-        self.logger.info(f"Approval requested for decision: {decision['decision_type']}")
+        self.logger.info("Approval requested for decision: %s", decision['decision_type'])
         
         # Send to orchestrator for approval handling
         self.send_message('orchestrator', {
@@ -259,7 +373,7 @@ class BaseAgent(ABC):
         Execute a decision that doesn't require approval
         """
         # This should be overridden by specific agent types
-        self.logger.info(f"Executing decision: {decision['decision_type']}")
+        self.logger.info("Executing decision: %s", decision['decision_type'])
         return {'status': 'completed', 'timestamp': datetime.utcnow().isoformat()}
     
     def update_performance_metrics(self, metrics: Dict[str, Any]):
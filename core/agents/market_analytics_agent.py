@@ -1,9 +1,24 @@
+import contextvars
 import logging
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable, Iterator
 from datetime import datetime, timedelta
 from agents.base_agent import BaseAgent, AgentStatus, DecisionImpact
+from infrastructure.market_data_cache import MarketDataCache
+from infrastructure.cancellation import current_token
+from infrastructure.persistence import MODELS_AVAILABLE
+from infrastructure.timeseries_store import TimeSeriesStore, ROLLUP_SECONDS
+from scrapers.base_scraper import AmazonScraper
+from scrapers.price_watch import PriceWatcher
+from analytics.trend_engine import TrendEngine, OBSERVATION_DATA_TYPE
+from analytics.sentiment_engine import SentimentEngine
+from analytics.ranking import TopKRanker
+
+if MODELS_AVAILABLE:
+    from infrastructure.persistence import Niche, BlogInstance, MarketData
 
 class MarketAnalyticsAgent(BaseAgent):
     """
@@ -11,16 +26,67 @@ class MarketAnalyticsAgent(BaseAgent):
     Monitors product trends, analyzes market data, and provides insights for content strategy.
     """
     
-    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379):
+    # Market data kept fresh for every active niche by the scheduled analysis
+    SCHEDULED_DATA_TYPES = ('product_trend', 'trend_insights', 'competitor_analysis')
+    
+    # Numeric observation fields kept as columns in the time-series store
+    OBSERVATION_METRICS = ('search_volume', 'price', 'rating', 'review_count')
+    
+    def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379,
+                 timeseries_dir: Optional[str] = None):
         super().__init__("market_analytics", "market_analytics", redis_host, redis_port)
         
-        # Market data cache
-        self.market_data_cache = {}
-        
         # Trend analysis settings
         self.trend_threshold = 0.7  # Minimum trend score to consider significant
         self.data_freshness_hours = 6  # How often to refresh market data
         
+        # Market data cache (memory + MarketData rows), refreshed in the background once stale
+        self.market_data_cache = MarketDataCache(
+            freshness_seconds=self.data_freshness_hours * 3600,
+            session_factory=self.db_session
+        )
+        self.market_data_cache.register('product_trend', self.fetch_trending_products)
+        self.market_data_cache.register('trend_insights', self.fetch_trend_insights)
+        self.market_data_cache.register('competitor_analysis', self.fetch_competitor_analysis)
+        
+        # Research sub-analyses run in parallel, each bounded by its own timeout (seconds)
+        self.research_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='market-research')
+        self.default_source_timeout = 30.0
+        self.source_timeouts = {
+            'trending_products': 30.0,
+            'market_insights': 20.0,
+            'competitor_analysis': 30.0
+        }
+        
+        # Columnar price/trend history per product and metric (file-backed when a directory is given)
+        self.timeseries = TimeSeriesStore(root_dir=timeseries_dir)
+        
+        # Tracked product pages are re-scraped on a schedule; only price changes are stored.
+        # Passes run on their own thread so slow pages never hold up message handling
+        self.product_scraper = None
+        self.product_scraper_lock = threading.Lock()
+        self.price_watch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='price-watch-pass')
+        self.price_watch_pass = None
+        self.price_watcher = PriceWatcher(
+            self.fetch_product_price,
+            session_factory=self.db_session,
+            timeseries=self.timeseries
+        )
+        
+        # Vectorized trend scoring over the observation columns; latest scores by product name
+        self.trend_engine = TrendEngine()
+        self.trend_scores = {}
+        self.trend_window_points = 90  # most recent observations scored per product
+        
+        # Offline lexicon sentiment scoring for review batches
+        self.sentiment_engine = SentimentEngine()
+        
+        # Scheduled analysis runs once per window, refreshing stale niches in parallel
+        self.analysis_interval_hours = 6
+        self.analysis_retry_seconds = 600  # wait before retrying niches that failed in the current window
+        self.scheduled_analysis_workers = 4
+        self.scheduled_analysis_lock = threading.Lock()
+        
         # Performance tracking
         self.analysis_count = 0
         self.successful_predictions = 0
@@ -52,6 +118,12 @@ class MarketAnalyticsAgent(BaseAgent):
             return self.discover_trending_products(task_data)
         elif task_type == 'sentiment_analysis':
             return self.analyze_market_sentiment(task_data)
+        elif task_type == 'trend_scoring':
+            return self.score_market_trends(task_data)
+        elif task_type == 'metric_history':
+            return self.get_metric_history(task_data)
+        elif task_type == 'price_monitoring':
+            return self.monitor_prices(task_data)
         else:
             return {'error': f'Unknown task type: {task_type}'}
     
@@ -61,7 +133,7 @@ class MarketAnalyticsAgent(BaseAgent):
         product_category = research_data.get('product_category')
         blog_instance_id = research_data.get('blog_instance_id')
         
-        self.logger.info(f"Starting market research for niche: {niche}")
+        self.logger.info("Starting market research for niche: %s", niche)
         
         research_results = {
             'niche': niche,
@@ -75,28 +147,31 @@ class MarketAnalyticsAgent(BaseAgent):
         }
         
         try:
-            # 1. Discover trending products
-            trending_products = self.discover_trending_products({
-                'niche': niche,
-                'limit': 10
+            # Independent sub-analyses run concurrently; a slow or failing source only
+            # costs its own section of the report
+            outcomes = self.run_concurrently({
+                'trending_products': (self.discover_trending_products, {'niche': niche, 'limit': 10}),
+                'market_insights': (self.analyze_trends, {'niche': niche, 'timeframe': '30d'}),
+                'competitor_analysis': (self.analyze_competition, {'niche': niche, 'top_competitors': 5})
             })
-            research_results['trending_products'] = trending_products.get('products', [])
             
-            # 2. Analyze market trends
-            trend_analysis = self.analyze_trends({
-                'niche': niche,
-                'timeframe': '30d'
-            })
-            research_results['market_insights'] = trend_analysis.get('insights', {})
+            errors = {}
+            for section, field in (('trending_products', 'products'),
+                                   ('market_insights', 'insights'),
+                                   ('competitor_analysis', 'analysis')):
+                outcome = outcomes[section]
+                if outcome.get('status') == 'success':
+                    research_results[section] = outcome.get(field, research_results[section])
+                else:
+                    errors[section] = outcome.get('error', 'unknown error')
             
-            # 3. Competitive analysis
-            competitor_analysis = self.analyze_competition({
-                'niche': niche,
-                'top_competitors': 5
-            })
-            research_results['competitor_analysis'] = competitor_analysis.get('analysis', {})
+            if len(errors) == len(outcomes):
+                raise RuntimeError(f"All research sources failed: {errors}")
             
-            # 4. Generate recommendations
+            research_results['partial'] = bool(errors)
+            research_results['errors'] = errors
+            
+            # Generate recommendations from whatever sections succeeded
             recommendations = self.generate_market_recommendations(research_results)
             research_results['recommendations'] = recommendations
             
@@ -107,18 +182,75 @@ class MarketAnalyticsAgent(BaseAgent):
                 'last_analysis': datetime.utcnow().isoformat()
             })
             
-            self.logger.info(f"Market research completed for {niche}")
+            self.logger.info("Market research completed for %s", niche)
             return {'status': 'success', 'data': research_results}
         
         except Exception as e:
             self.logger.error(f"Market research failed: {str(e)}")
             return {'status': 'error', 'error': str(e)}
     
+    def run_concurrently(self, calls: Dict[str, tuple]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run {name: (method, args)} on the research pool and collect their results.
+        Each call gets source_timeouts[name] seconds (capped by the task deadline);
+        calls that time out or raise are reported as {'status': 'error', 'error': ...}.
+        """
+        started = time.monotonic()
+        token = current_token()
+        
+        # Copy the context so scrapers in worker threads see the task's cancel token
+        futures = {
+            name: self.research_executor.submit(contextvars.copy_context().run, method, args)
+            for name, (method, args) in calls.items()
+        }
+        
+        outcomes = {}
+        for name, future in futures.items():
+            timeout = self.source_timeouts.get(name, self.default_source_timeout)
+            if token is not None and token.remaining() is not None:
+                timeout = min(timeout, token.remaining())
+            remaining = max(timeout - (time.monotonic() - started), 0.0)
+            
+            try:
+                outcomes[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # The call keeps running and still fills the market data cache
+                self.logger.warning(f"Research source {name} timed out after {timeout:.1f}s")
+                outcomes[name] = {'status': 'error', 'error': f'timed out after {timeout:.1f}s'}
+            except Exception as e:
+                self.logger.error(f"Research source {name} failed: {str(e)}")
+                outcomes[name] = {'status': 'error', 'error': str(e)}
+        
+        return outcomes
+    
     def discover_trending_products(self, discovery_data: Dict[str, Any]) -> Dict[str, Any]:
         """Discover trending products in a specific niche"""
         niche = discovery_data.get('niche')
         limit = discovery_data.get('limit', 10)
         
+        candidates, freshness = self.market_data_cache.get(niche, 'product_trend')
+        
+        # Stream candidates through a bounded top-k heap: products below the trend
+        # threshold are pruned, and duplicates across sources keep their best score
+        ranker = TopKRanker(limit, min_score=self.trend_threshold).extend(
+            self.score_candidates(candidates)
+        )
+        
+        return {
+            'status': 'success',
+            'products': ranker.results(),
+            'total_found': ranker.accepted,
+            'data_freshness': freshness
+        }
+    
+    def score_candidates(self, candidates: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield candidates, preferring scores computed from observed data over the sources' own"""
+        for product in candidates:
+            scored = self.trend_scores.get(product.get('name'))
+            yield {**product, 'trend_score': scored['trend_score']} if scored else product
+    
+    def fetch_trending_products(self, niche: str) -> List[Dict[str, Any]]:
+        """Collect candidate products for a niche from the product sources"""
         # Mock implementation - in real system, this would scrape various sources
         mock_products = [
             {
@@ -153,19 +285,108 @@ class MarketAnalyticsAgent(BaseAgent):
             }
         ]
         
-        # Filter products above trend threshold
-        trending_products = [
-            product for product in mock_products 
-            if product['trend_score'] >= self.trend_threshold
-        ]
+        return mock_products
+    
+    def score_market_trends(self, scoring_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Score every tracked product's observations and write the scores back to MarketData"""
+        scoring_data = scoring_data or {}
+        metric = scoring_data.get('metric', 'search_volume')
+        
+        try:
+            # Pull new observation rows into the columnar store, then score from its arrays
+            self.timeseries.ingest_market_data(self.db_session, OBSERVATION_DATA_TYPE, self.OBSERVATION_METRICS)
+            scores = self.trend_engine.score_columns(
+                self.timeseries.value_columns(metric, last=self.trend_window_points)
+            )
+            self.trend_engine.write_scores(self.db_session, scores)
+        except Exception as e:
+            self.logger.error(f"Trend scoring failed: {str(e)}")
+            return {'status': 'error', 'error': str(e)}
+        
+        self.trend_scores.update(scores)
+        anomalies = sorted(name for name, result in scores.items() if result['anomaly'])
+        
+        return {
+            'status': 'success',
+            'products_scored': len(scores),
+            'anomalies': anomalies
+        }
+    
+    def fetch_product_price(self, url: str) -> Optional[float]:
+        """Current price on a product page, or None if it could not be scraped"""
+        # Fetches run on the watcher's worker threads; they must share one scraper
+        with self.product_scraper_lock:
+            if self.product_scraper is None:
+                self.product_scraper = AmazonScraper()
+        
+        result = self.product_scraper.scrape_data(url)
+        if result.get('status') != 'success':
+            return None
+        return result['data'].get('price')
+    
+    def monitor_prices(self, monitoring_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Check tracked products that are due and raise a market alert for large price moves"""
+        try:
+            if (monitoring_data or {}).get('sync'):
+                self.price_watcher.sync_products(force=True)
+            outcome = self.price_watcher.run_due()
+        except Exception as e:
+            self.logger.error(f"Price monitoring failed: {str(e)}")
+            return {'status': 'error', 'error': str(e)}
+        
+        if outcome['alerts']:
+            self.make_autonomous_decision({
+                'type': 'market_alert',
+                'alert_type': 'price_change',
+                'threshold_percent': self.price_watcher.alert_threshold_percent,
+                'changes': outcome['alerts']
+            })
         
-        # Sort by trend score
-        trending_products.sort(key=lambda x: x['trend_score'], reverse=True)
+        return {
+            'status': 'success',
+            'checked': outcome['checked'],
+            'changed': len(outcome['changed']),
+            'failed': outcome['failed'],
+            'alerts': outcome['alerts']
+        }
+    
+    def schedule_price_check(self) -> bool:
+        """Start a background price monitoring pass unless one is still running"""
+        if self.price_watch_pass is not None and not self.price_watch_pass.done():
+            return False
+        self.price_watch_pass = self.price_watch_executor.submit(self.monitor_prices)
+        return True
+    
+    def get_metric_history(self, history_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Downsampled history of one product metric, for charts"""
+        product = history_data.get('product_name')
+        metric = history_data.get('metric', 'price')
+        interval = history_data.get('interval', 'daily')
+        
+        if interval not in ROLLUP_SECONDS:
+            return {'status': 'error', 'error': f'Unknown interval: {interval}'}
+        
+        rollup = self.timeseries.rollup(product, metric, interval,
+                                        start=history_data.get('start'), end=history_data.get('end'))
+        points = [
+            {
+                'timestamp': datetime.utcfromtimestamp(bucket).isoformat(),
+                'open': rollup['open'][index].item(),
+                'high': rollup['high'][index].item(),
+                'low': rollup['low'][index].item(),
+                'close': rollup['close'][index].item(),
+                'mean': rollup['mean'][index].item(),
+                'count': int(rollup['count'][index])
+            }
+            for index, bucket in enumerate(rollup['bucket'].tolist())
+        ]
         
         return {
             'status': 'success',
-            'products': trending_products[:limit],
-            'total_found': len(trending_products)
+            'product_name': product,
+            'metric': metric,
+            'interval': interval,
+            'points': points
         }
     
     def analyze_trends(self, trend_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -173,6 +394,22 @@ class MarketAnalyticsAgent(BaseAgent):
         niche = trend_data.get('niche')
         timeframe = trend_data.get('timeframe', '30d')
         
+        # Only the default timeframe is cached; other windows are computed on demand
+        if timeframe == '30d':
+            trend_insights, freshness = self.market_data_cache.get(niche, 'trend_insights')
+        else:
+            trend_insights, freshness = self.fetch_trend_insights(niche, timeframe), MarketDataCache.MISS
+        
+        return {
+            'status': 'success',
+            'niche': niche,
+            'timeframe': timeframe,
+            'insights': trend_insights,
+            'data_freshness': freshness
+        }
+    
+    def fetch_trend_insights(self, niche: str, timeframe: str = '30d') -> Dict[str, Any]:
+        """Collect trend insights for a niche over a timeframe"""
         # Mock trend analysis - in real system, this would use Google Trends API, etc.
         trend_insights = {
             'overall_trend': 'upward',
@@ -196,18 +433,27 @@ class MarketAnalyticsAgent(BaseAgent):
             ]
         }
         
-        return {
-            'status': 'success',
-            'niche': niche,
-            'timeframe': timeframe,
-            'insights': trend_insights
-        }
+        return trend_insights
     
     def analyze_competition(self, competition_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze competition in a specific niche"""
         niche = competition_data.get('niche')
         top_competitors = competition_data.get('top_competitors', 5)
         
+        competitor_analysis, freshness = self.market_data_cache.get(niche, 'competitor_analysis')
+        
+        return {
+            'status': 'success',
+            'niche': niche,
+            'analysis': {
+                **competitor_analysis,
+                'market_leaders': competitor_analysis.get('market_leaders', [])[:top_competitors]
+            },
+            'data_freshness': freshness
+        }
+    
+    def fetch_competitor_analysis(self, niche: str) -> Dict[str, Any]:
+        """Collect competitor data for a niche"""
         # Mock competitive analysis
         competitor_analysis = {
             'competition_level': 'medium',
@@ -239,38 +485,18 @@ class MarketAnalyticsAgent(BaseAgent):
             'recommended_strategy': 'focus on underserved segments and content gaps'
         }
         
-        return {
-            'status': 'success',
-            'niche': niche,
-            'analysis': competitor_analysis
-        }
+        return competitor_analysis
     
     def analyze_market_sentiment(self, sentiment_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze market sentiment for products or niches"""
+        """Analyze market sentiment for products or niches from review texts"""
         target = sentiment_data.get('target')  # product name or niche
         
-        # Mock sentiment analysis
-        sentiment_results = {
-            'overall_sentiment': 'positive',
-            'sentiment_score': 0.72,  # -1 to 1 scale
-            'positive_mentions': 68,
-            'negative_mentions': 22,
-            'neutral_mentions': 10,
-            'key_positive_themes': [
-                'great value for money',
-                'excellent build quality',
-                'outstanding customer service'
-            ],
-            'key_negative_themes': [
-                'shipping delays',
-                'complex setup process'
-            ],
-            'trending_concerns': [
-                'sustainability',
-                'warranty coverage'
-            ],
-            'recommendation': 'positive sentiment with minor concerns to address'
-        }
+        reviews = sentiment_data.get('reviews') or self.load_reviews(target)
+        texts = [review.get('text', '') if isinstance(review, dict) else str(review) for review in reviews]
+        if not texts:
+            return {'status': 'error', 'error': f'No reviews available for {target}'}
+        
+        sentiment_results = self.sentiment_engine.analyze(texts)
         
         return {
             'status': 'success',
@@ -278,6 +504,21 @@ class MarketAnalyticsAgent(BaseAgent):
             'sentiment': sentiment_results
         }
     
+    def load_reviews(self, target: Optional[str], limit: int = 50000) -> List[str]:
+        """Review texts collected for a product, stored as product_review MarketData rows"""
+        if not target or not MODELS_AVAILABLE:
+            return []
+        
+        with self.db_session() as session:
+            if session is None:
+                return []
+            
+            rows = session.query(MarketData.data_payload).filter(
+                MarketData.data_type == 'product_review',
+                MarketData.product_name == target
+            ).order_by(MarketData.created_at.desc()).limit(limit)
+            return [(payload or {}).get('text', '') for (payload,) in rows]
+    
     def generate_market_recommendations(self, research_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate actionable recommendations based on market research"""
         recommendations = []
@@ -358,16 +599,32 @@ class MarketAnalyticsAgent(BaseAgent):
         else:
             return super().execute_decision(decision)
     
+    def shutdown(self):
+        """Stop background research and cache refreshes before shutting down"""
+        self.market_data_cache.shutdown()
+        self.research_executor.shutdown(wait=False)
+        self.price_watch_executor.shutdown(wait=False)
+        self.timeseries.flush()
+        if self.product_scraper is not None:
+            self.product_scraper.shutdown()
+        super().shutdown()
+    
     def start_monitoring_loop(self):
         """Start continuous market monitoring"""
         self.logger.info("Starting market analytics monitoring loop")
         
+        # Pick up the last analysis window so a restart does not repeat it
+        self.restore_state()
+        
         while self.status != AgentStatus.ERROR:
             try:
-                # Perform periodic market analysis
-                if datetime.utcnow().hour % 6 == 0:  # Every 6 hours
+                # Perform periodic market analysis, once per analysis window
+                if self.analysis_window() != self.state_data.get('last_analysis_window'):
                     self.perform_scheduled_analysis()
                 
+                # Re-check prices of tracked products that are due, off the loop thread
+                self.schedule_price_check()
+                
                 # Listen for messages and task assignments
                 self.listen_for_messages()
                 
@@ -383,13 +640,129 @@ class MarketAnalyticsAgent(BaseAgent):
         
         self.shutdown()
     
-    def perform_scheduled_analysis(self):
-        """Perform scheduled market analysis"""
-        self.logger.info("Performing scheduled market analysis")
-        
-        # This would typically analyze all active niches
-        # For now, we'll just update our performance metrics
-        self.update_performance_metrics({
-            'last_scheduled_analysis': datetime.utcnow().isoformat(),
-            'total_scheduled_analyses': self.performance_metrics.get('total_scheduled_analyses', 0) + 1
-        })
\ No newline at end of file
+    def analysis_window(self, now: Optional[datetime] = None) -> str:
+        """Start of the scheduled analysis window containing now, as an ISO timestamp"""
+        now = now or datetime.utcnow()
+        interval = int(self.analysis_interval_hours * 3600)
+        seconds = int((now - datetime(1970, 1, 1)).total_seconds())
+        return datetime.utcfromtimestamp(seconds - seconds % interval).isoformat()
+    
+    def active_niches(self) -> List[str]:
+        """Names of active niches and of niches with an active blog instance"""
+        if not MODELS_AVAILABLE:
+            return []
+        
+        with self.db_session() as session:
+            if session is None:
+                return []
+            
+            names = {name for (name,) in session.query(Niche.name).filter(Niche.active.is_(True))}
+            names.update(
+                name for (name,) in session.query(Niche.name)
+                .join(BlogInstance, BlogInstance.niche_id == Niche.id)
+                .filter(BlogInstance.status == 'active')
+            )
+            return sorted(names)
+    
+    def stale_data_types(self, niche: str) -> List[str]:
+        """Scheduled data types whose cached market data is not fresh for a niche"""
+        return [
+            data_type for data_type in self.SCHEDULED_DATA_TYPES
+            if self.market_data_cache.peek(niche, data_type)[0] != MarketDataCache.FRESH
+        ]
+    
+    def refresh_niche(self, niche: str, data_types: List[str]) -> List[str]:
+        for data_type in data_types:
+            self.market_data_cache.refresh(niche, data_type)
+        return data_types
+    
+    def perform_scheduled_analysis(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Refresh stale market data for every active niche, once per analysis window.
+        Niches are refreshed in a bounded pool. Completion is recorded per niche, and
+        the window only counts as done once every niche has completed, so niches that
+        failed (or were cut off by a crash) are retried within the window, no sooner
+        than analysis_retry_seconds after the previous attempt.
+        """
+        now = now or datetime.utcnow()
+        window = self.analysis_window(now)
+        if self.state_data.get('last_analysis_window') == window:
+            return {'status': 'skipped', 'window': window}
+        
+        attempt = self.state_data.get('last_analysis_attempt') or {}
+        if attempt.get('window') == window and \
+                now < datetime.fromisoformat(attempt['at']) + timedelta(seconds=self.analysis_retry_seconds):
+            return {'status': 'skipped', 'window': window, 'reason': 'retrying failed niches later'}
+        
+        if not self.scheduled_analysis_lock.acquire(blocking=False):
+            return {'status': 'skipped', 'window': window, 'reason': 'already running'}
+        
+        try:
+            self.logger.info(f"Performing scheduled market analysis for window {window}")
+            
+            niches = self.active_niches()
+            # Window in which each niche last completed; niches no longer active are dropped
+            completed = {
+                niche: niche_window for niche, niche_window in self.state_data.get('niche_windows', {}).items()
+                if niche in niches
+            }
+            stale = {}
+            for niche in niches:
+                if completed.get(niche) == window:
+                    continue
+                data_types = self.stale_data_types(niche)
+                if data_types:
+                    stale[niche] = data_types
+                else:
+                    completed[niche] = window
+            
+            refreshed, failed = {}, {}
+            watermarks = dict(self.state_data.get('niche_watermarks', {}))
+            
+            if stale:
+                with ThreadPoolExecutor(max_workers=self.scheduled_analysis_workers,
+                                        thread_name_prefix='market-schedule') as pool:
+                    futures = {
+                        pool.submit(self.refresh_niche, niche, data_types): niche
+                        for niche, data_types in stale.items()
+                    }
+                    for future in as_completed(futures):
+                        niche = futures[future]
+                        try:
+                            refreshed[niche] = future.result()
+                            watermarks[niche] = datetime.utcnow().isoformat()
+                            completed[niche] = window
+                        except Exception as e:
+                            self.logger.error(f"Scheduled refresh for {niche} failed: {str(e)}")
+                            failed[niche] = str(e)
+            
+            # Rescore products against the observations collected since the last window
+            scoring = self.score_market_trends()
+            
+            self.update_performance_metrics({
+                'last_scheduled_analysis': datetime.utcnow().isoformat(),
+                'total_scheduled_analyses': self.performance_metrics.get('total_scheduled_analyses', 0) + 1
+            })
+            state = {
+                'niche_watermarks': watermarks,
+                'niche_windows': completed,
+                'last_analysis_attempt': {'window': window, 'at': now.isoformat()}
+            }
+            if not failed:
+                state['last_analysis_window'] = window
+            self.update_state(state)
+            
+            self.logger.info(f"Scheduled analysis refreshed {len(refreshed)} of {len(niches)} niches "
+                             f"({len(failed)} failed)")
+            
+            return {
+                'status': 'partial' if failed else 'success',
+                'window': window,
+                'niches': len(niches),
+                'refreshed': refreshed,
+                'failed': failed,
+                'fresh': len(niches) - len(stale),
+                'products_scored': scoring.get('products_scored', 0)
+            }
+        finally:
+            self.scheduled_analysis_lock.release()
@@ -1,8 +1,16 @@
 import logging
 import time
+import uuid
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from agents.base_agent import BaseAgent, AgentStatus, DecisionImpact
+from infrastructure.capability_index import CapabilityIndex
+from infrastructure.logging_setup import LazyPayload
+from infrastructure.workflow_engine import WorkflowEngine, Workflow, WorkflowNode
+from infrastructure.approval_store import ApprovalStore, ApprovalRulesEngine
+from infrastructure.timer_wheel import HierarchicalTimerWheel
+from infrastructure.result_cache import ResultCache
+from infrastructure.cancellation import CancellationToken, parse_deadline
 
 class OrchestratorAgent(BaseAgent):
     """
@@ -10,21 +18,53 @@ class OrchestratorAgent(BaseAgent):
     coordinates agent assignments, and handles major decision approvals.
     """
     
+    # Agent statuses that can receive new task assignments
+    DISPATCHABLE_STATUSES = ('active', 'idle')
+    
+    # Workflow task types whose results are shared across workflows with identical inputs
+    SHARED_RESULT_TASK_TYPES = ('market_research', 'keyword_research')
+    
     def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379):
         super().__init__("orchestrator", "orchestrator", redis_host, redis_port)
         
         # Track all registered agents
         self.registered_agents = {}
         
+        # Capability -> agents index with per-agent load, used for dispatch
+        self.capability_index = CapabilityIndex()
+        
+        # Heartbeat deadlines; agents silent for heartbeat_timeout seconds are marked unresponsive
+        self.clock = time.monotonic
+        self.heartbeat_timeout = 600.0
+        self.liveness_wheel = HierarchicalTimerWheel(tick=1.0, start_time=self.clock())
+        self.unresponsive_agents = set()
+        
+        # Workflow deadlines; workflows still running when theirs passes are cancelled
+        self.default_workflow_timeout = 3600.0
+        self.deadline_wheel = HierarchicalTimerWheel(tick=1.0, start_time=self.clock())
+        
         # Track blog instances and their assigned agents
         self.blog_instances = {}
         
-        # Approval queue for high-impact decisions
-        self.approval_queue = []
+        # Indexed approval requests (mirrored to AgentDecision) and auto-approval rules
+        self.approval_store = ApprovalStore(session_factory=self.db_session)
+        self.approval_rules = ApprovalRulesEngine()
         
         # Task queue for coordinating work
         self.task_queue = []
         
+        # Research results shared between workflows (TTL + single-flight), keyed by
+        # task type and normalized parameters; research_leaders maps task_id -> cache key
+        self.research_cache = ResultCache(ttl_seconds=1800)
+        self.research_leaders = {}
+        
+        # Workflow DAGs in progress, persisted to AgentTask rows when a database is attached
+        self.workflow_engine = WorkflowEngine(
+            self.dispatch_workflow_node,
+            session_factory=self.db_session,
+            on_complete=self.handle_workflow_complete
+        )
+        
         # Performance monitoring
         self.system_metrics = {
             'total_tasks_completed': 0,
@@ -35,6 +75,11 @@ class OrchestratorAgent(BaseAgent):
         
         self.logger.info("Orchestrator Agent initialized")
     
+    def attach_app(self, app):
+        """Attach the app, then pick up approval requests left pending in the database"""
+        super().attach_app(app)
+        self.approval_store.load_pending()
+    
     def get_capabilities(self) -> List[str]:
         """Return list of orchestrator capabilities"""
         return [
@@ -60,6 +105,12 @@ class OrchestratorAgent(BaseAgent):
             return self.perform_system_health_check()
         elif task_type == 'process_approval_queue':
             return self.process_approval_queue()
+        elif task_type in ('bulk_approve_decisions', 'bulk_reject_decisions'):
+            return self.bulk_decide(task_data)
+        elif task_type == 'workflow_status':
+            return self.get_workflow_status(task_data)
+        elif task_type == 'cancel_workflow':
+            return self.cancel_workflow(task_data.get('workflow_id'), task_data.get('reason', 'cancelled'))
         else:
             return {'error': f'Unknown task type: {task_type}'}
     
@@ -80,9 +131,15 @@ class OrchestratorAgent(BaseAgent):
             'assigned_blogs': [],
             'performance_metrics': {}
         }
+        self.capability_index.add_agent(agent_name, capabilities)
+        self.unresponsive_agents.discard(agent_name)
+        self.liveness_wheel.schedule(agent_name, self.clock() + self.heartbeat_timeout)
         
         self.logger.info(f"Agent {agent_name} ({agent_type}) registered successfully")
         
+        # Restored workflows may have been waiting for an agent like this one
+        self.workflow_engine.retry_pending(capabilities)
+        
         # Broadcast agent registration to all agents
         self.broadcast_message({
             'type': 'agent_registered',
@@ -127,89 +184,275 @@ class OrchestratorAgent(BaseAgent):
         }
     
     def coordinate_content_generation(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Coordinate content generation across multiple agents"""
+        """Coordinate content generation across multiple agents as a workflow DAG"""
         blog_instance_id = request_data.get('blog_instance_id')
         content_type = request_data.get('content_type', 'article')
         priority = request_data.get('priority', 5)
+        timeout_seconds = request_data.get('timeout_seconds', self.default_workflow_timeout)
         
-        # Find appropriate agents for content generation
-        content_agents = self.find_agents_by_capability('content_generation')
-        market_agents = self.find_agents_by_capability('market_research')
-        seo_agents = self.find_agents_by_capability('seo_optimization')
-        
-        if not content_agents:
+        if not self.find_agents_by_capability('content_generation'):
             return {'error': 'No content generation agents available'}
         
-        # Create coordinated workflow
-        workflow_id = f"content_gen_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-        
-        # Step 1: Market research
-        if market_agents:
-            market_task = {
-                'type': 'task_assignment',
-                'task_id': f"{workflow_id}_market",
-                'task_type': 'market_research',
-                'blog_instance_id': blog_instance_id,
-                'priority': priority,
-                'assigned_by': self.agent_name,
-                'workflow_id': workflow_id
-            }
-            self.send_message(market_agents[0], market_task)
-        
-        # Step 2: SEO research (can run in parallel with market research)
-        if seo_agents:
-            seo_task = {
-                'type': 'task_assignment',
-                'task_id': f"{workflow_id}_seo",
-                'task_type': 'keyword_research',
-                'blog_instance_id': blog_instance_id,
-                'priority': priority,
-                'assigned_by': self.agent_name,
-                'workflow_id': workflow_id
-            }
-            self.send_message(seo_agents[0], seo_task)
+        workflow_id = f"content_gen_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        
+        # Callers pass either an absolute UTC deadline or a timeout relative to now
+        deadline = request_data.get('deadline') or (
+            (datetime.utcnow() + timedelta(seconds=timeout_seconds)).isoformat()
+        )
+        
+        # Market and SEO research run in parallel; content generation starts once both
+        # have finished and still runs (with whatever research succeeded) if one fails
+        workflow = Workflow(workflow_id, [
+            WorkflowNode('market', 'market_research', 'market_research'),
+            WorkflowNode('seo', 'keyword_research', 'seo_optimization'),
+            WorkflowNode('content', 'content_generation', 'content_generation',
+                         depends_on=['market', 'seo'], params={'content_type': content_type},
+                         allow_partial=True)
+        ], context={'blog_instance_id': blog_instance_id, 'priority': priority, 'deadline': deadline})
+        
+        self.track_workflow_deadline(workflow)
+        self.workflow_engine.start(workflow)
         
-        # Step 3: Content generation (will wait for research results)
-        content_task = {
+        self.logger.info("Content generation workflow %s initiated", workflow_id)
+        
+        return {
+            'status': 'success',
+            'workflow_id': workflow_id,
+            'message': 'Content generation workflow initiated',
+            'workflow': workflow.to_dict()
+        }
+    
+    def dispatch_workflow_node(self, workflow: Workflow, node: WorkflowNode) -> bool:
+        """Send a ready workflow node to the least-loaded capable agent"""
+        cache_key = None
+        if node.task_type in self.SHARED_RESULT_TASK_TYPES:
+            cache_key = ResultCache.make_key(node.task_type, {
+                'blog_instance_id': workflow.context.get('blog_instance_id'),
+                **node.params
+            })
+            outcome, value = self.research_cache.lookup(cache_key, node.task_id)
+            
+            if outcome == ResultCache.HIT:
+                self.workflow_engine.finish_node(workflow, node, 'completed', result=value)
+                return False
+            if outcome == ResultCache.JOINED:
+                # Completed when the identical in-flight task (value is its task id) reports back
+                self.logger.info("Workflow task %s sharing in-flight result of %s", node.task_id, value)
+                return True
+        
+        token = self.workflow_token(workflow)
+        if token.expired:
+            # Never hand out work nobody will wait for
+            self.workflow_engine.finish_node(workflow, node, 'failed', error='deadline exceeded')
+            if cache_key:
+                self.release_shared_result(node.task_id, cache_key, None, 'deadline exceeded')
+            return False
+        
+        agent_name = self.select_agent(node.capability)
+        if not agent_name:
+            if cache_key:
+                self.release_shared_result(node.task_id, cache_key, None, 'No agent available')
+            return False
+        
+        task = {
+            **node.params,
             'type': 'task_assignment',
-            'task_id': f"{workflow_id}_content",
-            'task_type': 'content_generation',
-            'content_type': content_type,
-            'blog_instance_id': blog_instance_id,
-            'priority': priority,
+            'task_id': node.task_id,
+            'task_type': node.task_type,
+            'blog_instance_id': workflow.context.get('blog_instance_id'),
+            'priority': workflow.context.get('priority', 5),
             'assigned_by': self.agent_name,
-            'workflow_id': workflow_id,
-            'depends_on': [f"{workflow_id}_market", f"{workflow_id}_seo"]
+            'workflow_id': workflow.workflow_id,
+            'depends_on': [workflow.task_id_for(dependency) for dependency in node.depends_on],
+            'upstream_results': workflow.upstream_results(node),
+            **token.to_envelope()
         }
-        self.send_message(content_agents[0], content_task)
         
-        self.logger.info(f"Content generation workflow {workflow_id} initiated")
+        node.assigned_agent = agent_name
+        if cache_key:
+            # Shared research serves every workflow that joins it, so cancelling the leader's workflow
+            # must not cancel it: it gets its own token, expiring when the cache gives up on it
+            task.update(CancellationToken.with_timeout(
+                self.research_cache.inflight_ttl, self.shared_token_id(node.task_id)
+            ).to_envelope())
+            self.research_leaders[node.task_id] = cache_key
+        return self.dispatch_task(agent_name, task)
+    
+    @staticmethod
+    def shared_token_id(task_id: str) -> str:
+        return f"shared:{task_id}"
+    
+    def release_shared_result(self, task_id: str, cache_key: tuple, result: Optional[Dict[str, Any]],
+                              error: Optional[str]):
+        """Cache a leader's research result and complete every workflow task waiting on it"""
+        self.research_leaders.pop(task_id, None)
+        
+        if error is None:
+            waiters = self.research_cache.resolve(cache_key, result)
+        else:
+            waiters = self.research_cache.fail(cache_key)
+        
+        for waiter_task_id in waiters:
+            self.workflow_engine.handle_task_result(waiter_task_id, result, error)
+    
+    @staticmethod
+    def workflow_token(workflow: Workflow) -> CancellationToken:
+        """Cancellation token shared by every task of a workflow"""
+        return CancellationToken(workflow.workflow_id, parse_deadline(workflow.context.get('deadline')))
+    
+    def track_workflow_deadline(self, workflow: Workflow):
+        """Schedule the workflow's deadline on the orchestrator clock"""
+        remaining = self.workflow_token(workflow).remaining()
+        if remaining is not None:
+            self.deadline_wheel.schedule(workflow.workflow_id, self.clock() + remaining)
+    
+    def check_workflow_deadlines(self) -> List[str]:
+        """Cancel workflows whose deadline passed before they finished"""
+        expired = self.deadline_wheel.advance(self.clock())
+        for workflow_id in expired:
+            self.cancel_workflow(workflow_id, 'deadline exceeded')
+        return expired
+    
+    def expire_shared_research(self) -> int:
+        """Fail workflows waiting on shared research whose leader never reported back"""
+        expired = self.research_cache.expire_inflight()
+        for cache_key, leader_task_id, waiters in expired:
+            self.research_leaders.pop(leader_task_id, None)
+            self.logger.warning(f"Shared task {leader_task_id} timed out; failing {len(waiters)} waiting tasks")
+            for waiter_task_id in waiters:
+                self.workflow_engine.handle_task_result(waiter_task_id, None, 'shared research timed out')
+            self.broadcast_message({
+                'type': 'cancel_tasks',
+                'cancel_token': self.shared_token_id(leader_task_id),
+                'reason': 'shared research timed out'
+            })
+        return len(expired)
+    
+    def cancel_workflow(self, workflow_id: str, reason: str = 'cancelled') -> Dict[str, Any]:
+        """Stop a running workflow and tell agents to drop any of its tasks"""
+        self.deadline_wheel.cancel(workflow_id)
+        if not self.workflow_engine.get_workflow(workflow_id):
+            return {'error': f"Workflow {workflow_id} not running"}
+        
+        in_flight = self.workflow_engine.cancel(workflow_id, reason)
+        
+        # Shared research keeps running for the other workflows waiting on it; with no waiters it is dropped
+        for task_id in in_flight:
+            cache_key = self.research_leaders.get(task_id)
+            if not cache_key:
+                continue
+            if self.research_cache.waiting(cache_key):
+                self.logger.info("Shared task %s continues for the workflows waiting on it", task_id)
+                continue
+            self.release_shared_result(task_id, cache_key, None, reason)
+            self.broadcast_message({
+                'type': 'cancel_tasks',
+                'cancel_token': self.shared_token_id(task_id),
+                'reason': reason
+            })
+        
+        self.broadcast_message({
+            'type': 'cancel_tasks',
+            'cancel_token': workflow_id,
+            'reason': reason
+        })
+        
+        self.logger.warning(f"Workflow {workflow_id} cancelled ({reason}); {len(in_flight)} tasks in flight")
         
         return {
             'status': 'success',
             'workflow_id': workflow_id,
-            'message': 'Content generation workflow initiated'
+            'cancelled_tasks': in_flight
         }
     
-    def find_agents_by_capability(self, capability: str) -> List[str]:
-        """Find all agents that have a specific capability"""
-        matching_agents = []
+    def get_workflow_status(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the state of a running workflow"""
+        workflow = self.workflow_engine.get_workflow(request_data.get('workflow_id'))
+        if not workflow:
+            return {'error': f"Workflow {request_data.get('workflow_id')} not running"}
+        return {'status': 'success', 'workflow': workflow.to_dict()}
+    
+    def handle_workflow_complete(self, workflow: Workflow):
+        """Record a finished workflow and let interested agents know"""
+        self.system_metrics['total_workflows_completed'] = self.system_metrics.get('total_workflows_completed', 0) + 1
+        self.deadline_wheel.cancel(workflow.workflow_id)
         
-        for agent_name, agent_info in self.registered_agents.items():
-            if capability in agent_info.get('capabilities', []):
-                if agent_info.get('status') == 'active':
-                    matching_agents.append(agent_name)
+        self.broadcast_message({
+            'type': 'workflow_completed',
+            'workflow_id': workflow.workflow_id,
+            'status': workflow.status,
+            'blog_instance_id': workflow.context.get('blog_instance_id')
+        })
+    
+    def find_agents_by_capability(self, capability: str) -> List[str]:
+        """Find all active agents that have a specific capability"""
+        return self.capability_index.agents_for(capability)
+    
+    def select_agent(self, capability: str, exclude: Optional[List[str]] = None) -> Optional[str]:
+        """Pick the least-loaded active agent for a capability"""
+        return self.capability_index.select(capability, exclude)
+    
+    def dispatch_task(self, agent_name: str, task: Dict[str, Any]) -> bool:
+        """Send a task assignment to an agent and account for it in the load index"""
+        sent = self.send_message(agent_name, task)
+        if sent:
+            self.capability_index.task_started(agent_name, task.get('task_id'))
+        return sent
+    
+    def record_heartbeat(self, agent_name: str):
+        """Push an agent's liveness deadline forward; any message from it counts"""
+        agent_info = self.registered_agents.get(agent_name)
+        if not agent_info:
+            return
+        
+        agent_info['last_seen'] = datetime.utcnow().isoformat()
+        self.liveness_wheel.schedule(agent_name, self.clock() + self.heartbeat_timeout)
+        
+        if agent_name in self.unresponsive_agents:
+            self.unresponsive_agents.discard(agent_name)
+            agent_info['status'] = 'active'
+            self.capability_index.set_active(agent_name, True)
+            self.logger.info(f"Agent {agent_name} is responsive again")
+    
+    def check_agent_liveness(self) -> List[str]:
+        """Mark agents whose heartbeat deadline passed as unresponsive and fail over their work"""
+        expired = self.liveness_wheel.advance(self.clock())
+        
+        for agent_name in expired:
+            agent_info = self.registered_agents.get(agent_name)
+            if not agent_info:
+                continue
+            
+            agent_info['status'] = 'unresponsive'
+            self.unresponsive_agents.add(agent_name)
+            self.capability_index.set_active(agent_name, False)
+            requeued = self.workflow_engine.requeue_agent_tasks(agent_name)
+            
+            self.logger.warning(f"Agent {agent_name} unresponsive since {agent_info['last_seen']}; "
+                                f"{requeued} workflow tasks reassigned")
+            self.broadcast_message({
+                'type': 'agent_unresponsive',
+                'agent_name': agent_name,
+                'last_seen': agent_info['last_seen'],
+                'requeued_tasks': requeued
+            })
         
-        return matching_agents
+        return expired
     
     def perform_system_health_check(self) -> Dict[str, Any]:
         """Perform a comprehensive system health check"""
+        self.check_agent_liveness()
+        
         health_report = {
             'timestamp': datetime.utcnow().isoformat(),
-            'overall_status': 'healthy',
+            'overall_status': 'degraded' if self.unresponsive_agents else 'healthy',
             'agents': {},
             'blog_instances': {},
-            'system_metrics': self.system_metrics
+            'system_metrics': self.system_metrics,
+            'dispatch_load': self.capability_index.snapshot(),
+            'research_cache': self.research_cache.snapshot(),
+            'liveness': self.liveness_wheel.snapshot(),
+            'workflow_deadlines': self.deadline_wheel.snapshot()
         }
         
         # Check agent health
@@ -217,21 +460,12 @@ class OrchestratorAgent(BaseAgent):
             # Request status from each agent
             self.send_message(agent_name, {'type': 'status_request'})
             
-            # Check if agent has been seen recently
-            last_seen = datetime.fromisoformat(agent_info['last_seen'])
-            time_since_seen = datetime.utcnow() - last_seen
-            
-            if time_since_seen > timedelta(minutes=10):
-                agent_status = 'unresponsive'
-                health_report['overall_status'] = 'degraded'
-            else:
-                agent_status = agent_info.get('status', 'unknown')
-            
             health_report['agents'][agent_name] = {
-                'status': agent_status,
+                'status': agent_info.get('status', 'unknown'),
                 'last_seen': agent_info['last_seen'],
                 'assigned_blogs': len(agent_info.get('assigned_blogs', [])),
-                'capabilities': agent_info.get('capabilities', [])
+                'capabilities': agent_info.get('capabilities', []),
+                'load': self.capability_index.get_load(agent_name)
             }
         
         # Check blog instance health
@@ -245,46 +479,84 @@ class OrchestratorAgent(BaseAgent):
         return health_report
     
     def process_approval_queue(self) -> Dict[str, Any]:
-        """Process pending approval requests"""
+        """Apply auto-approval rules to all pending requests in one batch"""
+        # Decisions approved/rejected through the API since the last pass
+        for decision in self.approval_store.refresh():
+            self.notify_decision_outcome(decision)
+        
+        outcome = self.approval_rules.evaluate(self.approval_store)
         processed_count = 0
         
-        for approval_request in self.approval_queue[:]:  # Copy list to avoid modification during iteration
-            # For now, we'll auto-approve low-risk decisions and log high-risk ones
-            impact_level = approval_request.get('impact_level', 'low')
-            
-            if impact_level == 'low':
-                # Auto-approve low-impact decisions
-                self.approve_decision(approval_request, 'auto_approved')
-                self.approval_queue.remove(approval_request)
-                processed_count += 1
-            elif impact_level == 'medium':
-                # Medium impact decisions need user approval
-                self.logger.warning(f"Medium impact decision requires approval: {approval_request}")
-            else:
-                # High impact decisions definitely need user approval
-                self.logger.critical(f"High impact decision requires immediate approval: {approval_request}")
+        for action, status in (('approve', 'approved'), ('reject', 'rejected')):
+            for rule_name, decision_ids in self._group_by_rule(outcome[action]).items():
+                decided = self.approval_store.set_status(decision_ids, status, f'auto:{rule_name}')
+                for decision in decided:
+                    self.notify_decision_outcome(decision)
+                processed_count += len(decided)
+        
+        # Decided requests live on in AgentDecision; keep only pending ones in memory
+        self.approval_store.evict('approved')
+        self.approval_store.evict('rejected')
         
         return {
             'status': 'success',
             'processed_count': processed_count,
-            'pending_count': len(self.approval_queue)
+            'pending_count': self.approval_store.count('pending')
+        }
+    
+    @staticmethod
+    def _group_by_rule(matches: List[tuple]) -> Dict[str, List[str]]:
+        grouped = {}
+        for decision_id, rule_name in matches:
+            grouped.setdefault(rule_name, []).append(decision_id)
+        return grouped
+    
+    def bulk_decide(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Approve or reject many pending decisions at once, by id or by index filter"""
+        status = 'approved' if request_data.get('type') == 'bulk_approve_decisions' else 'rejected'
+        decided_by = request_data.get('decided_by', 'admin')
+        
+        decision_ids = request_data.get('decision_ids')
+        if decision_ids is None:
+            filters = request_data.get('filter', {})
+            decision_ids = [
+                decision['decision_id'] for decision in self.approval_store.query(
+                    status='pending',
+                    impact=filters.get('impact_level'),
+                    agent=filters.get('agent_name')
+                )
+            ]
+        
+        decided = self.approval_store.set_status(
+            [str(decision_id) for decision_id in decision_ids], status, decided_by, request_data.get('reason')
+        )
+        for decision in decided:
+            self.notify_decision_outcome(decision)
+        
+        return {
+            'status': 'success',
+            'decided_count': len(decided),
+            'pending_count': self.approval_store.count('pending')
         }
     
     def approve_decision(self, decision: Dict[str, Any], approved_by: str):
         """Approve a decision and notify the requesting agent"""
-        decision['approval_status'] = 'approved'
-        decision['approved_by'] = approved_by
-        decision['approved_at'] = datetime.utcnow().isoformat()
-        
-        # Notify the requesting agent
-        requesting_agent = decision.get('agent_name')
+        decided = self.approval_store.set_status([decision['decision_id']], 'approved', approved_by)
+        for approved in decided:
+            self.notify_decision_outcome(approved)
+    
+    def notify_decision_outcome(self, decision: Dict[str, Any]):
+        """Tell the requesting agent whether its decision was approved or rejected"""
+        status = decision.get('approval_status')
+        requesting_agent = decision.get('agent_name') or decision.get('requesting_agent')
         if requesting_agent:
             self.send_message(requesting_agent, {
-                'type': 'decision_approved',
+                'type': 'decision_approved' if status == 'approved' else 'decision_rejected',
                 'decision': decision
             })
         
-        self.logger.info(f"Decision approved: {decision.get('decision_type')} by {approved_by}")
+        self.system_metrics['total_decisions_made'] += 1
+        self.logger.info("Decision %s: %s by %s", status, decision.get('decision_type'), decision.get('approved_by'))
     
     def handle_incoming_message(self, message: Dict[str, Any]):
         """Handle incoming messages with orchestrator-specific logic"""
@@ -294,6 +566,8 @@ class OrchestratorAgent(BaseAgent):
         message_type = data.get('type')
         sender = message.get('from')
         
+        self.record_heartbeat(sender)
+        
         if message_type == 'approval_request':
             self.handle_approval_request(data, sender)
         elif message_type == 'task_result':
@@ -307,45 +581,88 @@ class OrchestratorAgent(BaseAgent):
         decision['requesting_agent'] = sender
         decision['received_at'] = datetime.utcnow().isoformat()
         
-        self.approval_queue.append(decision)
-        self.logger.info(f"Approval request received from {sender}: {decision.get('decision_type')}")
+        decision_id = self.approval_store.add(decision)
+        
+        impact_level = decision.get('impact_level', 'low')
+        if impact_level == 'high':
+            self.logger.critical("High impact decision %s requires approval: %s", decision_id, LazyPayload(decision))
+        elif impact_level == 'medium':
+            self.logger.warning("Medium impact decision %s requires approval: %s", decision_id, LazyPayload(decision))
+        else:
+            self.logger.info("Approval request received from %s: %s", sender, decision.get('decision_type'))
     
     def handle_task_result(self, result_data: Dict[str, Any], sender: str):
         """Handle task completion results from other agents"""
         task_id = result_data.get('task_id')
         workflow_id = result_data.get('workflow_id')
         
-        self.logger.info(f"Task {task_id} completed by {sender}")
+        self.logger.info("Task %s completed by %s", task_id, sender)
         
         # Update system metrics
         self.system_metrics['total_tasks_completed'] += 1
         
+        latency = self.capability_index.task_finished(sender, task_id)
+        if latency is not None:
+            completed = self.system_metrics['total_tasks_completed']
+            average = self.system_metrics['average_response_time']
+            self.system_metrics['average_response_time'] = average + (latency - average) / completed
+        
         # If this is part of a workflow, check if we can proceed to next steps
-        if workflow_id:
+        if workflow_id or task_id in self.workflow_engine.task_index:
             self.check_workflow_progress(workflow_id, task_id, result_data)
     
     def handle_agent_status_update(self, status_data: Dict[str, Any], sender: str):
         """Handle status updates from agents"""
         if sender in self.registered_agents:
-            self.registered_agents[sender]['last_seen'] = datetime.utcnow().isoformat()
+            self.record_heartbeat(sender)
             self.registered_agents[sender]['status'] = status_data.get('status', 'active')
             self.registered_agents[sender]['performance_metrics'] = status_data.get('performance_metrics', {})
+            self.capability_index.set_active(
+                sender, self.registered_agents[sender]['status'] in self.DISPATCHABLE_STATUSES
+            )
     
     def check_workflow_progress(self, workflow_id: str, completed_task_id: str, result_data: Dict[str, Any]):
-        """Check if a workflow can proceed to the next step"""
-        # This is a simplified workflow management system
-        # In a real implementation, this would be more sophisticated
-        self.logger.info(f"Workflow {workflow_id} progress: {completed_task_id} completed")
+        """Record a workflow task result and dispatch any steps it unblocks"""
+        result = result_data.get('result')
+        error = WorkflowEngine.result_error(
+            result, result_data.get('error') if result_data.get('status') in ('failed', 'cancelled') else None
+        )
+        
+        handled = self.workflow_engine.handle_task_result(completed_task_id, result, error)
+        cache_key = self.research_leaders.get(completed_task_id)
+        # Shared research can outlive the workflow that started it
+        if not handled and not cache_key and result_data.get('status') != 'cancelled':
+            self.logger.warning(f"Result for unknown workflow task {completed_task_id} ({workflow_id})")
+        
+        if cache_key:
+            self.release_shared_result(completed_task_id, cache_key, result, error)
+        
+        # Retry restored nodes that found no agent when they were reloaded
+        self.workflow_engine.retry_pending()
     
     def start_monitoring_loop(self):
         """Start the main monitoring and coordination loop"""
         self.logger.info("Starting orchestrator monitoring loop")
         
+        # Resume workflows interrupted by a restart
+        restored = self.workflow_engine.restore()
+        if restored:
+            self.logger.info(f"Restored {restored} unfinished workflows")
+            for workflow in list(self.workflow_engine.workflows.values()):
+                self.track_workflow_deadline(workflow)
+        
         while self.status != AgentStatus.ERROR:
             try:
                 # Process approval queue
                 self.process_approval_queue()
                 
+                # Expire heartbeat deadlines (only touches agents whose deadline passed)
+                self.check_agent_liveness()
+                
+                # Cancel workflows that ran past their deadline
+                self.check_workflow_deadlines()
+                self.expire_shared_research()
+                
                 # Perform periodic health checks
                 if datetime.utcnow().minute % 5 == 0:  # Every 5 minutes
                     self.perform_system_health_check()
@@ -0,0 +1,91 @@
+import heapq
+import itertools
+import re
+from typing import Dict, Any, List, Iterable, Optional
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_product_name(name: Optional[str]) -> str:
+    """Case, punctuation and whitespace-insensitive product identity used for dedupe"""
+    return _NON_WORD.sub(' ', (name or '').lower()).strip()
+
+
+class TopKRanker:
+    """
+    Streaming top-k selection of products by score.
+
+    Candidates are consumed one at a time (e.g. from a generator over scraped
+    feeds); only the best k distinct products are kept, in a min-heap, so memory is
+    O(k) and time O(n log k). Once the heap is full, anything scoring at or below
+    its minimum is rejected without touching the heap. The same product reported
+    by several sources (matched by normalized name) keeps its best-scoring entry.
+    """
+
+    def __init__(self, k: int, min_score: float = float('-inf'), score_key: str = 'trend_score'):
+        self.k = k
+        self.min_score = min_score
+        self.score_key = score_key
+
+        self._heap: List[list] = []  # [score, -seq, name, product, live]; later arrivals lose ties
+        self._entries: Dict[str, list] = {}  # normalized name -> live heap entry
+        self._seq = itertools.count()
+
+        self.seen = 0
+        self.accepted = 0  # candidates at or above min_score
+
+    @property
+    def threshold(self) -> float:
+        """Score a new distinct product must beat to enter the ranking"""
+        self._drop_dead_root()
+        if len(self._entries) < self.k or not self._heap:
+            return self.min_score
+        return max(self.min_score, self._heap[0][0])
+
+    def push(self, product: Dict[str, Any]) -> bool:
+        """Offer a candidate; returns True if it is currently in the top k"""
+        self.seen += 1
+        score = product.get(self.score_key)
+        if score is None or score < self.min_score or self.k <= 0:
+            return False
+        self.accepted += 1
+
+        name = normalize_product_name(product.get('name'))
+        existing = self._entries.get(name)
+        if existing is not None:
+            if score <= existing[0]:
+                return False
+            # Better report of a product already ranked: retire the old entry lazily
+            existing[4] = False
+            del self._entries[name]
+        elif len(self._entries) >= self.k and score <= self.threshold:
+            return False
+
+        entry = [score, -next(self._seq), name, product, True]
+        self._entries[name] = entry
+        heapq.heappush(self._heap, entry)
+
+        while len(self._entries) > self.k:
+            evicted = heapq.heappop(self._heap)
+            if evicted[4]:
+                del self._entries[evicted[2]]
+
+        # Retired entries are bounded: rebuild once they make up half the heap
+        if len(self._heap) > 2 * self.k:
+            self._heap = [entry for entry in self._heap if entry[4]]
+            heapq.heapify(self._heap)
+        return True
+
+    def extend(self, products: Iterable[Dict[str, Any]]) -> 'TopKRanker':
+        for product in products:
+            self.push(product)
+        return self
+
+    def _drop_dead_root(self):
+        while self._heap and not self._heap[0][4]:
+            heapq.heappop(self._heap)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """The ranked products, best first (earlier candidates win ties)"""
+        live = sorted(self._entries.values(), key=lambda entry: (-entry[0], -entry[1]))
+        return [entry[3] for entry in live]
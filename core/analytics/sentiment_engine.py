@@ -0,0 +1,221 @@
+import re
+import threading
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+# Compact general-purpose review lexicon (weights roughly -3..3)
+DEFAULT_LEXICON = {
+    'amazing': 3.0, 'awesome': 3.0, 'excellent': 3.0, 'outstanding': 3.0, 'perfect': 3.0,
+    'fantastic': 3.0, 'love': 2.5, 'loved': 2.5, 'loves': 2.5, 'best': 2.5, 'great': 2.5,
+    'impressive': 2.0, 'recommend': 2.0, 'recommended': 2.0, 'happy': 2.0, 'sturdy': 1.5,
+    'good': 1.5, 'nice': 1.5, 'solid': 1.5, 'reliable': 1.5, 'comfortable': 1.5, 'easy': 1.5,
+    'fast': 1.0, 'quick': 1.0, 'value': 1.0, 'worth': 1.5, 'quality': 1.0, 'quiet': 1.0,
+    'helpful': 1.5, 'durable': 1.5, 'works': 1.0, 'fine': 0.5, 'decent': 0.5, 'affordable': 1.0,
+    'terrible': -3.0, 'awful': -3.0, 'horrible': -3.0, 'worst': -3.0, 'useless': -2.5,
+    'hate': -2.5, 'garbage': -2.5, 'junk': -2.5, 'scam': -3.0, 'refund': -1.5, 'return': -1.0,
+    'returned': -1.5, 'broke': -2.0, 'broken': -2.0, 'defective': -2.5, 'disappointed': -2.0,
+    'disappointing': -2.0, 'poor': -2.0, 'bad': -2.0, 'cheap': -1.0, 'flimsy': -2.0,
+    'difficult': -1.5, 'complicated': -1.5, 'complex': -1.0, 'slow': -1.0, 'late': -1.0,
+    'delay': -1.0, 'delays': -1.0, 'delayed': -1.0, 'noisy': -1.5, 'loud': -1.0,
+    'overpriced': -2.0, 'expensive': -1.0, 'uncomfortable': -1.5, 'leaks': -2.0, 'leaking': -2.0,
+    'problem': -1.5, 'problems': -1.5, 'issue': -1.0, 'issues': -1.0, 'failed': -2.0, 'stopped': -1.5
+}
+
+NEGATORS = frozenset([
+    'not', 'no', 'never', 'none', 'nothing', 'neither', 'nor', 'without', 'hardly', 'barely',
+    "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't", "weren't", "won't", "can't",
+    "couldn't", "shouldn't", "wouldn't", 'dont', 'doesnt', 'didnt', 'isnt', 'wasnt', 'cant', 'wont'
+])
+
+INTENSIFIERS = {
+    'very': 1.5, 'really': 1.4, 'extremely': 1.8, 'super': 1.5, 'incredibly': 1.8,
+    'so': 1.3, 'absolutely': 1.6, 'totally': 1.4, 'slightly': 0.6, 'somewhat': 0.7
+}
+
+# Clause boundaries end the scope of a negation
+BOUNDARIES = frozenset(['.', ',', '!', '?', ';', 'but', 'however', 'although'])
+
+STOPWORDS = frozenset([
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by', 'from',
+    'it', 'its', "it's", 'this', 'that', 'these', 'those', 'is', 'are', 'was', 'were', 'be', 'been',
+    'i', 'me', 'my', 'we', 'our', 'you', 'your', 'they', 'them', 'their', 'he', 'she', 'his', 'her',
+    'have', 'has', 'had', 'do', 'does', 'did', 'as', 'if', 'than', 'then', 'just', 'also', 'too',
+    'after', 'before', 'about', 'into', 'out', 'up', 'down', 'over', 'again', 'all', 'any', 'some',
+    'would', 'could', 'should', 'will', 'can', 'one', 'get', 'got', 'there', 'here', 'what', 'which'
+])
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.,!?;]")
+
+
+class SentimentEngine:
+    """
+    Lexicon-based sentiment scoring for large batches of review texts, offline.
+
+    All reviews in a batch are tokenized into one flat array of token ids. Token
+    weights come from a precompiled id -> weight array; negation (within
+    negation_window tokens, stopping at clause boundaries) and intensifiers are
+    applied with shifted-array operations, and per-review scores are summed with
+    np.add.reduceat. Themes are the most frequent content bigrams in positive
+    and negative reviews, counted with np.unique over bigram ids.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, negation_window: int = 3,
+                 neutral_band: float = 0.05, normalization_alpha: float = 15.0):
+        self.negation_window = negation_window
+        self.neutral_band = neutral_band
+        self.normalization_alpha = normalization_alpha
+        self._lock = threading.Lock()
+
+        # Vocabulary grows as new tokens are seen; the flag arrays grow with it
+        self.vocabulary: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        weights, negators, intensities, boundaries, stopwords = [], [], [], [], []
+
+        for token in sorted(set(lexicon or DEFAULT_LEXICON) | NEGATORS | set(INTENSIFIERS) | BOUNDARIES | STOPWORDS):
+            self.vocabulary[token] = len(self.tokens)
+            self.tokens.append(token)
+            weights.append((lexicon or DEFAULT_LEXICON).get(token, 0.0))
+            negators.append(token in NEGATORS)
+            intensities.append(INTENSIFIERS.get(token, 1.0))
+            boundaries.append(token in BOUNDARIES)
+            stopwords.append(token in STOPWORDS or token in NEGATORS or token in BOUNDARIES)
+
+        self._weights = np.array(weights, dtype=float)
+        self._negators = np.array(negators, dtype=bool)
+        self._intensities = np.array(intensities, dtype=float)
+        self._boundaries = np.array(boundaries, dtype=bool)
+        self._stopwords = np.array(stopwords, dtype=bool)
+
+    def _encode(self, texts: Sequence[str]) -> tuple:
+        """Tokenize texts into (token_ids, review_index, lengths)"""
+        vocabulary = self.vocabulary
+        ids: List[int] = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+
+        for index, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall((text or '').lower())
+            lengths[index] = len(tokens)
+            for token in tokens:
+                token_id = vocabulary.get(token)
+                if token_id is None:
+                    token_id = vocabulary[token] = len(self.tokens)
+                    self.tokens.append(token)
+                ids.append(token_id)
+
+        self._grow()
+        token_ids = np.array(ids, dtype=np.int64)
+        review_index = np.repeat(np.arange(len(texts)), lengths)
+        return token_ids, review_index, lengths
+
+    def _grow(self):
+        missing = len(self.tokens) - len(self._weights)
+        if missing > 0:
+            self._weights = np.concatenate([self._weights, np.zeros(missing)])
+            self._negators = np.concatenate([self._negators, np.zeros(missing, dtype=bool)])
+            self._intensities = np.concatenate([self._intensities, np.ones(missing)])
+            self._boundaries = np.concatenate([self._boundaries, np.zeros(missing, dtype=bool)])
+            self._stopwords = np.concatenate([self._stopwords, np.zeros(missing, dtype=bool)])
+
+    def _token_weights(self, token_ids: np.ndarray, review_index: np.ndarray) -> np.ndarray:
+        weights = self._weights[token_ids].copy()
+        negators = self._negators[token_ids]
+        boundaries = self._boundaries[token_ids]
+
+        # A token is negated if a negator precedes it within the window, in the same
+        # review and with no clause boundary in between
+        negated = np.zeros(len(token_ids), dtype=bool)
+        blocked = np.zeros(len(token_ids), dtype=bool)
+        for shift in range(1, self.negation_window + 1):
+            if shift >= len(token_ids):
+                break
+            same_review = review_index[shift:] == review_index[:-shift]
+            blocked[shift:] |= boundaries[:-shift] & same_review
+            negated[shift:] |= negators[:-shift] & same_review & ~blocked[shift:]
+        weights[negated] *= -0.75
+
+        # Intensifiers scale the following token
+        if len(token_ids) > 1:
+            same_review = review_index[1:] == review_index[:-1]
+            weights[1:] *= np.where(same_review, self._intensities[token_ids[:-1]], 1.0)
+
+        return weights
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """Sentiment of every text in -1..1"""
+        with self._lock:
+            token_ids, review_index, lengths = self._encode(texts)
+            return self._score_encoded(token_ids, review_index, lengths)
+
+    def _score_encoded(self, token_ids, review_index, lengths) -> np.ndarray:
+        raw = np.zeros(len(lengths))
+        if len(token_ids):
+            weights = self._token_weights(token_ids, review_index)
+            non_empty = lengths > 0
+            starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))[non_empty]
+            raw[non_empty] = np.add.reduceat(weights, starts)
+        return raw / np.sqrt(raw * raw + self.normalization_alpha)
+
+    def themes(self, token_ids: np.ndarray, review_index: np.ndarray,
+               selected: np.ndarray, top: int = 3) -> List[str]:
+        """Most frequent content bigrams within the selected reviews"""
+        if len(token_ids) < 2:
+            return []
+
+        first, second = token_ids[:-1], token_ids[1:]
+        valid = (
+            (review_index[:-1] == review_index[1:])
+            & selected[review_index[:-1]]
+            & ~self._stopwords[first] & ~self._stopwords[second]
+        )
+        if not valid.any():
+            return []
+
+        bigrams = first[valid] * len(self.tokens) + second[valid]
+        unique, counts = np.unique(bigrams, return_counts=True)
+        # Most frequent first; ties go to the lower bigram id so results are deterministic
+        best = unique[np.argsort(-counts, kind='stable')[:top]]
+        return [f"{self.tokens[b // len(self.tokens)]} {self.tokens[b % len(self.tokens)]}" for b in best]
+
+    def analyze(self, texts: Sequence[str], top_themes: int = 3) -> Dict[str, Any]:
+        """Score a batch and aggregate it into the agent's sentiment_results shape"""
+        with self._lock:
+            return self._analyze(texts, top_themes)
+
+    def _analyze(self, texts: Sequence[str], top_themes: int) -> Dict[str, Any]:
+        token_ids, review_index, lengths = self._encode(texts)
+        scores = self._score_encoded(token_ids, review_index, lengths)
+
+        positive = scores > self.neutral_band
+        negative = scores < -self.neutral_band
+        overall = float(scores.mean()) if len(scores) else 0.0
+
+        negative_themes = self.themes(token_ids, review_index, negative, top=top_themes + 2)
+
+        if overall > self.neutral_band:
+            overall_sentiment = 'positive'
+        elif overall < -self.neutral_band:
+            overall_sentiment = 'negative'
+        else:
+            overall_sentiment = 'neutral'
+
+        concerns = negative_themes[top_themes:]
+        if overall_sentiment == 'positive':
+            recommendation = 'positive sentiment' + (' with minor concerns to address' if negative.any() else '')
+        elif overall_sentiment == 'negative':
+            recommendation = 'negative sentiment; address recurring complaints before promoting'
+        else:
+            recommendation = 'mixed sentiment; highlight strengths and acknowledge drawbacks'
+
+        return {
+            'overall_sentiment': overall_sentiment,
+            'sentiment_score': round(overall, 3),
+            'positive_mentions': int(positive.sum()),
+            'negative_mentions': int(negative.sum()),
+            'neutral_mentions': int(len(texts) - positive.sum() - negative.sum()),
+            'key_positive_themes': self.themes(token_ids, review_index, positive, top=top_themes),
+            'key_negative_themes': negative_themes[:top_themes],
+            'trending_concerns': concerns,
+            'recommendation': recommendation,
+            'reviews_analyzed': len(texts)
+        }
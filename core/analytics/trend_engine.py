@@ -0,0 +1,202 @@
+import logging
+from typing import Dict, Any, Callable, Sequence
+
+import numpy as np
+
+from infrastructure.persistence import MODELS_AVAILABLE, commit_or_rollback
+
+if MODELS_AVAILABLE:
+    from sqlalchemy import func
+    from infrastructure.persistence import MarketData
+
+# MarketData.data_type of per-product observations (search volume, price, rating, ...)
+OBSERVATION_DATA_TYPE = 'product_observation'
+
+
+class TrendEngine:
+    """
+    Vectorized trend scoring over per-product observation series.
+
+    Series are packed into a (products x observations) matrix, right-aligned so the
+    latest observation of every product is in the last column, with NaN padding on
+    the left. Every metric is then computed for all products at once:
+
+    - momentum: short EWMA over long EWMA, minus one
+    - slope: least-squares slope of the mean-normalized series, per observation
+    - seasonality: autocorrelation of the detrended series at season_length
+    - anomaly_z: z-score of the latest observation against the earlier ones
+
+    trend_score (0-1, 0.5 = flat) combines momentum and slope; confidence_score
+    (0-1) grows with the number of observations and shrinks with residual noise.
+    """
+
+    def __init__(self, short_span: int = 3, long_span: int = 12, season_length: int = 7,
+                 anomaly_threshold: float = 3.0, min_observations: int = 5):
+        self.short_alpha = 2.0 / (short_span + 1)
+        self.long_alpha = 2.0 / (long_span + 1)
+        self.season_length = season_length
+        self.anomaly_threshold = anomaly_threshold
+        self.min_observations = min_observations
+
+        self.logger = logging.getLogger('TrendEngine')
+
+    # Series packing
+
+    @staticmethod
+    def pack(keys: Sequence[Any], values: Sequence[float]) -> tuple:
+        """
+        Pack observations grouped by key (in time order within each key) into a
+        right-aligned matrix. Returns (unique_keys, matrix).
+        """
+        values = np.asarray(values, dtype=float)
+        unique_keys, inverse, counts = np.unique(np.asarray(keys, dtype=object).astype(str),
+                                                 return_inverse=True, return_counts=True)
+        width = int(counts.max()) if len(counts) else 0
+
+        # Stable sort keeps time order within each key
+        order = np.argsort(inverse, kind='stable')
+        grouped = inverse[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rank = np.arange(len(order)) - starts[grouped]
+        columns = width - counts[grouped] + rank
+
+        matrix = np.full((len(unique_keys), width), np.nan)
+        matrix[grouped, columns] = values[order]
+        return unique_keys, matrix
+
+    @staticmethod
+    def pack_columns(columns: Dict[str, np.ndarray]) -> tuple:
+        """Right-align per-product value arrays (e.g. from the time-series store) into a matrix"""
+        keys = list(columns)
+        width = max((len(values) for values in columns.values()), default=0)
+        matrix = np.full((len(keys), width), np.nan)
+        for row, key in enumerate(keys):
+            values = columns[key]
+            if len(values):
+                matrix[row, width - len(values):] = values
+        return keys, matrix
+
+    # Metrics
+
+    @staticmethod
+    def ewma(matrix: np.ndarray, alpha: float) -> np.ndarray:
+        """Latest EWMA of every row, skipping NaN padding"""
+        state = np.full(matrix.shape[0], np.nan)
+        for column in matrix.T:
+            present = ~np.isnan(column)
+            blended = np.where(np.isnan(state), column, alpha * column + (1 - alpha) * state)
+            state = np.where(present, blended, state)
+        return state
+
+    def score(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        rows, width = matrix.shape
+        present = ~np.isnan(matrix)
+        count = present.sum(axis=1)
+        safe_count = np.maximum(count, 1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Momentum
+            short = self.ewma(matrix, self.short_alpha)
+            long = self.ewma(matrix, self.long_alpha)
+            momentum = np.where(long > 0, short / long - 1.0, 0.0)
+
+            # Slope of the series normalized by its own mean, so products of any scale compare
+            mean = np.where(present, matrix, 0.0).sum(axis=1) / safe_count
+            normalized = np.where(present, matrix / np.where(mean != 0, mean, 1.0)[:, None], 0.0)
+            x = np.broadcast_to(np.arange(width, dtype=float), matrix.shape)
+            x_mean = np.where(present, x, 0.0).sum(axis=1) / safe_count
+            y_mean = normalized.sum(axis=1) / safe_count
+            dx = np.where(present, x - x_mean[:, None], 0.0)
+            dy = np.where(present, normalized - y_mean[:, None], 0.0)
+            sxx = (dx * dx).sum(axis=1)
+            slope = np.where(sxx > 0, (dx * dy).sum(axis=1) / sxx, 0.0)
+
+            # Seasonality: lag autocorrelation of the residuals around the trend line
+            residual = np.where(present, dy - slope[:, None] * dx, 0.0)
+            energy = (residual * residual).sum(axis=1)
+            lag = self.season_length
+            if width > lag:
+                pairs = present[:, lag:] & present[:, :-lag]
+                lagged = np.where(pairs, residual[:, lag:] * residual[:, :-lag], 0.0).sum(axis=1)
+                seasonality = np.where((energy > 0) & (count > 2 * lag), lagged / energy, 0.0)
+            else:
+                seasonality = np.zeros(rows)
+
+            # Anomaly: latest value against the history before it
+            history = matrix[:, :-1] if width > 1 else np.empty((rows, 0))
+            history_present = ~np.isnan(history)
+            history_count = history_present.sum(axis=1)
+            history_mean = np.where(history_present, history, 0.0).sum(axis=1) / np.maximum(history_count, 1)
+            history_var = np.where(history_present, (history - history_mean[:, None]) ** 2, 0.0).sum(axis=1) \
+                / np.maximum(history_count, 1)
+            history_std = np.sqrt(history_var)
+            latest = matrix[:, -1] if width else np.full(rows, np.nan)
+            anomaly_z = np.where((history_count >= 3) & (history_std > 0),
+                                 (latest - history_mean) / history_std, 0.0)
+
+            noise = np.sqrt(energy / safe_count)
+
+        trend_score = 1.0 / (1.0 + np.exp(-(4.0 * momentum + 2.0 * slope * np.maximum(count - 1, 0))))
+        confidence = (count / (count + self.min_observations)) / (1.0 + noise)
+
+        return {
+            'observations': count,
+            'momentum': momentum,
+            'slope': slope,
+            'seasonality': seasonality,
+            'anomaly_z': anomaly_z,
+            'anomaly': np.abs(anomaly_z) >= self.anomaly_threshold,
+            'trend_score': np.clip(trend_score, 0.0, 1.0),
+            'confidence_score': np.clip(confidence, 0.0, 1.0)
+        }
+
+    def score_series(self, keys: Sequence[Any], values: Sequence[float]) -> Dict[str, Dict[str, Any]]:
+        """Score grouped observations; returns {key: {metric: value}}"""
+        return self._score_packed(*self.pack(keys, values))
+
+    def score_columns(self, columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+        """Score per-product value arrays; returns {product: {metric: value}}"""
+        return self._score_packed(*self.pack_columns(columns))
+
+    def _score_packed(self, unique_keys, matrix: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        if not len(unique_keys):
+            return {}
+
+        metrics = self.score(matrix)
+        return {
+            str(key): {name: column[index].item() for name, column in metrics.items()}
+            for index, key in enumerate(unique_keys)
+        }
+
+    # MarketData integration
+
+    def write_scores(self, session_factory: Callable, scores: Dict[str, Dict[str, Any]],
+                     data_type: str = OBSERVATION_DATA_TYPE) -> int:
+        """Bulk-update each scored product's latest observation row; returns rows updated"""
+        if not scores or not MODELS_AVAILABLE or session_factory is None:
+            return 0
+
+        with session_factory() as session:
+            if session is None:
+                return 0
+
+            latest_row = dict(
+                session.query(MarketData.product_name, func.max(MarketData.id)).filter(
+                    MarketData.data_type == data_type,
+                    MarketData.product_name.in_(list(scores))
+                ).group_by(MarketData.product_name).all()
+            )
+            return self._write_scores(session, scores, latest_row)
+
+    def _write_scores(self, session, scores: Dict[str, Dict[str, Any]], latest_row: Dict[str, int]) -> int:
+        mappings = [
+            {
+                'id': latest_row[product_name],
+                'trend_score': result['trend_score'],
+                'confidence_score': result['confidence_score']
+            }
+            for product_name, result in scores.items() if product_name in latest_row
+        ]
+        session.bulk_update_mappings(MarketData, mappings)
+        commit_or_rollback(session, f"trend scores for {len(mappings)} products")
+        return len(mappings)
@@ -0,0 +1,381 @@
+import logging
+import operator
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Iterable, Set
+
+from infrastructure.persistence import MODELS_AVAILABLE, commit_or_rollback
+
+if MODELS_AVAILABLE:
+    from infrastructure.persistence import AgentDecision
+
+
+class ApprovalStore:
+    """
+    Approval requests indexed by status, impact level and requesting agent.
+    Every request is mirrored to an AgentDecision row, so decisions approved or
+    rejected through the API are picked up by refresh(), and requests still
+    pending in the database are loaded (e.g. after a restart) as soon as the
+    database is reachable: on construction, or by refresh() until a load has
+    succeeded. Rejection reasons are kept in the row's decision_data.
+    """
+
+    # Decision fields with a secondary index
+    INDEXED_FIELDS = {
+        'status': 'approval_status',
+        'impact': 'impact_level',
+        'agent': 'agent_name'
+    }
+
+    def __init__(self, session_factory: Optional[Callable] = None, refresh_interval: float = 10.0):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+
+        self.decisions: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {name: {} for name in self.INDEXED_FIELDS}
+
+        self.logger = logging.getLogger('ApprovalStore')
+        self._lock = threading.RLock()
+        self._local_ids = 0
+        self._last_refresh = 0.0
+        self._pending_loaded = False
+
+        self.load_pending()
+
+    # Index maintenance
+
+    def _index(self, decision_id: str, decision: Dict[str, Any]):
+        for index_name, field in self.INDEXED_FIELDS.items():
+            self._indexes[index_name].setdefault(decision.get(field), set()).add(decision_id)
+
+    def _unindex(self, decision_id: str, decision: Dict[str, Any]):
+        for index_name, field in self.INDEXED_FIELDS.items():
+            bucket = self._indexes[index_name].get(decision.get(field))
+            if bucket is not None:
+                bucket.discard(decision_id)
+                if not bucket:
+                    del self._indexes[index_name][decision.get(field)]
+
+    def add(self, decision: Dict[str, Any]) -> str:
+        """Store a new approval request and return its id"""
+        decision = dict(decision)
+        decision.setdefault('approval_status', 'pending')
+        decision.setdefault('impact_level', 'low')
+
+        record_id = self._persist_new(decision)
+        with self._lock:
+            if record_id is None:
+                self._local_ids += 1
+                decision_id = f"local-{self._local_ids}"
+            else:
+                decision_id = str(record_id)
+
+            decision['decision_id'] = decision_id
+            self.decisions[decision_id] = decision
+            self._index(decision_id, decision)
+            return decision_id
+
+    def get(self, decision_id: str) -> Optional[Dict[str, Any]]:
+        return self.decisions.get(str(decision_id))
+
+    def query(self, status: Optional[str] = None, impact: Optional[str] = None,
+              agent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return decisions matching every given key, via index intersection"""
+        with self._lock:
+            ids = None
+            for index_name, value in (('status', status), ('impact', impact), ('agent', agent)):
+                if value is None:
+                    continue
+                bucket = self._indexes[index_name].get(value, set())
+                ids = set(bucket) if ids is None else ids & bucket
+                if not ids:
+                    return []
+
+            if ids is None:
+                ids = self.decisions.keys()
+            return [self.decisions[decision_id] for decision_id in ids]
+
+    def count(self, status: str = 'pending') -> int:
+        return len(self._indexes['status'].get(status, ()))
+
+    def counts(self) -> Dict[str, Dict[Any, int]]:
+        with self._lock:
+            return {
+                index_name: {key: len(ids) for key, ids in index.items()}
+                for index_name, index in self._indexes.items()
+            }
+
+    def set_status(self, decision_ids: Iterable[str], status: str, decided_by: str,
+                   reason: Optional[str] = None, persist: bool = True) -> List[Dict[str, Any]]:
+        """Move a batch of pending decisions to approved/rejected in one pass and one commit"""
+        decided_at = datetime.utcnow()
+        updated = []
+
+        with self._lock:
+            for decision_id in decision_ids:
+                decision = self.decisions.get(str(decision_id))
+                if decision is None or decision.get('approval_status') != 'pending':
+                    continue
+
+                self._unindex(decision['decision_id'], decision)
+                decision['approval_status'] = status
+                decision['approved_by'] = decided_by
+                decision['approved_at'] = decided_at.isoformat()
+                if reason:
+                    decision['rejection_reason'] = reason
+                self._index(decision['decision_id'], decision)
+                updated.append(decision)
+
+        if updated and persist:
+            self._persist_status(updated, status, decided_by, decided_at, reason)
+        return updated
+
+    def evict(self, status: str) -> int:
+        """Drop decided requests from memory; they remain in the database"""
+        with self._lock:
+            ids = list(self._indexes['status'].get(status, ()))
+            for decision_id in ids:
+                self._unindex(decision_id, self.decisions.pop(decision_id))
+            return len(ids)
+
+    # Database mirroring
+
+    def load_pending(self) -> int:
+        """Index pending AgentDecision rows not yet in memory; returns the number loaded"""
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return 0
+
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return 0
+                rows = session.query(AgentDecision).filter(AgentDecision.approval_status == 'pending').all()
+                self._pending_loaded = True
+                decisions = [
+                    {
+                        'decision_id': str(row.id),
+                        'agent_name': row.agent_name,
+                        'decision_type': row.decision_type,
+                        'blog_instance_id': row.blog_instance_id,
+                        'decision_data': row.decision_data or {},
+                        'requires_approval': row.requires_approval,
+                        'approval_status': row.approval_status,
+                        'impact_level': row.impact_level or 'low',
+                        'received_at': row.created_at.isoformat() if row.created_at else None
+                    }
+                    for row in rows
+                ]
+        except Exception as e:
+            self.logger.error(f"Failed to load pending approval requests: {str(e)}")
+            return 0
+
+        loaded = 0
+        with self._lock:
+            for decision in decisions:
+                if decision['decision_id'] not in self.decisions:
+                    self.decisions[decision['decision_id']] = decision
+                    self._index(decision['decision_id'], decision)
+                    loaded += 1
+        if loaded:
+            self.logger.info(f"Loaded {loaded} pending approval requests")
+        return loaded
+
+    def _persist_new(self, decision: Dict[str, Any]) -> Optional[int]:
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return None
+
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return None
+
+                decision_data = decision.get('decision_data', {})
+                record = AgentDecision(
+                    agent_name=decision.get('agent_name') or decision.get('requesting_agent', 'unknown'),
+                    decision_type=decision.get('decision_type', 'unknown'),
+                    blog_instance_id=decision.get('blog_instance_id') or decision_data.get('blog_instance_id'),
+                    decision_data=decision_data,
+                    requires_approval=decision.get('requires_approval', True),
+                    approval_status=decision['approval_status'],
+                    impact_level=decision['impact_level']
+                )
+                session.add(record)
+                if commit_or_rollback(session, 'approval request'):
+                    return record.id
+        except Exception as e:
+            self.logger.error(f"Failed to persist approval request: {str(e)}")
+        return None
+
+    def _persist_status(self, decisions: List[Dict[str, Any]], status: str, decided_by: str,
+                        decided_at: datetime, reason: Optional[str]):
+        record_ids = [int(d['decision_id']) for d in decisions if d['decision_id'].isdigit()]
+        if not record_ids or not MODELS_AVAILABLE or self.session_factory is None:
+            return
+
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return
+
+                session.query(AgentDecision).filter(
+                    AgentDecision.id.in_(record_ids)
+                ).update({
+                    AgentDecision.approval_status: status,
+                    AgentDecision.approved_by: decided_by,
+                    AgentDecision.approved_at: decided_at
+                }, synchronize_session=False)
+                if reason:
+                    # AgentDecision has no reason column; the reason travels with the decision data
+                    for record in session.query(AgentDecision).filter(AgentDecision.id.in_(record_ids)):
+                        record.decision_data = {**(record.decision_data or {}), 'rejection_reason': reason}
+                commit_or_rollback(session, f"{len(record_ids)} decision status updates")
+        except Exception as e:
+            self.logger.error(f"Failed to persist decision status: {str(e)}")
+
+    def refresh(self, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Pick up pending decisions that were approved/rejected through the API.
+        Returns the decisions whose status changed. Throttled to refresh_interval.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return []
+        self._last_refresh = now
+
+        # The session factory may only become usable once an app is attached
+        if not self._pending_loaded:
+            self.load_pending()
+
+        pending_ids = [int(i) for i in self._indexes['status'].get('pending', ()) if i.isdigit()]
+        if not pending_ids or not MODELS_AVAILABLE or self.session_factory is None:
+            return []
+
+        changed = []
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return []
+
+                rows = session.query(
+                    AgentDecision.id, AgentDecision.approval_status,
+                    AgentDecision.approved_by, AgentDecision.approved_at
+                ).filter(
+                    AgentDecision.id.in_(pending_ids),
+                    AgentDecision.approval_status != 'pending'
+                ).all()
+
+            for record_id, status, decided_by, decided_at in rows:
+                updated = self.set_status([str(record_id)], status, decided_by or 'api', persist=False)
+                for decision in updated:
+                    if decided_at:
+                        decision['approved_at'] = decided_at.isoformat()
+                changed.extend(updated)
+        except Exception as e:
+            self.logger.error(f"Failed to refresh approval decisions: {str(e)}")
+
+        return changed
+
+
+class ApprovalRule:
+    """
+    Declarative auto-approval rule.
+
+    match: exact values for decision fields (impact_level, decision_type, agent_name, ...)
+    conditions: (dotted.path, operator, value) checks against the decision, e.g.
+                ('decision_data.change_percent', '<', 10)
+    action: 'approve' or 'reject'
+    """
+
+    OPERATORS = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+        'in': lambda value, options: value in options,
+        'not_in': lambda value, options: value not in options
+    }
+
+    def __init__(self, name: str, action: str, match: Optional[Dict[str, Any]] = None,
+                 conditions: Optional[List[tuple]] = None):
+        if action not in ('approve', 'reject'):
+            raise ValueError(f"Unknown rule action: {action}")
+        for condition in conditions or []:
+            if condition[1] not in self.OPERATORS:
+                raise ValueError(f"Unknown operator in rule {name}: {condition[1]}")
+
+        self.name = name
+        self.action = action
+        self.match = dict(match or {})
+        self.conditions = list(conditions or [])
+
+    @classmethod
+    def from_dict(cls, rule: Dict[str, Any]) -> 'ApprovalRule':
+        return cls(rule['name'], rule['action'], rule.get('match'),
+                   [tuple(condition) for condition in rule.get('conditions', [])])
+
+    @staticmethod
+    def resolve(decision: Dict[str, Any], path: str):
+        value = decision
+        for part in path.split('.'):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+
+    def matches(self, decision: Dict[str, Any]) -> bool:
+        for field, expected in self.match.items():
+            if decision.get(field) != expected:
+                return False
+
+        for path, op, expected in self.conditions:
+            value = self.resolve(decision, path)
+            try:
+                if value is None or not self.OPERATORS[op](value, expected):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+
+# Mirrors the previous hard-coded behaviour: low impact decisions are approved automatically,
+# medium and high impact decisions wait for a human.
+DEFAULT_APPROVAL_RULES = [
+    {'name': 'auto_approve_low_impact', 'action': 'approve', 'match': {'impact_level': 'low'}}
+]
+
+
+class ApprovalRulesEngine:
+    """Evaluates auto-approval rules over all pending decisions in one batch"""
+
+    def __init__(self, rules: Optional[List[Any]] = None):
+        self.rules: List[ApprovalRule] = [
+            rule if isinstance(rule, ApprovalRule) else ApprovalRule.from_dict(rule)
+            for rule in (DEFAULT_APPROVAL_RULES if rules is None else rules)
+        ]
+
+    def evaluate(self, store: ApprovalStore) -> Dict[str, List[tuple]]:
+        """
+        Return {'approve': [(decision_id, rule_name)], 'reject': [...]}.
+        Rules are applied in order and the first match wins; candidates are narrowed
+        through the store indexes when a rule matches on impact level or agent.
+        """
+        outcome = {'approve': [], 'reject': []}
+        decided: Set[str] = set()
+
+        for rule in self.rules:
+            candidates = store.query(
+                status='pending',
+                impact=rule.match.get('impact_level'),
+                agent=rule.match.get('agent_name')
+            )
+            for decision in candidates:
+                decision_id = decision['decision_id']
+                if decision_id in decided or not rule.matches(decision):
+                    continue
+                decided.add(decision_id)
+                outcome[rule.action].append((decision_id, rule.name))
+
+        return outcome
@@ -0,0 +1,135 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+
+class TaskCancelled(Exception):
+    """Raised when work is abandoned because its requester cancelled it"""
+
+
+class DeadlineExceeded(TaskCancelled):
+    """Raised when work is abandoned because its deadline passed"""
+
+
+def parse_deadline(value: Any) -> Optional[datetime]:
+    """
+    Deadline from an envelope or request: a datetime or ISO timestamp, as naive
+    UTC (the form datetime.utcnow() compares against). Timezone-aware values
+    such as '2026-10-19T12:00:00Z' are converted; unparseable values give None.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class CancellationToken:
+    """
+    Deadline plus cancel flag carried with a unit of work.
+
+    Tokens travel in the task envelope as 'deadline' (UTC ISO timestamp) and
+    'cancel_token' (an id, usually the workflow id, that can be cancelled by
+    broadcasting a cancel_tasks message).
+    """
+
+    def __init__(self, token_id: Optional[str] = None, deadline: Optional[datetime] = None):
+        self.token_id = token_id
+        self.deadline = parse_deadline(deadline)
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def with_timeout(cls, seconds: float, token_id: Optional[str] = None) -> 'CancellationToken':
+        return cls(token_id, datetime.utcnow() + timedelta(seconds=seconds))
+
+    def cancel(self, reason: str = 'cancelled'):
+        self.reason = reason
+        self._cancelled.set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and datetime.utcnow() >= self.deadline
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set() or self.expired
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (never negative), or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return max((self.deadline - datetime.utcnow()).total_seconds(), 0.0)
+
+    def raise_if_cancelled(self):
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.reason or 'cancelled')
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline {self.deadline.isoformat()} exceeded")
+
+    def to_envelope(self) -> Dict[str, Any]:
+        return {
+            'deadline': self.deadline.isoformat() if self.deadline else None,
+            'cancel_token': self.token_id
+        }
+
+
+class CancellationRegistry:
+    """
+    Tracks cancelled token ids seen by an agent, so queued work carrying a
+    cancelled token is dropped before it starts.
+    """
+
+    def __init__(self, retention_seconds: float = 3600.0):
+        self.retention_seconds = retention_seconds
+        self._cancelled: Dict[str, tuple] = {}  # token_id -> (cancelled_at, reason)
+        self._lock = threading.Lock()
+
+    def cancel(self, token_id: str, reason: str = 'cancelled'):
+        with self._lock:
+            self._cancelled[token_id] = (time.monotonic(), reason)
+            self._prune()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.retention_seconds
+        for token_id in [t for t, (at, _) in self._cancelled.items() if at < cutoff]:
+            del self._cancelled[token_id]
+
+    def token_for(self, task_data: Dict[str, Any]) -> CancellationToken:
+        """Build the token for a task envelope, already cancelled if its id was cancelled"""
+        deadline = parse_deadline(task_data.get('deadline'))
+
+        token_id = task_data.get('cancel_token')
+        token = CancellationToken(token_id, deadline)
+
+        with self._lock:
+            cancelled = self._cancelled.get(token_id) if token_id else None
+        if cancelled:
+            token.cancel(cancelled[1])
+        return token
+
+
+_current_token: contextvars.ContextVar = contextvars.ContextVar('current_cancellation_token', default=None)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """The token of the task running on this thread/context, if any"""
+    return _current_token.get()
+
+
+@contextmanager
+def use_token(token: Optional[CancellationToken]):
+    """Make token the ambient token for scrapers and generators called inside the block"""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
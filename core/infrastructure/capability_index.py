@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional, Iterable
+
+
+class AgentLoad:
+    """Live load figures for a single agent: in-flight tasks and recent latency"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.completed = 0
+        self.task_started_at: Dict[str, float] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'latency_ewma': self.latency_ewma,
+            'completed': self.completed
+        }
+
+
+class CapabilityIndex:
+    """
+    Inverted capability -> agents index used by the orchestrator for dispatch.
+    Each capability keeps a dense list of active agents plus a position map, so
+    add/remove/sample are O(1). Selection weighs in-flight work by each agent's
+    recent latency, so slower agents receive proportionally less work.
+    """
+
+    STRATEGIES = ('power_of_two', 'least_loaded')
+
+    def __init__(self, strategy: str = 'power_of_two', latency_alpha: float = 0.3,
+                 default_latency: float = 1.0):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown selection strategy: {strategy}")
+
+        self.strategy = strategy
+        self.latency_alpha = latency_alpha
+        self.default_latency = default_latency
+
+        self._agents_by_capability: Dict[str, List[str]] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+        self._capabilities: Dict[str, List[str]] = {}
+        self._active: Dict[str, bool] = {}
+        self._load: Dict[str, AgentLoad] = {}
+
+        self._lock = threading.RLock()
+        self._random = random.Random()
+
+    # Index maintenance
+
+    def add_agent(self, agent_name: str, capabilities: Iterable[str], active: bool = True):
+        """Add (or re-register) an agent with its capabilities"""
+        with self._lock:
+            if agent_name in self._capabilities:
+                self._unlink(agent_name)
+
+            self._capabilities[agent_name] = list(dict.fromkeys(capabilities))
+            self._load.setdefault(agent_name, AgentLoad())
+            self._active[agent_name] = False
+
+            if active:
+                self.set_active(agent_name, True)
+
+    def remove_agent(self, agent_name: str):
+        """Forget an agent entirely"""
+        with self._lock:
+            if agent_name not in self._capabilities:
+                return
+            self._unlink(agent_name)
+            del self._capabilities[agent_name]
+            del self._active[agent_name]
+            self._load.pop(agent_name, None)
+
+    def set_active(self, agent_name: str, active: bool):
+        """Include or exclude an agent from selection without losing its load history"""
+        with self._lock:
+            if agent_name not in self._capabilities or self._active[agent_name] == active:
+                return
+
+            if active:
+                for capability in self._capabilities[agent_name]:
+                    agents = self._agents_by_capability.setdefault(capability, [])
+                    self._positions.setdefault(capability, {})[agent_name] = len(agents)
+                    agents.append(agent_name)
+            else:
+                self._unlink(agent_name)
+
+            self._active[agent_name] = active
+
+    def _unlink(self, agent_name: str):
+        """Swap-remove the agent from every capability list it is in"""
+        for capability in self._capabilities.get(agent_name, []):
+            positions = self._positions.get(capability, {})
+            if agent_name not in positions:
+                continue
+
+            agents = self._agents_by_capability[capability]
+            index = positions.pop(agent_name)
+            last = agents.pop()
+            if last != agent_name:
+                agents[index] = last
+                positions[last] = index
+
+        self._active[agent_name] = False
+
+    # Queries
+
+    def agents_for(self, capability: str) -> List[str]:
+        """Return the active agents offering a capability"""
+        with self._lock:
+            return list(self._agents_by_capability.get(capability, []))
+
+    def is_active(self, agent_name: str) -> bool:
+        return self._active.get(agent_name, False)
+
+    def load_score(self, agent_name: str) -> float:
+        """Expected time to drain the agent's queue if it were given one more task"""
+        load = self._load.get(agent_name)
+        if load is None:
+            return 0.0
+        latency = load.latency_ewma if load.latency_ewma is not None else self.default_latency
+        return (load.in_flight + 1) * latency
+
+    def select(self, capability: str, exclude: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Pick the agent that should receive the next task for a capability"""
+        with self._lock:
+            candidates = self._agents_by_capability.get(capability)
+            if not candidates:
+                return None
+
+            if exclude:
+                excluded = set(exclude)
+                candidates = [name for name in candidates if name not in excluded]
+                if not candidates:
+                    return None
+
+            if len(candidates) == 1:
+                return candidates[0]
+
+            if self.strategy == 'least_loaded':
+                return min(candidates, key=self.load_score)
+
+            first, second = self._random.sample(candidates, 2)
+            return first if self.load_score(first) <= self.load_score(second) else second
+
+    # Load accounting
+
+    def task_started(self, agent_name: str, task_id: Optional[str] = None):
+        """Record that a task has been dispatched to an agent"""
+        with self._lock:
+            load = self._load.setdefault(agent_name, AgentLoad())
+            load.in_flight += 1
+            if task_id:
+                load.task_started_at[task_id] = time.monotonic()
+
+    def task_finished(self, agent_name: str, task_id: Optional[str] = None) -> Optional[float]:
+        """Record task completion; returns the observed latency in seconds if known"""
+        with self._lock:
+            load = self._load.get(agent_name)
+            if load is None:
+                return None
+
+            load.in_flight = max(load.in_flight - 1, 0)
+            load.completed += 1
+
+            started_at = load.task_started_at.pop(task_id, None) if task_id else None
+            if started_at is None:
+                return None
+
+            latency = time.monotonic() - started_at
+            if load.latency_ewma is None:
+                load.latency_ewma = latency
+            else:
+                load.latency_ewma += self.latency_alpha * (latency - load.latency_ewma)
+            return latency
+
+    def get_load(self, agent_name: str) -> Dict[str, Any]:
+        with self._lock:
+            load = self._load.get(agent_name)
+            return load.to_dict() if load else {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable view of the index for health reports"""
+        with self._lock:
+            return {
+                'strategy': self.strategy,
+                'capabilities': {cap: list(agents) for cap, agents in self._agents_by_capability.items()},
+                'load': {name: load.to_dict() for name, load in self._load.items()}
+            }
@@ -0,0 +1,228 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional, Tuple
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records per second allowed for each (logger, message template) pair at INFO and below.
+# Hot agent paths log once per message; these keep bursts from flooding the queue.
+DEFAULT_RATE_LIMITS = {
+    'orchestrator': 20.0,
+    'market_analytics': 20.0,
+    'MessageBroker': 20.0,
+    'Scraper': 10.0
+}
+
+# Distinct (logger, message template) keys the sampling filter keeps state for
+MAX_TRACKED_MESSAGES = 2048
+
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class LazyPayload:
+    """
+    Wrap a payload passed as a logging argument so it is only rendered when the
+    record is actually emitted, and is truncated to a bounded length.
+
+    Rendering happens later on the listener thread, so dicts and lists are
+    shallow-copied at log time: the record shows the top-level state as of the
+    log call, and the caller can keep mutating its own object.
+    """
+
+    __slots__ = ('payload', 'max_length')
+
+    def __init__(self, payload: Any, max_length: int = 300):
+        if isinstance(payload, dict):
+            payload = dict(payload)
+        elif isinstance(payload, (list, set)):
+            payload = list(payload)
+        self.payload = payload
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        try:
+            rendered = json.dumps(self.payload, default=str)
+        except Exception:
+            # Nested objects may still be mutated concurrently; never fail the listener thread
+            try:
+                rendered = repr(self.payload)
+            except Exception as e:
+                rendered = f"<unrenderable payload: {e}>"
+
+        if len(rendered) > self.max_length:
+            omitted = len(rendered) - self.max_length
+            return f"{rendered[:self.max_length]}... [{omitted} chars truncated]"
+        return rendered
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-logger sampling and rate limiting for high-frequency records.
+
+    Rules match on logger name prefix (the longest matching prefix wins):
+    - sample_rates: keep one out of every N records
+    - rate_limits: allow at most N records per second (token bucket, burst of N)
+    Counters are kept per (logger, message template) so a noisy message does not
+    silence unrelated ones; only the max_keys most recently seen templates are
+    tracked, so hot paths must log %-style templates rather than f-strings.
+    Records above max_level always pass.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, int]] = None,
+                 rate_limits: Optional[Dict[str, float]] = None,
+                 max_level: int = logging.INFO, max_keys: int = MAX_TRACKED_MESSAGES):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limits = rate_limits or {}
+        self.max_level = max_level
+        self.max_keys = max_keys
+
+        self._counters: Dict[Tuple[str, Any], int] = OrderedDict()
+        self._buckets: Dict[Tuple[str, Any], list] = OrderedDict()
+        self._rule_cache: Dict[str, Tuple[Optional[int], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+        self.dropped = 0
+
+    def _rules_for(self, logger_name: str) -> Tuple[Optional[int], Optional[float]]:
+        rules = self._rule_cache.get(logger_name)
+        if rules is None:
+            rules = (self._match(self.sample_rates, logger_name), self._match(self.rate_limits, logger_name))
+            self._rule_cache[logger_name] = rules
+        return rules
+
+    @staticmethod
+    def _match(rules: Dict[str, Any], logger_name: str):
+        best = None
+        best_length = -1
+        for prefix, value in rules.items():
+            if (logger_name == prefix or logger_name.startswith(prefix + '.') or prefix == '') \
+                    and len(prefix) > best_length:
+                best, best_length = value, len(prefix)
+        return best
+
+    def _touch(self, entries: OrderedDict, key: Tuple[str, Any]):
+        # Least recently seen templates are forgotten first
+        entries.move_to_end(key)
+        if len(entries) > self.max_keys:
+            entries.popitem(last=False)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        sample_rate, rate_limit = self._rules_for(record.name)
+        if not sample_rate and not rate_limit:
+            return True
+
+        key = (record.name, record.msg)
+        with self._lock:
+            if sample_rate and sample_rate > 1:
+                count = self._counters.get(key, 0)
+                self._counters[key] = count + 1
+                self._touch(self._counters, key)
+                if count % sample_rate:
+                    self.dropped += 1
+                    return False
+
+            if rate_limit:
+                now = time.monotonic()
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = [rate_limit, now]
+                self._touch(self._buckets, key)
+                tokens = min(rate_limit, bucket[0] + (now - bucket[1]) * rate_limit)
+                bucket[1] = now
+                if tokens < 1.0:
+                    bucket[0] = tokens
+                    self.dropped += 1
+                    return False
+                bucket[0] = tokens - 1.0
+
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands records to the listener unformatted.
+    The stock handler formats the message in the calling thread; deferring it
+    moves argument rendering (including LazyPayload) onto the listener thread.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # Never block a hot path on a full log queue; drop and count instead
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: int = logging.INFO, fmt: str = DEFAULT_FORMAT,
+                      log_file: Optional[str] = None,
+                      sample_rates: Optional[Dict[str, int]] = None,
+                      rate_limits: Optional[Dict[str, float]] = None,
+                      queue_size: int = 10000) -> QueueListener:
+    """
+    Route all logging through a bounded queue drained by a background listener.
+
+    Callers only pay for the sampling filter and a queue put; formatting and I/O
+    happen on the listener thread. Safe to call more than once - the existing
+    listener is returned.
+    """
+    global _listener
+
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = logging.Formatter(fmt)
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(
+            sample_rates=sample_rates,
+            rate_limits=DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        ))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,249 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from infrastructure.persistence import MODELS_AVAILABLE, commit_or_rollback
+
+if MODELS_AVAILABLE:
+    from sqlalchemy import func
+    from infrastructure.persistence import MarketData, Niche
+
+
+class MarketDataCache:
+    """
+    Two-tier cache for market research results keyed by (niche, data_type).
+
+    Tier one is an in-memory dict; tier two is the MarketData table, using
+    expires_at as the freshness boundary, so results survive restarts and are
+    shared with the backend. Entries past expires_at are served as-is while a
+    background refresh runs (stale-while-revalidate); entries older than
+    expires_at + stale_seconds, or missing ones, are loaded synchronously.
+    A key that is not fresh in memory is looked up in MarketData at most once
+    per recheck_seconds, so serving a stale entry does not query on every get.
+
+    Loaders are registered per data type and take the niche name.
+    """
+
+    FRESH = 'fresh'
+    STALE = 'stale'
+    MISS = 'miss'
+
+    SOURCE = 'market_analytics'
+
+    def __init__(self, freshness_seconds: float = 6 * 3600, stale_seconds: Optional[float] = None,
+                 session_factory: Optional[Callable] = None, refresh_workers: int = 2,
+                 recheck_seconds: float = 60.0, now: Callable[[], datetime] = datetime.utcnow):
+        self.freshness_seconds = freshness_seconds
+        self.recheck_seconds = recheck_seconds
+        self.stale_seconds = freshness_seconds if stale_seconds is None else stale_seconds
+        self.session_factory = session_factory
+        self.now = now
+
+        self.loaders: Dict[str, Callable[[str], Any]] = {}
+        self.entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        self.logger = logging.getLogger('MarketDataCache')
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='market-refresh')
+
+        self.stats = {'fresh': 0, 'stale': 0, 'miss': 0, 'refreshes': 0, 'refresh_failures': 0}
+
+    def register(self, data_type: str, loader: Callable[[str], Any]):
+        self.loaders[data_type] = loader
+
+    @staticmethod
+    def make_key(niche: Optional[str], data_type: str) -> Tuple[str, str]:
+        return ' '.join(str(niche or '').lower().split()), data_type
+
+    def state_of(self, entry: Optional[Dict[str, Any]]) -> str:
+        if entry is None:
+            return self.MISS
+        now = self.now()
+        if now < entry['expires_at']:
+            return self.FRESH
+        if now < entry['expires_at'] + timedelta(seconds=self.stale_seconds):
+            return self.STALE
+        return self.MISS
+
+    def peek(self, niche: str, data_type: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return (state, entry) from either tier without loading or refreshing"""
+        key = self.make_key(niche, data_type)
+        entry = self.entries.get(key)
+        if self.state_of(entry) != self.FRESH and self._due_for_recheck(entry):
+            stored = self._load_stored(key)
+            if stored is not None and (entry is None or stored['created_at'] > entry['created_at']):
+                with self._lock:
+                    self.entries[key] = entry = stored
+            elif entry is not None:
+                entry['checked_at'] = self.now()
+        return self.state_of(entry), entry
+
+    def _due_for_recheck(self, entry: Optional[Dict[str, Any]]) -> bool:
+        # Another process may have refreshed the key: look once it stops being fresh,
+        # then again whenever recheck_seconds have passed
+        if entry is None or entry['checked_at'] < entry['expires_at']:
+            return True
+        return self.now() >= entry['checked_at'] + timedelta(seconds=self.recheck_seconds)
+
+    def get(self, niche: str, data_type: str) -> Tuple[Any, str]:
+        """
+        Return (value, state). Fresh and stale values come back immediately (a stale
+        one also schedules a background refresh); misses are loaded inline.
+        """
+        key = self.make_key(niche, data_type)
+        state, entry = self.peek(niche, data_type)
+        self.stats[state] += 1
+
+        if state == self.FRESH:
+            return entry['value'], state
+        if state == self.STALE:
+            self.refresh_async(niche, data_type)
+            return entry['value'], state
+
+        # Only one caller loads a missing key; the others reuse its result
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        try:
+            with load_lock:
+                entry = self.entries.get(key)
+                if self.state_of(entry) == self.FRESH:
+                    return entry['value'], self.FRESH
+                return self.refresh(niche, data_type)['value'], state
+        finally:
+            # Later callers find the entry fresh; a new lock is only made for the next miss
+            with self._lock:
+                if self._load_locks.get(key) is load_lock:
+                    del self._load_locks[key]
+
+    def refresh(self, niche: str, data_type: str) -> Dict[str, Any]:
+        """Load a key now and store it in both tiers"""
+        loader = self.loaders.get(data_type)
+        if loader is None:
+            raise KeyError(f"No loader registered for {data_type}")
+
+        value = loader(niche)
+        return self.put(niche, data_type, value)
+
+    def refresh_async(self, niche: str, data_type: str) -> bool:
+        """Schedule a background refresh unless one is already running for the key"""
+        key = self.make_key(niche, data_type)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        self._executor.submit(self._background_refresh, key, niche, data_type)
+        return True
+
+    def _background_refresh(self, key: Tuple[str, str], niche: str, data_type: str):
+        try:
+            self.refresh(niche, data_type)
+            self.stats['refreshes'] += 1
+        except Exception as e:
+            # The stale entry keeps being served until a refresh succeeds
+            self.stats['refresh_failures'] += 1
+            self.logger.error(f"Background refresh of {data_type} for {niche} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def put(self, niche: str, data_type: str, value: Any) -> Dict[str, Any]:
+        key = self.make_key(niche, data_type)
+        created_at = self.now()
+        entry = {
+            'value': value,
+            'created_at': created_at,
+            'expires_at': created_at + timedelta(seconds=self.freshness_seconds),
+            'checked_at': created_at
+        }
+        with self._lock:
+            self.entries[key] = entry
+        self._store(key, entry)
+        return entry
+
+    def invalidate(self, niche: Optional[str] = None):
+        with self._lock:
+            if niche is None:
+                self.entries.clear()
+                return
+            niche_key = self.make_key(niche, '')[0]
+            for key in [key for key in self.entries if key[0] == niche_key]:
+                del self.entries[key]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'entries': len(self.entries), 'refreshing': len(self._refreshing)}
+
+    # MarketData tier
+
+    def _niche_id(self, session, niche_key: str) -> Optional[int]:
+        if not niche_key:
+            return None
+        # Exact case-insensitive match; ilike would treat % and _ in niche names as wildcards
+        row = session.query(Niche.id).filter(func.lower(Niche.name) == niche_key).first()
+        return row[0] if row else None
+
+    def _query(self, session, key: Tuple[str, str]):
+        niche_id = self._niche_id(session, key[0])
+        query = session.query(MarketData).filter(
+            MarketData.data_type == key[1],
+            MarketData.source == self.SOURCE
+        )
+        if niche_id is None:
+            # Niches without a Niche row are matched on the name kept in the payload
+            query = query.filter(MarketData.niche_id.is_(None), MarketData.product_name == key[0])
+        else:
+            query = query.filter(MarketData.niche_id == niche_id)
+        return niche_id, query.order_by(MarketData.created_at.desc())
+
+    def _load_stored(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return None
+
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return None
+
+                record = self._query(session, key)[1].first()
+                if record is None or record.expires_at is None:
+                    return None
+                return {
+                    'value': (record.data_payload or {}).get('value'),
+                    'created_at': record.created_at,
+                    'expires_at': record.expires_at,
+                    'checked_at': self.now()
+                }
+        except Exception as e:
+            self.logger.error(f"Failed to read cached market data: {str(e)}")
+            return None
+
+    def _store(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return
+
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return
+
+                niche_id, query = self._query(session, key)
+                record = query.first()
+                if record is None:
+                    record = MarketData(data_type=key[1], source=self.SOURCE, niche_id=niche_id)
+                    session.add(record)
+
+                record.product_name = key[0] if niche_id is None else None
+                record.data_payload = {'niche': key[0], 'value': entry['value']}
+                record.created_at = entry['created_at']
+                record.expires_at = entry['expires_at']
+                commit_or_rollback(session, f"market data {key[1]} for {key[0]}")
+        except Exception as e:
+            self.logger.error(f"Failed to store market data: {str(e)}")
@@ -82,10 +82,10 @@ class MessageBroker:
             
             if result > 0:
                 self.stats['messages_sent'] += 1
-                self.logger.debug(f"Message published to {channel}: {message.get('type', 'unknown')}")
+                self.logger.debug("Message published to %s: %s", channel, message.get('type', 'unknown'))
                 return True
             else:
-                self.logger.warning(f"No subscribers for channel {channel}")
+                self.logger.warning("No subscribers for channel %s", channel)
                 return False
                 
         except Exception as e:
@@ -161,7 +161,7 @@ class MessageBroker:
                 handler = self.message_handlers[channel]
                 handler(message_data)
             else:
-                self.logger.warning(f"No handler for channel: {channel}")
+                self.logger.warning("No handler for channel: %s", channel)
                 
         except Exception as e:
             self.logger.error(f"Error handling message: {str(e)}")
@@ -187,7 +187,7 @@ class MessageBroker:
             
             if result:
                 self.stats['tasks_queued'] += 1
-                self.logger.debug(f"Task added to queue {queue_name} with priority {priority}")
+                self.logger.debug("Task added to queue %s with priority %s", queue_name, priority)
                 return True
             else:
                 return False
@@ -212,7 +212,7 @@ class MessageBroker:
                 task_data = json.loads(task_json)
                 
                 self.stats['tasks_processed'] += 1
-                self.logger.debug(f"Task retrieved from queue {queue_name}")
+                self.logger.debug("Task retrieved from queue %s", queue_name)
                 
                 return task_data
             else:
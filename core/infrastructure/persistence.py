@@ -0,0 +1,55 @@
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+# Database models live in the Flask backend; agents can run without them (e.g. start_agents.py)
+try:
+    from flask import has_app_context
+    from src.models.user import db
+    from src.models.agent_models import AgentState, BlogInstance, AgentTask, MarketData, AgentDecision
+    from src.models.niche import Niche
+    from src.models.product import Product
+    MODELS_AVAILABLE = True
+except ImportError:
+    MODELS_AVAILABLE = False
+
+logger = logging.getLogger('Persistence')
+
+
+@contextmanager
+def database_session(app=None):
+    """
+    Yield the SQLAlchemy session for agent persistence.
+
+    Uses the current Flask app context when there is one, otherwise pushes one for
+    the given app. Yields None when the backend models or app are unavailable so
+    callers can fall back to in-memory state.
+    """
+    if not MODELS_AVAILABLE:
+        yield None
+        return
+
+    if has_app_context():
+        yield db.session
+        return
+
+    if app is None:
+        yield None
+        return
+
+    with app.app_context():
+        try:
+            yield db.session
+        finally:
+            db.session.remove()
+
+
+def commit_or_rollback(session, action: str) -> bool:
+    """Commit the session, rolling back and logging on failure"""
+    try:
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Failed to persist {action}: {str(e)}")
+        return False
@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterable
+
+# Envelope fields that identify a particular dispatch rather than the work itself
+VOLATILE_PARAMS = frozenset([
+    'type', 'task_id', 'workflow_id', 'assigned_by', 'priority', 'depends_on',
+    'upstream_results', 'deadline', 'cancel_token'
+])
+
+
+class ResultCache:
+    """
+    TTL cache of task results keyed by (task_type, normalized params), with
+    single-flight deduplication: while a result is being computed, identical
+    requests join the in-flight one instead of starting their own.
+
+    The cache is message-driven rather than blocking. lookup() tells the caller
+    whether to use a cached value, wait for an in-flight leader, or lead the
+    computation; resolve()/fail() hand back the waiters to complete.
+
+    An in-flight entry older than inflight_ttl is considered lost (its leader
+    never reported back): the next identical request takes over as leader,
+    inheriting the waiters, and expire_inflight() hands back stale entries so
+    their waiters can be failed.
+    """
+
+    HIT = 'hit'
+    JOINED = 'joined'
+    LEADER = 'leader'
+
+    def __init__(self, ttl_seconds: float = 1800.0, max_entries: int = 1024, inflight_ttl: float = 900.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.inflight_ttl = inflight_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, Any]]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {'hits': 0, 'misses': 0, 'joined': 0, 'expired': 0, 'stale_inflight': 0}
+
+    @staticmethod
+    def normalize(value: Any) -> Any:
+        if isinstance(value, str):
+            return ' '.join(value.lower().split())
+        if isinstance(value, dict):
+            return {str(k): ResultCache.normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [ResultCache.normalize(v) for v in value]
+        return value
+
+    @classmethod
+    def make_key(cls, task_type: str, params: Dict[str, Any],
+                 ignore: Iterable[str] = VOLATILE_PARAMS) -> Tuple[str, str]:
+        """Build a cache key that ignores envelope fields, key order, case and whitespace"""
+        ignored = set(ignore)
+        relevant = {
+            key: value for key, value in params.items()
+            if key not in ignored and value is not None
+        }
+        return task_type, json.dumps(cls.normalize(relevant), sort_keys=True, default=str)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        with self._lock:
+            return self._get_fresh(key)
+
+    def _get_fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self.clock() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.stats['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def lookup(self, key: Tuple[str, str], requester: str) -> Tuple[str, Any]:
+        """
+        Returns (HIT, value) for a fresh cached result, (JOINED, leader) when the
+        requester was attached to an identical in-flight request, or (LEADER, None)
+        when the requester must compute the result and later call resolve()/fail().
+        """
+        with self._lock:
+            value = self._get_fresh(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return self.HIT, value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                self._inflight[key] = {'leader': requester, 'waiters': [], 'started_at': self.clock()}
+                self.stats['misses'] += 1
+                return self.LEADER, None
+
+            # A leader being re-dispatched (e.g. after failover) keeps leading
+            if inflight['leader'] == requester:
+                return self.LEADER, None
+
+            # A leader that never reported back is replaced; its waiters follow the new one
+            if self._stale(inflight):
+                self.stats['stale_inflight'] += 1
+                inflight['leader'] = requester
+                inflight['started_at'] = self.clock()
+                if requester in inflight['waiters']:
+                    inflight['waiters'].remove(requester)
+                return self.LEADER, None
+
+            if requester not in inflight['waiters']:
+                inflight['waiters'].append(requester)
+                self.stats['joined'] += 1
+            return self.JOINED, inflight['leader']
+
+    def resolve(self, key: Tuple[str, str], value: Any) -> List[str]:
+        """Store the leader's result and return the requesters waiting on it"""
+        with self._lock:
+            inflight = self._inflight.pop(key, None)
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return inflight['waiters'] if inflight else []
+
+    def _stale(self, inflight: Dict[str, Any]) -> bool:
+        return self.clock() - inflight['started_at'] > self.inflight_ttl
+
+    def waiting(self, key: Tuple[str, str]) -> List[str]:
+        """Requesters currently waiting on the in-flight request for key"""
+        with self._lock:
+            inflight = self._inflight.get(key)
+            return list(inflight['waiters']) if inflight else []
+
+    def expire_inflight(self) -> List[Tuple[Tuple[str, str], str, List[str]]]:
+        """Drop in-flight requests older than inflight_ttl; returns (key, leader, waiters) for each"""
+        with self._lock:
+            stale = [key for key, inflight in self._inflight.items() if self._stale(inflight)]
+            expired = []
+            for key in stale:
+                inflight = self._inflight.pop(key)
+                expired.append((key, inflight['leader'], inflight['waiters']))
+            self.stats['stale_inflight'] += len(stale)
+            return expired
+
+    def fail(self, key: Tuple[str, str]) -> List[str]:
+        """Drop a failed in-flight request (nothing is cached) and return its waiters"""
+        with self._lock:
+            inflight = self._inflight.pop(key, None)
+            return inflight['waiters'] if inflight else []
+
+    def invalidate(self, task_type: Optional[str] = None):
+        with self._lock:
+            if task_type is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == task_type]:
+                del self._entries[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'inflight': len(self._inflight)
+            }
@@ -0,0 +1,133 @@
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple, Hashable
+
+
+class HierarchicalTimerWheel:
+    """
+    Hierarchical timing wheel for large numbers of resettable deadlines.
+
+    Level 0 has one slot per tick; each higher level has one slot per full rotation
+    of the level below (with the defaults: seconds, minutes, hours). Scheduling,
+    rescheduling and cancelling are O(1); advance() costs O(ticks elapsed + timers
+    expired), independent of how many timers are pending.
+    """
+
+    def __init__(self, tick: float = 1.0, wheel_sizes: Tuple[int, ...] = (60, 60, 24),
+                 start_time: Optional[float] = None):
+        self.tick = tick
+        self.wheel_sizes = wheel_sizes
+        # Ticks covered by one slot at each level
+        self.spans = [1]
+        for size in wheel_sizes[:-1]:
+            self.spans.append(self.spans[-1] * size)
+
+        self.wheels: List[List[set]] = [[set() for _ in range(size)] for size in wheel_sizes]
+        self.deadlines: Dict[Hashable, int] = {}
+        self.locations: Dict[Hashable, Tuple[int, int]] = {}
+
+        now = time.monotonic() if start_time is None else start_time
+        self.current_tick = self._to_tick(now)
+        self._lock = threading.Lock()
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick)
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.deadlines
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Set (or move) the deadline for key, as a timestamp on the wheel's clock"""
+        with self._lock:
+            self._remove(key)
+            deadline_tick = max(self._to_tick(deadline), self.current_tick + 1)
+            self.deadlines[key] = deadline_tick
+            self._place(key, deadline_tick)
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def deadline_of(self, key: Hashable) -> Optional[float]:
+        deadline_tick = self.deadlines.get(key)
+        return deadline_tick * self.tick if deadline_tick is not None else None
+
+    def _remove(self, key: Hashable) -> bool:
+        location = self.locations.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        self.wheels[level][slot].discard(key)
+        del self.deadlines[key]
+        return True
+
+    def _place(self, key: Hashable, deadline_tick: int):
+        """Put key in the lowest level whose current rotation contains the deadline"""
+        top = len(self.wheel_sizes) - 1
+        level = top
+        for candidate in range(top):
+            next_span = self.spans[candidate] * self.wheel_sizes[candidate]
+            if deadline_tick // next_span == self.current_tick // next_span:
+                level = candidate
+                break
+
+        slot = (deadline_tick // self.spans[level]) % self.wheel_sizes[level]
+        self.wheels[level][slot].add(key)
+        self.locations[key] = (level, slot)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel forward to now and return the keys whose deadlines passed"""
+        target_tick = self._to_tick(time.monotonic() if now is None else now)
+        expired = []
+
+        with self._lock:
+            if not self.deadlines:
+                self.current_tick = max(self.current_tick, target_tick)
+                return expired
+
+            while self.current_tick < target_tick:
+                self.current_tick += 1
+
+                # Cascade higher levels whose slot boundary we just crossed, top down
+                for level in range(len(self.wheel_sizes) - 1, 0, -1):
+                    if self.current_tick % self.spans[level] == 0:
+                        slot = (self.current_tick // self.spans[level]) % self.wheel_sizes[level]
+                        self._cascade(level, slot)
+
+                slot = self.current_tick % self.wheel_sizes[0]
+                bucket = self.wheels[0][slot]
+                if bucket:
+                    self.wheels[0][slot] = set()
+                    for key in bucket:
+                        del self.locations[key]
+                        if self.deadlines[key] <= self.current_tick:
+                            del self.deadlines[key]
+                            expired.append(key)
+                        else:
+                            self._place(key, self.deadlines[key])
+
+                if not self.deadlines:
+                    self.current_tick = target_tick
+                    break
+
+        return expired
+
+    def _cascade(self, level: int, slot: int):
+        bucket = self.wheels[level][slot]
+        if not bucket:
+            return
+        self.wheels[level][slot] = set()
+        for key in bucket:
+            del self.locations[key]
+            self._place(key, self.deadlines[key])
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending_timers': len(self.deadlines),
+                'current_time': self.current_tick * self.tick,
+                'per_level': [sum(len(slot) for slot in wheel) for wheel in self.wheels]
+            }
@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Iterable, Set, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from infrastructure.persistence import MODELS_AVAILABLE
+
+if MODELS_AVAILABLE:
+    from infrastructure.persistence import MarketData
+
+EPOCH = datetime(1970, 1, 1)
+
+ROLLUP_SECONDS = {
+    'hourly': 3600,
+    'daily': 86400
+}
+
+
+def to_epoch(timestamp) -> float:
+    """Seconds since the epoch for a naive-UTC datetime (or a number passed through)"""
+    if isinstance(timestamp, datetime):
+        return (timestamp - EPOCH).total_seconds()
+    return float(timestamp)
+
+
+class ColumnarSeries:
+    """
+    One metric of one product as two contiguous float64 columns (timestamps and
+    values), kept in time order. Columns grow by doubling; reads hand out NumPy
+    views, which stay valid because growth and out-of-order inserts allocate new
+    buffers instead of resizing in place.
+    """
+
+    def __init__(self, timestamps: Iterable[float] = (), values: Iterable[float] = ()):
+        self._timestamps = np.array(timestamps, dtype=np.float64)
+        self._values = np.array(values, dtype=np.float64)
+        self._size = len(self._timestamps)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, value: float) -> bool:
+        """Append an observation; returns False if it arrived out of order and was inserted"""
+        if self._size and timestamp < self._timestamps[self._size - 1]:
+            timestamps, values = self.arrays()
+            position = int(np.searchsorted(timestamps, timestamp, side='right'))
+            self._timestamps = np.insert(timestamps, position, timestamp)
+            self._values = np.insert(values, position, value)
+            self._size += 1
+            return False
+
+        if self._size == len(self._timestamps):
+            capacity = max(16, 2 * self._size)
+            self._timestamps = np.concatenate((self._timestamps[:self._size], np.empty(capacity - self._size)))
+            self._values = np.concatenate((self._values[:self._size], np.empty(capacity - self._size)))
+
+        self._timestamps[self._size] = timestamp
+        self._values[self._size] = value
+        self._size += 1
+        return True
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self._timestamps[:self._size], self._values[:self._size]
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Observations with start <= timestamp < end, as views"""
+        timestamps, values = self.arrays()
+        low = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        high = self._size if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        return timestamps[low:high], values[low:high]
+
+    def rollup(self, bucket_seconds: int, start: Optional[float] = None,
+               end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Downsample into fixed buckets: open/high/low/close/mean/count per bucket"""
+        timestamps, values = self.range(start, end)
+        if not len(timestamps):
+            empty = np.empty(0)
+            return {name: empty for name in ('bucket', 'open', 'high', 'low', 'close', 'mean', 'count')}
+
+        buckets = np.floor(timestamps / bucket_seconds) * bucket_seconds
+        # Timestamps are sorted, so each bucket is a contiguous run
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.concatenate((starts[1:], [len(values)]))
+        counts = ends - starts
+
+        return {
+            'bucket': buckets[starts],
+            'open': values[starts],
+            'high': np.maximum.reduceat(values, starts),
+            'low': np.minimum.reduceat(values, starts),
+            'close': values[ends - 1],
+            'mean': np.add.reduceat(values, starts) / counts,
+            'count': counts
+        }
+
+
+class TimeSeriesStore:
+    """
+    Columnar store of price and trend observations, one ColumnarSeries per
+    (product, metric).
+
+    With a root directory, every series is also appended to its own file of
+    interleaved (timestamp, value) float64 pairs and loaded back with a single
+    np.fromfile call, so history survives restarts without JSON decoding. File
+    appends are buffered and written by flush() (every flush_every points, and
+    per ingestion batch), one write per series. ingest_market_data() backfills
+    the store from MarketData rows incrementally; its high-water mark is saved
+    next to the series after they are flushed, so a restarted store does not
+    append rows it already holds.
+    """
+
+    HIGH_WATER_MARK_FILE = 'ingested.json'
+
+    def __init__(self, root_dir: Optional[str] = None, flush_every: int = 4096):
+        self.root_dir = root_dir
+        self.flush_every = flush_every
+        if root_dir:
+            os.makedirs(root_dir, exist_ok=True)
+
+        self.logger = logging.getLogger('TimeSeriesStore')
+        self._lock = threading.RLock()
+
+        self.series: Dict[Tuple[str, str], ColumnarSeries] = {}
+        self._unwritten: Dict[Tuple[str, str], array] = {}  # (product, metric) -> pairs not yet on disk
+        self._unwritten_points = 0
+        self._on_disk: Optional[Set[Tuple[str, str]]] = None  # series files found at the first listing
+        self.last_ingested_id = self._load_high_water_mark()
+
+    def _load_high_water_mark(self) -> int:
+        if not self.root_dir:
+            return 0
+        try:
+            with open(os.path.join(self.root_dir, self.HIGH_WATER_MARK_FILE)) as handle:
+                return int(json.load(handle).get('last_ingested_id', 0))
+        except FileNotFoundError:
+            return 0
+        except (ValueError, TypeError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable ingestion high-water mark: {str(e)}")
+            return 0
+
+    def _save_high_water_mark(self):
+        if not self.root_dir:
+            return
+        path = os.path.join(self.root_dir, self.HIGH_WATER_MARK_FILE)
+        with open(path + '.tmp', 'w') as handle:
+            json.dump({'last_ingested_id': self.last_ingested_id}, handle)
+        os.replace(path + '.tmp', path)
+
+    def _path(self, product: str, metric: str) -> str:
+        return os.path.join(self.root_dir, f"{quote(product, safe='')}__{quote(metric, safe='')}.f64")
+
+    def get(self, product: str, metric: str) -> Optional[ColumnarSeries]:
+        key = (product, metric)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None and self.root_dir:
+                path = self._path(product, metric)
+                if os.path.exists(path):
+                    pairs = np.fromfile(path, dtype=np.float64).reshape(-1, 2)
+                    order = np.argsort(pairs[:, 0], kind='stable')
+                    series = self.series[key] = ColumnarSeries(pairs[order, 0], pairs[order, 1])
+            return series
+
+    def append(self, product: str, metric: str, timestamp, value: float):
+        timestamp = to_epoch(timestamp)
+        with self._lock:
+            series = self.get(product, metric)
+            if series is None:
+                series = self.series[(product, metric)] = ColumnarSeries()
+            series.append(timestamp, float(value))
+
+            if self.root_dir:
+                self._unwritten.setdefault((product, metric), array('d')).extend((timestamp, float(value)))
+                self._unwritten_points += 1
+                if self._unwritten_points >= self.flush_every:
+                    self.flush()
+
+    def flush(self):
+        """Write buffered observations to their series files"""
+        with self._lock:
+            for (product, metric), pairs in self._unwritten.items():
+                with open(self._path(product, metric), 'ab') as handle:
+                    handle.write(pairs.tobytes())
+            self._unwritten.clear()
+            self._unwritten_points = 0
+
+    def append_many(self, product: str, timestamp, metrics: Dict[str, Any]):
+        """Append every numeric metric of one observation"""
+        for metric, value in metrics.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.append(product, metric, timestamp, value)
+
+    def products(self, metric: str) -> List[str]:
+        with self._lock:
+            if self._on_disk is None:
+                self._on_disk = self._discover()
+            keys = self._on_disk.union(self.series)
+            return sorted(product for product, series_metric in keys if series_metric == metric)
+
+    def _discover(self) -> Set[Tuple[str, str]]:
+        """Series that exist on disk; later series are created through this store and kept in memory"""
+        if not self.root_dir:
+            return set()
+        keys = set()
+        for filename in os.listdir(self.root_dir):
+            if filename.endswith('.f64') and '__' in filename:
+                product, metric = filename[:-4].rsplit('__', 1)
+                keys.add((unquote(product), unquote(metric)))
+        return keys
+
+    def range(self, product: str, metric: str, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        series = self.get(product, metric)
+        if series is None:
+            return np.empty(0), np.empty(0)
+        return series.range(None if start is None else to_epoch(start), None if end is None else to_epoch(end))
+
+    def rollup(self, product: str, metric: str, interval: str = 'daily', start=None, end=None) -> Dict[str, np.ndarray]:
+        series = self.get(product, metric)
+        if series is None:
+            series = ColumnarSeries()
+        return series.rollup(ROLLUP_SECONDS[interval],
+                             None if start is None else to_epoch(start),
+                             None if end is None else to_epoch(end))
+
+    def value_columns(self, metric: str, last: Optional[int] = None, since=None) -> Dict[str, np.ndarray]:
+        """
+        Value column of every product for a metric, for vectorized scoring,
+        limited to observations from `since` on and to the `last` points.
+        The columns are views, not copies.
+        """
+        columns = {}
+        for product in self.products(metric):
+            series = self.get(product, metric)
+            if series is None:
+                continue
+            values = series.range(None if since is None else to_epoch(since))[1]
+            columns[product] = values[-last:] if last else values
+        return columns
+
+    def ingest_market_data(self, session_factory: Callable, data_type: str, metrics: Iterable[str],
+                           batch_size: int = 5000) -> int:
+        """
+        Copy numeric payload metrics of MarketData rows newer than the last ingested
+        row into the store. Returns the number of rows read.
+        """
+        if not MODELS_AVAILABLE or session_factory is None:
+            return 0
+
+        metrics = list(metrics)
+        ingested = 0
+        with session_factory() as session:
+            if session is None:
+                return 0
+
+            while True:
+                rows = session.query(
+                    MarketData.id, MarketData.product_name, MarketData.created_at, MarketData.data_payload
+                ).filter(
+                    MarketData.data_type == data_type,
+                    MarketData.product_name.isnot(None),
+                    MarketData.id > self.last_ingested_id
+                ).order_by(MarketData.id).limit(batch_size).all()
+                if not rows:
+                    break
+
+                for row_id, product_name, created_at, payload in rows:
+                    payload = payload or {}
+                    self.append_many(product_name, created_at or EPOCH,
+                                     {metric: payload.get(metric) for metric in metrics})
+                    self.last_ingested_id = row_id
+                # Saved per batch, after its points are on disk: a crash re-reads at most the batch in progress
+                self.flush()
+                self._save_high_water_mark()
+                ingested += len(rows)
+
+        if ingested:
+            self.logger.info(f"Ingested {ingested} {data_type} rows into the time-series store")
+        return ingested
@@ -0,0 +1,491 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Iterable, Set
+
+from infrastructure.persistence import MODELS_AVAILABLE, commit_or_rollback
+
+if MODELS_AVAILABLE:
+    from infrastructure.persistence import AgentTask
+
+
+class WorkflowError(Exception):
+    """Raised for malformed workflow definitions"""
+
+
+class WorkflowNode:
+    """A single step of a workflow, dispatched as one agent task"""
+
+    # Terminal node states; 'skipped' means no agent could take the task
+    FINISHED_STATES = ('completed', 'failed', 'skipped')
+
+    def __init__(self, node_id: str, task_type: str, capability: str,
+                 depends_on: Optional[List[str]] = None, params: Optional[Dict[str, Any]] = None,
+                 allow_partial: bool = False):
+        self.node_id = node_id
+        self.task_type = task_type
+        self.capability = capability
+        self.depends_on = list(depends_on or [])
+        self.params = dict(params or {})
+        # When True the node still runs if some upstream nodes failed or were skipped
+        self.allow_partial = allow_partial
+
+        self.status = 'pending'
+        self.task_id: Optional[str] = None
+        self.assigned_agent: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.record_id: Optional[int] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'node_id': self.node_id,
+            'task_type': self.task_type,
+            'capability': self.capability,
+            'depends_on': self.depends_on,
+            'status': self.status,
+            'task_id': self.task_id,
+            'assigned_agent': self.assigned_agent,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class Workflow:
+    """A DAG of workflow nodes sharing a context (blog instance, priority, ...)"""
+
+    def __init__(self, workflow_id: str, nodes: Iterable[WorkflowNode],
+                 context: Optional[Dict[str, Any]] = None):
+        self.workflow_id = workflow_id
+        self.nodes: Dict[str, WorkflowNode] = {}
+        self.context = dict(context or {})
+        self.created_at = datetime.utcnow()
+
+        for node in nodes:
+            if node.node_id in self.nodes:
+                raise WorkflowError(f"Duplicate node id: {node.node_id}")
+            self.nodes[node.node_id] = node
+
+        self.dependents: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        for node in self.nodes.values():
+            for dependency in node.depends_on:
+                if dependency not in self.nodes:
+                    raise WorkflowError(f"Node {node.node_id} depends on unknown node {dependency}")
+                self.dependents[dependency].append(node.node_id)
+
+        self.topological_order()  # Validates that the graph is acyclic
+
+    def task_id_for(self, node_id: str) -> str:
+        return f"{self.workflow_id}_{node_id}"
+
+    def topological_order(self) -> List[str]:
+        """Return node ids in dependency order, raising WorkflowError on cycles"""
+        remaining = {node_id: len(node.depends_on) for node_id, node in self.nodes.items()}
+        ready = [node_id for node_id, count in remaining.items() if count == 0]
+        order = []
+
+        while ready:
+            node_id = ready.pop()
+            order.append(node_id)
+            for dependent in self.dependents[node_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(self.nodes):
+            raise WorkflowError(f"Workflow {self.workflow_id} contains a dependency cycle")
+        return order
+
+    def is_ready(self, node: WorkflowNode) -> bool:
+        """A pending node is ready once its dependencies have finished successfully
+        (or, for allow_partial nodes, finished at all)"""
+        if node.status != 'pending':
+            return False
+
+        for dependency in node.depends_on:
+            upstream = self.nodes[dependency]
+            if not upstream.is_finished:
+                return False
+            if upstream.status != 'completed' and not node.allow_partial:
+                return False
+        return True
+
+    def is_blocked(self, node: WorkflowNode) -> bool:
+        """A pending node can never run when a required dependency did not complete"""
+        if node.status != 'pending' or node.allow_partial:
+            return False
+        return any(
+            self.nodes[dependency].is_finished and self.nodes[dependency].status != 'completed'
+            for dependency in node.depends_on
+        )
+
+    def upstream_results(self, node: WorkflowNode) -> Dict[str, Any]:
+        return {
+            dependency: self.nodes[dependency].result
+            for dependency in node.depends_on
+            if self.nodes[dependency].status == 'completed'
+        }
+
+    @property
+    def status(self) -> str:
+        states = [node.status for node in self.nodes.values()]
+        if all(state in WorkflowNode.FINISHED_STATES for state in states):
+            # Success is judged on the leaf nodes: an allow_partial leaf may complete
+            # even though one of its inputs failed
+            leaves = [node for node_id, node in self.nodes.items() if not self.dependents[node_id]]
+            return 'completed' if all(node.status == 'completed' for node in leaves) else 'failed'
+        if any(state != 'pending' for state in states):
+            return 'running'
+        return 'pending'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'workflow_id': self.workflow_id,
+            'status': self.status,
+            'context': self.context,
+            'created_at': self.created_at.isoformat(),
+            'nodes': {node_id: node.to_dict() for node_id, node in self.nodes.items()}
+        }
+
+
+class WorkflowEngine:
+    """
+    Runs workflows as DAGs: every node is dispatched as soon as its dependencies
+    complete, independent branches run in parallel, and upstream results are passed
+    to downstream tasks. Node state is persisted to AgentTask rows when a database
+    session is available.
+    """
+
+    def __init__(self, dispatch: Callable[[Workflow, WorkflowNode], bool],
+                 session_factory: Optional[Callable] = None,
+                 on_complete: Optional[Callable[[Workflow], None]] = None):
+        # dispatch(workflow, node) sends the node's task and returns False if no agent could take it
+        self.dispatch = dispatch
+        self.session_factory = session_factory
+        self.on_complete = on_complete
+
+        self.workflows: Dict[str, Workflow] = {}
+        self.task_index: Dict[str, tuple] = {}  # task_id -> (workflow_id, node_id)
+        # Restored workflows whose nodes wait for a capable agent instead of being skipped
+        self.awaiting_agents: Set[str] = set()
+
+        self.logger = logging.getLogger('WorkflowEngine')
+        self._lock = threading.RLock()
+
+    def start(self, workflow: Workflow) -> Workflow:
+        """Register a workflow, persist its nodes and dispatch every root node"""
+        with self._lock:
+            if workflow.workflow_id in self.workflows:
+                raise WorkflowError(f"Workflow {workflow.workflow_id} already exists")
+
+            self.workflows[workflow.workflow_id] = workflow
+            for node_id, node in workflow.nodes.items():
+                node.task_id = node.task_id or workflow.task_id_for(node_id)
+                self.task_index[node.task_id] = (workflow.workflow_id, node_id)
+
+            self.persist_nodes(workflow, list(workflow.nodes.values()))
+            self.logger.info("Workflow %s started with %d nodes", workflow.workflow_id, len(workflow.nodes))
+
+            self.advance(workflow, workflow.topological_order())
+            return workflow
+
+    def handle_task_result(self, task_id: str, result: Optional[Dict[str, Any]],
+                           error: Optional[str] = None) -> bool:
+        """Record a node result and dispatch any dependents that became ready"""
+        with self._lock:
+            location = self.task_index.get(task_id)
+            if not location:
+                return False
+
+            workflow = self.workflows[location[0]]
+            node = workflow.nodes[location[1]]
+            if node.is_finished:
+                return True
+
+            error = self.result_error(result, error)
+            if error is None:
+                self.finish_node(workflow, node, 'completed', result=result)
+            else:
+                self.finish_node(workflow, node, 'failed', error=error)
+
+            self.advance(workflow, workflow.dependents[node.node_id])
+            return True
+
+    @staticmethod
+    def result_error(result: Optional[Dict[str, Any]], error: Optional[str] = None) -> Optional[str]:
+        """Return the failure reason for a task result, or None if it succeeded"""
+        if error is None and isinstance(result, dict):
+            if result.get('status') in ('error', 'failed', 'cancelled'):
+                error = result.get('error', 'Task reported failure')
+            elif 'error' in result and len(result) == 1:
+                error = result['error']
+        return error
+
+    def advance(self, workflow: Workflow, candidates: Iterable[str]):
+        """Dispatch ready candidates and cascade failures to blocked ones"""
+        pending = list(candidates)
+
+        while pending:
+            node = workflow.nodes[pending.pop(0)]
+
+            if workflow.is_blocked(node):
+                self.finish_node(workflow, node, 'failed', error='Upstream dependency did not complete')
+                pending.extend(workflow.dependents[node.node_id])
+                continue
+
+            if not workflow.is_ready(node):
+                continue
+
+            node.status = 'dispatched'
+            node.started_at = datetime.utcnow()
+            try:
+                dispatched = self.dispatch(workflow, node)
+            except Exception as e:
+                self.logger.error(f"Dispatch failed for {node.task_id}: {str(e)}")
+                dispatched = False
+
+            if dispatched:
+                self.persist_nodes(workflow, [node])
+            elif not node.is_finished and workflow.workflow_id in self.awaiting_agents:
+                # Agents re-register after a restart; retry_pending() dispatches it later
+                node.status = 'pending'
+                node.started_at = None
+            elif not node.is_finished:
+                self.finish_node(workflow, node, 'skipped', error=f"No agent available for {node.capability}")
+                pending.extend(workflow.dependents[node.node_id])
+            else:
+                # The dispatcher finished the node itself (e.g. served from cache)
+                pending.extend(workflow.dependents[node.node_id])
+
+        if workflow.status in ('completed', 'failed'):
+            self.complete_workflow(workflow)
+
+    def retry_pending(self, capabilities: Optional[Iterable[str]] = None) -> int:
+        """
+        Dispatch ready nodes of restored workflows that found no agent yet,
+        optionally only those needing one of the given capabilities.
+        Returns the number of nodes dispatched.
+        """
+        capabilities = set(capabilities) if capabilities is not None else None
+        dispatched = 0
+        with self._lock:
+            for workflow_id in list(self.awaiting_agents):
+                workflow = self.workflows.get(workflow_id)
+                if workflow is None:
+                    self.awaiting_agents.discard(workflow_id)
+                    continue
+
+                ready = [
+                    node_id for node_id, node in workflow.nodes.items()
+                    if workflow.is_ready(node) and (capabilities is None or node.capability in capabilities)
+                ]
+                if ready:
+                    self.advance(workflow, ready)
+                    dispatched += sum(1 for node_id in ready if workflow.nodes[node_id].status != 'pending')
+        return dispatched
+
+    def requeue_agent_tasks(self, agent_name: str) -> int:
+        """Re-dispatch in-flight nodes held by an agent that stopped responding"""
+        requeued = 0
+        with self._lock:
+            for workflow in list(self.workflows.values()):
+                stranded = [
+                    node for node in workflow.nodes.values()
+                    if node.status == 'dispatched' and node.assigned_agent == agent_name
+                ]
+                for node in stranded:
+                    node.status = 'pending'
+                    node.assigned_agent = None
+                    requeued += 1
+                if stranded:
+                    self.advance(workflow, [node.node_id for node in stranded])
+        return requeued
+
+    def cancel(self, workflow_id: str, reason: str = 'cancelled') -> List[str]:
+        """
+        Fail every unfinished node of a workflow and complete it.
+        Returns the task ids that were in flight, so their agents can be told to stop.
+        """
+        with self._lock:
+            workflow = self.workflows.get(workflow_id)
+            if workflow is None:
+                return []
+
+            in_flight = []
+            for node_id in workflow.topological_order():
+                node = workflow.nodes[node_id]
+                if node.is_finished:
+                    continue
+                if node.status == 'dispatched':
+                    in_flight.append(node.task_id)
+                self.finish_node(workflow, node, 'failed', error=reason)
+
+            self.complete_workflow(workflow)
+            return in_flight
+
+    def finish_node(self, workflow: Workflow, node: WorkflowNode, status: str,
+                    result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        node.status = status
+        node.result = result
+        node.error = error
+        node.completed_at = datetime.utcnow()
+        self.persist_nodes(workflow, [node])
+        self.logger.info("Workflow %s node %s %s", workflow.workflow_id, node.node_id, status)
+
+    def complete_workflow(self, workflow: Workflow):
+        if workflow.workflow_id not in self.workflows:
+            return
+
+        del self.workflows[workflow.workflow_id]
+        self.awaiting_agents.discard(workflow.workflow_id)
+        for node in workflow.nodes.values():
+            self.task_index.pop(node.task_id, None)
+
+        self.logger.info("Workflow %s finished: %s", workflow.workflow_id, workflow.status)
+        if self.on_complete:
+            self.on_complete(workflow)
+
+    def get_workflow(self, workflow_id: str) -> Optional[Workflow]:
+        return self.workflows.get(workflow_id)
+
+    # Persistence
+
+    # Workflow node states mapped onto AgentTask.status values
+    TASK_STATUS = {
+        'pending': 'pending',
+        'dispatched': 'in_progress',
+        'completed': 'completed',
+        'failed': 'failed',
+        'skipped': 'skipped'
+    }
+    
+    def persist_nodes(self, workflow: Workflow, nodes: List[WorkflowNode]):
+        """Upsert AgentTask rows for the given nodes"""
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return
+
+        try:
+            with self.session_factory() as session:
+                if session is None:
+                    return
+
+                records = []
+                for node in nodes:
+                    record = session.get(AgentTask, node.record_id) if node.record_id else None
+                    if record is None:
+                        record = AgentTask(
+                            task_type=node.task_type,
+                            blog_instance_id=workflow.context.get('blog_instance_id'),
+                            priority=workflow.context.get('priority', 5)
+                        )
+                        session.add(record)
+
+                    record.assigned_agent = node.assigned_agent or 'unassigned'
+                    record.status = self.TASK_STATUS[node.status]
+                    record.task_data = {
+                        'workflow_id': workflow.workflow_id,
+                        'task_id': node.task_id,
+                        'node_id': node.node_id,
+                        'capability': node.capability,
+                        'depends_on': node.depends_on,
+                        'allow_partial': node.allow_partial,
+                        'params': node.params,
+                        'context': workflow.context
+                    }
+                    record.result_data = node.result or {}
+                    record.error_message = node.error
+                    record.started_at = node.started_at
+                    record.completed_at = node.completed_at
+                    records.append(record)
+
+                if commit_or_rollback(session, f"workflow {workflow.workflow_id}"):
+                    for node, record in zip(nodes, records):
+                        node.record_id = record.id
+        except Exception as e:
+            self.logger.error(f"Failed to persist workflow {workflow.workflow_id}: {str(e)}")
+
+    def restore(self) -> int:
+        """
+        Reload unfinished workflows from AgentTask rows after a restart.
+        Nodes that were in flight are re-dispatched, since their result may have been lost.
+        Agents may not have re-registered yet, so nodes nobody can take stay pending
+        until retry_pending() finds them an agent (or the workflow's deadline passes).
+        """
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return 0
+
+        with self.session_factory() as session:
+            if session is None:
+                return 0
+
+            # Only workflows with unfinished nodes are restored; find them without loading the task history
+            open_statuses = [self.TASK_STATUS['pending'], self.TASK_STATUS['dispatched']]
+            workflow_ids = {
+                (task_data or {}).get('workflow_id')
+                for (task_data,) in session.query(AgentTask.task_data).filter(AgentTask.status.in_(open_statuses))
+            }
+            workflow_ids = [workflow_id for workflow_id in workflow_ids if workflow_id and workflow_id not in self.workflows]
+            if not workflow_ids:
+                return 0
+
+            rows_by_workflow: Dict[str, List[Any]] = {}
+            rows = session.query(AgentTask).filter(AgentTask.task_data['workflow_id'].as_string().in_(workflow_ids))
+            for row in rows:
+                rows_by_workflow.setdefault(row.task_data['workflow_id'], []).append(row)
+
+            restored = []
+            for workflow_id, rows in rows_by_workflow.items():
+                workflow = self._rebuild(workflow_id, rows)
+                if workflow is not None:
+                    restored.append(workflow)
+
+        with self._lock:
+            for workflow in restored:
+                self.workflows[workflow.workflow_id] = workflow
+                self.awaiting_agents.add(workflow.workflow_id)
+                stranded = []
+                for node_id, node in workflow.nodes.items():
+                    self.task_index[node.task_id] = (workflow.workflow_id, node_id)
+                    if node.status == 'dispatched':
+                        node.status = 'pending'
+                        node.started_at = None
+                        stranded.append(node)
+                if stranded:
+                    self.persist_nodes(workflow, stranded)
+                self.advance(workflow, workflow.topological_order())
+
+        return len(restored)
+
+    def _rebuild(self, workflow_id: str, rows: List[Any]) -> Optional[Workflow]:
+        nodes = []
+        context = {}
+        for row in rows:
+            data = row.task_data or {}
+            node = WorkflowNode(
+                data.get('node_id'), row.task_type, data.get('capability'),
+                depends_on=data.get('depends_on'), params=data.get('params'),
+                allow_partial=data.get('allow_partial', False)
+            )
+            node.task_id = data.get('task_id')
+            node.record_id = row.id
+            node.assigned_agent = row.assigned_agent if row.assigned_agent != 'unassigned' else None
+            node.result = row.result_data or None
+            node.error = row.error_message
+            node.started_at = row.started_at
+            node.completed_at = row.completed_at
+            node.status = {value: key for key, value in self.TASK_STATUS.items()}.get(row.status, 'pending')
+            nodes.append(node)
+            context = data.get('context', context)
+
+        try:
+            return Workflow(workflow_id, nodes, context)
+        except WorkflowError as e:
+            self.logger.error(f"Could not restore workflow {workflow_id}: {str(e)}")
+            return None
@@ -0,0 +1,336 @@
+import asyncio
+import functools
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+from urllib.parse import urlsplit
+
+import aiohttp
+from multidict import CIMultiDict
+
+from infrastructure.cancellation import current_token
+from scrapers.base_scraper import (
+    ExtractionHelpers, AmazonPageParser, DEFAULT_HEADERS, AMAZON_HEADERS, RETRY_STATUSES, default_rate_limiter
+)
+from scrapers.rate_limiter import HostRateLimiter
+from scrapers.streaming import BodyReader, CHUNK_SIZE, DEFAULT_MAX_BYTES, DEFAULT_TIMEOUT
+
+
+class FetchedPage:
+    """
+    A fully read response. Mirrors the parts of requests.Response that the
+    parsers use (url, status_code, headers, content, text).
+    """
+
+    def __init__(self, url: str, status_code: int, headers: CIMultiDict, content: bytes,
+                 encoding: Optional[str] = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+
+class AsyncBaseScraper(ExtractionHelpers, ABC):
+    """
+    Base class for scrapers that fetch many URLs concurrently on aiohttp.
+
+    One pooled ClientSession (keep-alive connections, at most max_connections
+    open) is shared by every request. Each host gets its own semaphore capping
+    in-flight requests at per_host_limit, and request starts go through the same
+    per-host token buckets as BaseScraper, so a crawl runs many hosts in
+    parallel while staying polite to each one.
+
+    Retry semantics match BaseScraper: up to `retries` retries on connection
+    errors and RETRY_STATUSES, with exponential backoff (no wait before the
+    first retry); 429/503 retries wait for the rate limiter instead. Cancellation
+    tokens are honored the same way as in BaseScraper.make_request.
+
+    Bodies are streamed with the same limits as BaseScraper: at most max_bytes
+    are kept, connect_timeout and read_timeout (between chunks) apply on top of
+    the total timeout, and body_reader can stop reading once the REGION markers
+    show the product region is complete.
+
+    Parsing is CPU-bound, so parse_page runs parse_response on a small thread
+    pool (parse_workers) instead of on the event loop, which keeps other
+    fetches streaming while a page is parsed.
+    """
+
+    # Markup markers bounding the region after which reading may stop (whole page if empty)
+    REGION_START_MARKERS = ()
+    REGION_END_MARKERS = ()
+
+    def __init__(self, name: str, base_delay: float = 1.0, max_delay: float = 5.0,
+                 max_connections: int = 100, per_host_limit: int = 8, timeout: float = 30.0,
+                 retries: int = 3, backoff_factor: float = 1.0, headers: Optional[Dict[str, str]] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None, max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                 connect_timeout: float = DEFAULT_TIMEOUT[0], read_timeout: float = DEFAULT_TIMEOUT[1],
+                 stop_after_region: bool = True, parse_workers: int = 4):
+        self.name = name
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_bytes = max_bytes
+        self.stop_after_region = stop_after_region
+        self.parse_workers = parse_workers
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+
+        self.logger = logging.getLogger(f"Scraper.{name}")
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._parse_executor: Optional[ThreadPoolExecutor] = None
+        self.rate_limiter = rate_limiter or default_rate_limiter(base_delay, max_delay)
+
+        self.stats = self._empty_stats()
+
+        self.logger.info(f"Async scraper {name} initialized")
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
+            'requests_made': 0,
+            'successful_requests': 0,
+            'failed_requests': 0,
+            'cancelled_requests': 0,
+            'retries': 0,
+            'throttled_requests': 0,
+            'truncated_downloads': 0,
+            'early_terminated_downloads': 0,
+            'bytes_downloaded': 0,
+            'data_points_collected': 0,
+            'start_time': datetime.utcnow().isoformat()
+        }
+
+    # Session lifecycle
+
+    async def open(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_limit,
+                                             ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def close(self):
+        self.logger.info(f"Shutting down scraper {self.name}")
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        # Per-host semaphores are bound to the event loop that created them
+        self._host_slots.clear()
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False)
+            self._parse_executor = None
+        self.logger.info(f"Final statistics: {self.get_statistics()}")
+
+    async def __aenter__(self) -> 'AsyncBaseScraper':
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # Requests
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slot
+
+    async def respect_rate_limit(self, host: str):
+        """Wait for the host's token bucket to allow another request"""
+        await self.rate_limiter.acquire_async(host)
+
+    def request_cancelled(self, url: str, cancel_token) -> bool:
+        """Check whether a request should be dropped because its task was cancelled"""
+        if cancel_token is None or not cancel_token.is_cancelled:
+            return False
+
+        self.stats['cancelled_requests'] += 1
+        self.logger.debug("Skipping request to %s: task cancelled or past its deadline", url)
+        return True
+
+    def body_reader(self, url: str) -> BodyReader:
+        """Early-termination hook; see BaseScraper.body_reader"""
+        if self.stop_after_region:
+            return BodyReader(self.max_bytes, self.REGION_START_MARKERS, self.REGION_END_MARKERS)
+        return BodyReader(self.max_bytes)
+
+    async def read_body(self, url: str, response: aiohttp.ClientResponse) -> bytes:
+        """Read the body in chunks through body_reader; the connection is closed if reading stops early"""
+        reader = self.body_reader(url)
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if reader.feed(chunk):
+                response.close()
+                break
+
+        self.stats['bytes_downloaded'] += len(reader.body)
+        if reader.truncated:
+            self.stats['truncated_downloads'] += 1
+            self.logger.warning(f"Response from {url} truncated at {self.max_bytes} bytes")
+        elif reader.stopped_early:
+            self.stats['early_terminated_downloads'] += 1
+        return reader.content()
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based), urllib3-style"""
+        return 0.0 if attempt <= 1 else self.backoff_factor * (2 ** (attempt - 1))
+
+    async def make_request(self, url: str, method: str = 'GET', **kwargs) -> Optional[FetchedPage]:
+        """
+        Make a rate-limited request and read the body (see read_body).
+        Returns None on failure, after retries, or when the task was cancelled.
+        """
+        cancel_token = kwargs.pop('cancel_token', None) or current_token()
+        if self.request_cancelled(url, cancel_token):
+            return None
+
+        session = await self.open()
+        host = urlsplit(url).netloc
+        attempt = 0
+
+        async with self._host_slot(host):
+            while True:
+                await self.respect_rate_limit(host)
+                if self.request_cancelled(url, cancel_token):
+                    return None
+
+                timeout = self.timeout
+                remaining = cancel_token.remaining() if cancel_token is not None else None
+                if remaining is not None:
+                    timeout = min(timeout, remaining)
+
+                self.stats['requests_made'] += 1
+                error = None
+                try:
+                    client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=self.connect_timeout,
+                                                           sock_read=self.read_timeout)
+                    async with session.request(method, url, timeout=client_timeout, **kwargs) as response:
+                        throttled = self.rate_limiter.record_response(host, response.status, response.headers)
+                        if throttled:
+                            self.stats['throttled_requests'] += 1
+                        if response.status in RETRY_STATUSES:
+                            error = f"HTTP {response.status}"
+                        elif response.status >= 400:
+                            self.stats['failed_requests'] += 1
+                            self.logger.error(f"Request failed for {url}: HTTP {response.status}")
+                            return None
+                        else:
+                            page = FetchedPage(str(response.url), response.status, CIMultiDict(response.headers),
+                                               await self.read_body(url, response), response.charset)
+                            self.stats['successful_requests'] += 1
+                            self.logger.debug("Successful request to %s", url)
+                            return page
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    throttled = False
+                    error = str(e) or type(e).__name__
+
+                attempt += 1
+                if attempt > self.retries:
+                    self.stats['failed_requests'] += 1
+                    self.logger.error(f"Request failed for {url}: {error}")
+                    return None
+
+                self.stats['retries'] += 1
+                self.logger.debug("Retrying %s (%s), attempt %d of %d", url, error, attempt, self.retries)
+                if not throttled:
+                    await asyncio.sleep(self.backoff(attempt))
+
+    # Scraping
+
+    @abstractmethod
+    async def scrape_data(self, target: str, **kwargs) -> Dict[str, Any]:
+        """
+        Scrape data from the target.
+        Must be implemented by each scraper type.
+        """
+        pass
+
+    @abstractmethod
+    def parse_response(self, response: FetchedPage, **kwargs) -> Dict[str, Any]:
+        """
+        Parse a fetched page.
+        Must be implemented by each scraper type.
+        """
+        pass
+
+    async def parse_page(self, page: FetchedPage, **kwargs) -> Dict[str, Any]:
+        """Run parse_response off the event loop"""
+        if self._parse_executor is None:
+            self._parse_executor = ThreadPoolExecutor(max_workers=self.parse_workers,
+                                                      thread_name_prefix=f"{self.name}-parse")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_executor,
+                                          functools.partial(self.parse_response, page, **kwargs))
+
+    async def scrape_many(self, targets: Iterable[str], **kwargs) -> List[Dict[str, Any]]:
+        """Scrape every target concurrently; results are in input order"""
+        await self.open()
+
+        async def scrape(target: str) -> Dict[str, Any]:
+            try:
+                return await self.scrape_data(target, **kwargs)
+            except Exception as e:
+                self.logger.error(f"Error scraping {target}: {str(e)}")
+                return {'status': 'error', 'error': str(e)}
+
+        return await asyncio.gather(*(scrape(target) for target in targets))
+
+    def run(self, targets: Iterable[str], **kwargs) -> List[Dict[str, Any]]:
+        """Blocking entry point: scrape targets on a fresh event loop and close the session"""
+        async def crawl():
+            try:
+                return await self.scrape_many(targets, **kwargs)
+            finally:
+                await self.close()
+
+        return asyncio.run(crawl())
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get scraper statistics"""
+        current_stats = self.stats.copy()
+        current_stats['success_rate'] = (
+            self.stats['successful_requests'] / max(self.stats['requests_made'], 1)
+        ) * 100
+        current_stats['current_time'] = datetime.utcnow().isoformat()
+        return current_stats
+
+    def reset_statistics(self):
+        self.stats = self._empty_stats()
+        self.logger.info("Statistics reset")
+
+
+class AsyncAmazonScraper(AmazonPageParser, AsyncBaseScraper):
+    """Concurrent scraper for Amazon product data"""
+
+    def __init__(self, parser: str = 'soup', **kwargs):
+        if parser not in self.PARSERS:
+            raise ValueError(f"Unknown parser: {parser}")
+        self.parser = parser
+
+        kwargs.setdefault('base_delay', 2.0)
+        kwargs.setdefault('per_host_limit', 4)
+        super().__init__("AsyncAmazon", headers=AMAZON_HEADERS, **kwargs)
+
+    async def scrape_data(self, product_url: str, **kwargs) -> Dict[str, Any]:
+        """Scrape Amazon product data"""
+        response = await self.make_request(product_url)
+
+        if not response:
+            return {'error': 'Failed to fetch product page'}
+
+        return await self.parse_page(response, **kwargs)
@@ -1,23 +1,116 @@
 import time
-import random
 import logging
+import socket
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from urllib.parse import urlsplit
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from infrastructure.cancellation import current_token
+from scrapers.rate_limiter import HostRateLimiter, THROTTLE_STATUSES
+from scrapers.http_cache import HttpCache
+from scrapers.fingerprints import FingerprintStore, fingerprint
+from scrapers.streaming import (
+    BodyReader, capped_timeout, CHUNK_SIZE, DEFAULT_MAX_BYTES, DEFAULT_TIMEOUT, DEFAULT_DOWNLOAD_TIMEOUT
+)
 
-class BaseScraper(ABC):
+# Browser-like headers shared by the blocking and async scrapers
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+AMAZON_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Statuses retried by both the blocking and async scrapers
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def default_rate_limiter(base_delay: float, max_delay: float) -> HostRateLimiter:
+    """Per-host limiter allowing one request per base_delay, never slower than one per max_delay"""
+    return HostRateLimiter(
+        default_rate=1.0 / base_delay if base_delay > 0 else None,
+        min_rate=1.0 / max(max_delay, base_delay) if max_delay > 0 else 0.05
+    )
+
+class ExtractionHelpers:
+    """Null-safe extraction helpers shared by every scraper"""
+    
+    def extract_text_safely(self, element, default: str = "") -> str:
+        """Safely extract text from a BeautifulSoup element"""
+        try:
+            return element.get_text(strip=True) if element else default
+        except Exception:
+            return default
+    
+    def extract_attribute_safely(self, element, attribute: str, default: str = "") -> str:
+        """Safely extract an attribute from a BeautifulSoup element"""
+        try:
+            return element.get(attribute, default) if element else default
+        except Exception:
+            return default
+    
+    def clean_price(self, price_text: str) -> Optional[float]:
+        """Clean and extract price from text"""
+        if not price_text:
+            return None
+        
+        try:
+            # Remove common currency symbols and text
+            import re
+            cleaned = re.sub(r'[^\d.,]', '', price_text)
+            cleaned = cleaned.replace(',', '')
+            
+            if cleaned:
+                return float(cleaned)
+        except (ValueError, AttributeError):
+            pass
+        
+        return None
+    
+    def validate_data(self, data: Dict[str, Any], required_fields: List[str]) -> bool:
+        """Validate that scraped data contains required fields"""
+        for field in required_fields:
+            if field not in data or not data[field]:
+                self.logger.warning(f"Missing required field: {field}")
+                return False
+        return True
+
+class BaseScraper(ExtractionHelpers, ABC):
     """
     Base class for all web scrapers.
     Provides common functionality for respectful web scraping.
     """
     
-    def __init__(self, name: str, base_delay: float = 1.0, max_delay: float = 5.0):
+    # Markup markers bounding the region whose fingerprint decides if a page changed (whole page if empty)
+    REGION_START_MARKERS = ()
+    REGION_END_MARKERS = ()
+    
+    def __init__(self, name: str, base_delay: float = 1.0, max_delay: float = 5.0,
+                 rate_limiter: Optional[HostRateLimiter] = None, throttle_retries: int = 3,
+                 http_cache: Optional[HttpCache] = None, fingerprints: Optional[FingerprintStore] = None,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES, timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 download_timeout: Optional[float] = DEFAULT_DOWNLOAD_TIMEOUT, stop_after_region: bool = True):
         self.name = name
         self.base_delay = base_delay
         self.max_delay = max_delay
+        self.throttle_retries = throttle_retries
+        
+        # Bodies are streamed: at most max_bytes are kept, (connect, read) timeouts apply per request and
+        # download_timeout to the whole body; with stop_after_region, reading stops once the region is complete
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.download_timeout = download_timeout
+        self.stop_after_region = stop_after_region
         
         # Set up logging
         self.logger = logging.getLogger(f"Scraper.{name}")
@@ -26,15 +119,33 @@ class BaseScraper(ABC):
         self.session = requests.Session()
         self.setup_session()
         
-        # Rate limiting
+        # Rate limiting: one request per base_delay per host, slowing down to one per max_delay when throttled.
+        # Pass a shared limiter to have several scrapers respect the same per-host budgets.
+        self.rate_limiter = rate_limiter or default_rate_limiter(base_delay, max_delay)
         self.last_request_time = 0
         self.request_count = 0
         
+        # Optional conditional-request cache; unchanged pages cost a 304 and reuse their stored parse
+        self.http_cache = http_cache
+        
+        # Optional content fingerprints; pages whose body or product region is unchanged are not re-parsed
+        self.fingerprints = fingerprints
+        
         # Statistics
         self.stats = {
             'requests_made': 0,
             'successful_requests': 0,
             'failed_requests': 0,
+            'cancelled_requests': 0,
+            'throttled_requests': 0,
+            'cache_hits': 0,
+            'not_modified': 0,
+            'parses_skipped': 0,
+            'unchanged_skipped': 0,
+            'truncated_downloads': 0,
+            'aborted_downloads': 0,
+            'early_terminated_downloads': 0,
+            'bytes_downloaded': 0,
             'data_points_collected': 0,
             'start_time': datetime.utcnow().isoformat()
         }
@@ -43,11 +154,11 @@ class BaseScraper(ABC):
     
     def setup_session(self):
         """Set up the requests session with proper configuration"""
-        # Retry strategy
+        # Retry strategy; throttling statuses are retried by make_request through the rate limiter
         retry_strategy = Retry(
             total=3,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=[status for status in RETRY_STATUSES if status not in THROTTLE_STATUSES],
         )
         
         adapter = HTTPAdapter(max_retries=retry_strategy)
@@ -55,14 +166,7 @@ class BaseScraper(ABC):
         self.session.mount("https://", adapter)
         
         # Set reasonable headers
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
     
     @abstractmethod
     def scrape_data(self, target: str, **kwargs) -> Dict[str, Any]:
@@ -81,83 +185,215 @@ class BaseScraper(ABC):
         pass
     
     def make_request(self, url: str, method: str = 'GET', **kwargs) -> Optional[requests.Response]:
-        """Make a rate-limited request"""
-        # Implement rate limiting
-        self.respect_rate_limit()
+        """
+        Make a rate-limited request.
+        Honors the cancellation token of the running task (or an explicit cancel_token
+        kwarg): cancelled or expired work is dropped, and the timeout never outlives the deadline.
+        """
+        cancel_token = kwargs.pop('cancel_token', None) or current_token()
+        if self.request_cancelled(url, cancel_token):
+            return None
         
-        try:
-            self.stats['requests_made'] += 1
-            
-            response = self.session.request(method, url, **kwargs)
-            response.raise_for_status()
+        cache_entry = None
+        if self.http_cache is not None and method.upper() == 'GET':
+            cache_entry = self.http_cache.lookup(url)
+            if cache_entry is not None:
+                if self.http_cache.is_fresh(cache_entry):
+                    self.http_cache.touch(cache_entry)
+                    self.stats['cache_hits'] += 1
+                    return self.http_cache.to_response(cache_entry)
+                kwargs['headers'] = {**cache_entry.validators(), **(kwargs.get('headers') or {})}
+        
+        host = urlsplit(url).netloc
+        throttled = 0
+        requested_timeout = kwargs.get('timeout', self.timeout)
+        kwargs['stream'] = True
+        
+        while True:
+            # Implement rate limiting
+            self.respect_rate_limit(host)
             
-            self.stats['successful_requests'] += 1
-            self.logger.debug(f"Successful request to {url}")
+            # The deadline may have passed while waiting for the rate limiter
+            if self.request_cancelled(url, cancel_token):
+                return None
             
-            return response
+            remaining = cancel_token.remaining() if cancel_token is not None else None
+            kwargs['timeout'] = capped_timeout(requested_timeout, remaining)
             
-        except requests.exceptions.RequestException as e:
-            self.stats['failed_requests'] += 1
-            self.logger.error(f"Request failed for {url}: {str(e)}")
-            return None
+            response = None
+            try:
+                self.stats['requests_made'] += 1
+                
+                response = self.session.request(method, url, **kwargs)
+                
+                # 429/503 slow this host down; retry once the limiter lets us through again
+                if self.rate_limiter.record_response(host, response.status_code, response.headers):
+                    self.stats['throttled_requests'] += 1
+                    if throttled < self.throttle_retries:
+                        throttled += 1
+                        response.close()
+                        continue
+                
+                if cache_entry is not None and response.status_code == 304:
+                    self.read_body(url, response, remaining)
+                    self.http_cache.touch(cache_entry, revalidated=True)
+                    self.stats['successful_requests'] += 1
+                    self.stats['not_modified'] += 1
+                    self.logger.debug("Not modified: %s", url)
+                    return self.http_cache.to_response(cache_entry)
+                
+                response.raise_for_status()
+                
+                if not self.read_body(url, response, remaining):
+                    return None
+                
+                self.stats['successful_requests'] += 1
+                self.logger.debug("Successful request to %s", url)
+                
+                # Truncated or otherwise partial bodies would be served as the page later
+                if self.http_cache is not None and method.upper() == 'GET' and getattr(response, 'complete', True):
+                    self.http_cache.store(url, response)
+                
+                return response
+                
+            except requests.exceptions.RequestException as e:
+                if response is not None:
+                    response.close()
+                self.stats['failed_requests'] += 1
+                self.logger.error(f"Request failed for {url}: {str(e)}")
+                return None
     
-    def respect_rate_limit(self):
-        """Implement respectful rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        # Calculate delay with some randomization
-        delay = self.base_delay + random.uniform(0, self.max_delay - self.base_delay)
-        
-        # If we haven't waited long enough, sleep
-        if time_since_last < delay:
-            sleep_time = delay - time_since_last
-            self.logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
-        self.request_count += 1
+    def body_reader(self, url: str) -> BodyReader:
+        """
+        Early-termination hook: the reader deciding when a streamed body has been
+        read far enough. By default reading stops at max_bytes or, with
+        stop_after_region, once the REGION markers show the region is complete.
+        """
+        if self.stop_after_region:
+            return BodyReader(self.max_bytes, self.REGION_START_MARKERS, self.REGION_END_MARKERS)
+        return BodyReader(self.max_bytes)
     
-    def extract_text_safely(self, element, default: str = "") -> str:
-        """Safely extract text from a BeautifulSoup element"""
+    def read_body(self, url: str, response: requests.Response, remaining: Optional[float] = None) -> bool:
+        """
+        Read a streamed response body in chunks through body_reader, never holding
+        more than max_bytes. The connection is closed rather than drained when
+        reading stops early. A watchdog shuts the socket down once the body has
+        taken longer than download_timeout (or the task's deadline), since a
+        trickling server can keep every single read under the read timeout;
+        such downloads are counted as aborted and return False.
+        """
+        if getattr(response, 'raw', None) is None:
+            # Already in memory (replayed or cached responses)
+            return True
+        
+        reader = self.body_reader(url)
+        expired = threading.Event()
+        deadline = min((limit for limit in (self.download_timeout, remaining) if limit is not None), default=None)
+        watchdog = None
+        if deadline is not None:
+            watchdog = threading.Timer(deadline, self._expire_download, args=(response, expired))
+            watchdog.daemon = True
+            watchdog.start()
+        exhausted = False
         try:
-            return element.get_text(strip=True) if element else default
-        except Exception:
-            return default
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if reader.feed(chunk) or expired.is_set():
+                    break
+            else:
+                exhausted = True
+        except requests.exceptions.RequestException:
+            if not expired.is_set():
+                raise
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            response.close()
+        
+        if expired.is_set():
+            self.stats['aborted_downloads'] += 1
+            self.stats['failed_requests'] += 1
+            self.logger.error(f"Download of {url} aborted after {deadline:.1f}s ({len(reader.body)} bytes read)")
+            return False
+        
+        self.stats['bytes_downloaded'] += len(reader.body)
+        if reader.truncated:
+            self.stats['truncated_downloads'] += 1
+            self.logger.warning(f"Response from {url} truncated at {self.max_bytes} bytes")
+        elif reader.stopped_early:
+            self.stats['early_terminated_downloads'] += 1
+        
+        response._content = reader.content()
+        response._content_consumed = True
+        response.truncated = reader.truncated
+        # Complete: the whole body, or everything up to a finished product region
+        response.complete = not reader.truncated and (exhausted or reader.region_complete)
+        return True
     
-    def extract_attribute_safely(self, element, attribute: str, default: str = "") -> str:
-        """Safely extract an attribute from a BeautifulSoup element"""
-        try:
-            return element.get(attribute, default) if element else default
-        except Exception:
-            return default
+    @staticmethod
+    def _expire_download(response: requests.Response, expired: threading.Event):
+        """Watchdog callback: unblock a read stuck on a slow body by shutting its socket down"""
+        expired.set()
+        sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+        if sock is None:
+            # Close-delimited bodies: http.client has detached the socket; it sits under the body file
+            body_file = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+            sock = getattr(getattr(body_file, 'raw', None), '_sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
     
-    def clean_price(self, price_text: str) -> Optional[float]:
-        """Clean and extract price from text"""
-        if not price_text:
+    def scrape_page(self, url: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """
+        Fetch and parse a page. A page served from the HTTP cache (fresh or
+        revalidated with a 304), or whose content fingerprint matches the last
+        parse, returns the stored parse flagged 'unchanged' instead of being
+        parsed again; downstream writers skip unchanged results.
+        """
+        response = self.make_request(url)
+        if not response:
             return None
         
-        try:
-            # Remove common currency symbols and text
-            import re
-            cleaned = re.sub(r'[^\\d.,]', '', price_text)
-            cleaned = cleaned.replace(',', '')
-            
-            if cleaned:
-                return float(cleaned)
-        except (ValueError, AttributeError):
-            pass
-        
-        return None
+        cache_entry = getattr(response, 'cache_entry', None)
+        if cache_entry is not None:
+            parsed = self.http_cache.parsed(cache_entry)
+            if parsed is not None:
+                self.stats['parses_skipped'] += 1
+                return {**parsed, 'unchanged': True}
+        
+        page_fingerprint = None
+        if self.fingerprints is not None:
+            page_fingerprint = fingerprint(response.content, self.REGION_START_MARKERS, self.REGION_END_MARKERS)
+            previous = self.fingerprints.unchanged(url, *page_fingerprint)
+            if previous is not None:
+                self.stats['unchanged_skipped'] += 1
+                return {**previous, 'unchanged': True}
+        
+        result = self.parse_response(response, **kwargs)
+        if result.get('status') == 'success':
+            if self.http_cache is not None:
+                self.http_cache.store_parsed(url, result)
+            if page_fingerprint is not None:
+                self.fingerprints.remember(url, *page_fingerprint, result)
+        return result
     
-    def validate_data(self, data: Dict[str, Any], required_fields: List[str]) -> bool:
-        """Validate that scraped data contains required fields"""
-        for field in required_fields:
-            if field not in data or not data[field]:
-                self.logger.warning(f"Missing required field: {field}")
-                return False
+    def request_cancelled(self, url: str, cancel_token) -> bool:
+        """Check whether a request should be dropped because its task was cancelled"""
+        if cancel_token is None or not cancel_token.is_cancelled:
+            return False
+        
+        self.stats['cancelled_requests'] += 1
+        self.logger.debug("Skipping request to %s: task cancelled or past its deadline", url)
         return True
     
+    def respect_rate_limit(self, host: str = ''):
+        """Wait for the host's token bucket to allow another request"""
+        self.rate_limiter.acquire(host)
+        
+        self.last_request_time = time.time()
+        self.request_count += 1
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get scraper statistics"""
         current_stats = self.stats.copy()
@@ -174,6 +410,16 @@ class BaseScraper(ABC):
             'requests_made': 0,
             'successful_requests': 0,
             'failed_requests': 0,
+            'cancelled_requests': 0,
+            'throttled_requests': 0,
+            'cache_hits': 0,
+            'not_modified': 0,
+            'parses_skipped': 0,
+            'unchanged_skipped': 0,
+            'truncated_downloads': 0,
+            'aborted_downloads': 0,
+            'early_terminated_downloads': 0,
+            'bytes_downloaded': 0,
             'data_points_collected': 0,
             'start_time': datetime.utcnow().isoformat()
         }
@@ -191,32 +437,36 @@ class BaseScraper(ABC):
         final_stats = self.get_statistics()
         self.logger.info(f"Final statistics: {final_stats}")
 
-class AmazonScraper(BaseScraper):
-    """Scraper for Amazon product data"""
+class AmazonPageParser(ExtractionHelpers):
+    """
+    Amazon product page extraction, shared by the blocking and async scrapers.
+    Works on any response object exposing the body as .content.
     
-    def __init__(self):
-        super().__init__("Amazon", base_delay=2.0, max_delay=5.0)
-        
-        # Amazon-specific headers
-        self.session.headers.update({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-        })
+    parser selects the tree the extractors run on: 'soup' (BeautifulSoup with
+    html.parser) or 'fast' (lxml with compiled XPath selectors, skipping script
+    and style regions; see scrapers.fast_parser). Both give the same results.
+    """
     
-    def scrape_data(self, product_url: str, **kwargs) -> Dict[str, Any]:
-        """Scrape Amazon product data"""
-        response = self.make_request(product_url)
-        
-        if not response:
-            return {'error': 'Failed to fetch product page'}
-        
-        return self.parse_response(response, **kwargs)
+    PARSERS = ('soup', 'fast')
+    parser = 'soup'
     
-    def parse_response(self, response: requests.Response, **kwargs) -> Dict[str, Any]:
+    # The product block: everything from the main container up to reviews and recommendations
+    REGION_START_MARKERS = ('id="dp-container"', 'id="dp"', 'id="ppd"', 'id="centerCol"')
+    REGION_END_MARKERS = ('id="customerReviews"', 'id="reviewsMedley"', 'class="a-carousel-container"', 'id="navFooter"')
+    
+    def parse_document(self, response):
+        """Parse the page body into a tree supporting select_one/select"""
+        if self.parser == 'fast':
+            from scrapers.fast_parser import FastDocument, header_charset
+            return FastDocument(response.content, header_charset(getattr(response, 'headers', None)))
+        
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(response.content, 'html.parser')
+    
+    def parse_response(self, response, **kwargs) -> Dict[str, Any]:
         """Parse Amazon product page"""
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.parse_document(response)
             
             # Extract product information
             product_data = {
@@ -283,7 +533,7 @@ class AmazonScraper(BaseScraper):
             try:
                 # Extract rating from text like "4.5 out of 5 stars"
                 import re
-                match = re.search(r'(\\d+\\.\\d+)', rating_text)
+                match = re.search(r'(\d+\.\d+)', rating_text)
                 if match:
                     return float(match.group(1))
             except (ValueError, AttributeError):
@@ -305,7 +555,7 @@ class AmazonScraper(BaseScraper):
                 try:
                     # Extract number from text like "1,234 ratings"
                     import re
-                    match = re.search(r'([\\d,]+)', review_text)
+                    match = re.search(r'(\d[\d,]*)', review_text)
                     if match:
                         return int(match.group(1).replace(',', ''))
                 except (ValueError, AttributeError):
@@ -365,4 +615,28 @@ class AmazonScraper(BaseScraper):
                 if description:
                     return description[:1000]  # Limit description length
         
-        return ""
\ No newline at end of file
+        return ""
+
+class AmazonScraper(AmazonPageParser, BaseScraper):
+    """Scraper for Amazon product data"""
+    
+    def __init__(self, parser: str = 'soup', **kwargs):
+        if parser not in self.PARSERS:
+            raise ValueError(f"Unknown parser: {parser}")
+        self.parser = parser
+        
+        kwargs.setdefault('base_delay', 2.0)
+        kwargs.setdefault('max_delay', 5.0)
+        super().__init__("Amazon", **kwargs)
+        
+        # Amazon-specific headers
+        self.session.headers.update(AMAZON_HEADERS)
+    
+    def scrape_data(self, product_url: str, **kwargs) -> Dict[str, Any]:
+        """Scrape Amazon product data"""
+        result = self.scrape_page(product_url, **kwargs)
+        
+        if not result:
+            return {'error': 'Failed to fetch product page'}
+        
+        return result
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Compare AmazonScraper parsers on saved product pages.
+
+Parses every fixture page with each parser, reports per-page parse times and
+checks every parser's output against fixtures/expected.json.
+
+    python core/scrapers/benchmark_parsers.py [--repeat N] [page.html ...]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Allow running as a script from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.base_scraper import AmazonScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class SavedPage:
+    """A saved page standing in for a response"""
+
+    def __init__(self, path: str):
+        self.url = path
+        self.headers = {'Content-Type': 'text/html'}
+        with open(path, 'rb') as handle:
+            self.content = handle.read()
+
+
+def benchmark(pages, parser: str, repeat: int) -> dict:
+    scraper = AmazonScraper(parser=parser, base_delay=0, max_delay=0)
+    timings, results = [], {}
+    for page in pages:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = scraper.parse_response(page)
+            timings.append(time.perf_counter() - started)
+        data = dict(result.get('data') or {})
+        data.pop('scraped_at', None)
+        results[os.path.basename(page.url)] = data
+    scraper.shutdown()
+    return {'timings': timings, 'results': results}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('pages', nargs='*', help='saved product pages (defaults to the fixtures)')
+    arg_parser.add_argument('--repeat', type=int, default=20, help='parses per page and parser')
+    args = arg_parser.parse_args()
+
+    paths = args.pages or sorted(
+        os.path.join(FIXTURES_DIR, name) for name in os.listdir(FIXTURES_DIR) if name.endswith('.html')
+    )
+    pages = [SavedPage(path) for path in paths]
+    with open(os.path.join(FIXTURES_DIR, 'expected.json')) as handle:
+        expected = json.load(handle)
+
+    total_kb = sum(len(page.content) for page in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB, {args.repeat} parses each")
+
+    baseline = None
+    for parser in AmazonScraper.PARSERS:
+        run = benchmark(pages, parser, args.repeat)
+        timings = sorted(run['timings'])
+        mean = statistics.mean(timings)
+        checked = [name for name in run['results'] if name in expected]
+        correct = sum(run['results'][name] == expected[name] for name in checked)
+        speedup = f", {baseline / mean:.1f}x" if baseline else ''
+        baseline = baseline or mean
+        print(f"{parser:>5}: mean {mean * 1000:.2f} ms/page, p95 {timings[int(0.95 * (len(timings) - 1))] * 1000:.2f} ms"
+              f"{speedup}; matches expected {correct}/{len(checked)}")
+
+
+if __name__ == '__main__':
+    main()
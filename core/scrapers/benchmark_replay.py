@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Replay a corpus of saved Amazon pages through AmazonScraper, offline.
+
+The corpus is a cassette directory (recorded with --record, or built from
+saved .html pages with --import). Every recorded page is scraped end to end
+(transport, rate limiter, parser) and the run reports pages/sec, the parse
+time distribution and, when expected.json is given, extraction accuracy.
+
+    python core/scrapers/benchmark_replay.py --import core/scrapers/fixtures corpus/
+    python core/scrapers/benchmark_replay.py corpus/ --expected core/scrapers/fixtures/expected.json
+    python core/scrapers/benchmark_replay.py --record urls.txt corpus/
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Allow running as a script from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.base_scraper import AmazonScraper
+from scrapers.cassette import Cassette, use_cassette
+
+CORPUS_URL = 'https://www.amazon.com/corpus/{name}'
+EXTRACTED_FIELDS = ('title', 'price', 'rating', 'review_count', 'availability', 'images', 'description')
+
+
+def import_pages(directory: str, cassette_dir: str) -> int:
+    """Add every saved .html page as a recorded 200 response at CORPUS_URL"""
+    cassette = Cassette(cassette_dir)
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.html'))
+    for name in names:
+        with open(os.path.join(directory, name), 'rb') as handle:
+            cassette.add('GET', CORPUS_URL.format(name=name), 200, {'Content-Type': 'text/html; charset=utf-8'},
+                         handle.read())
+    return len(names)
+
+
+def record(urls_file: str, cassette_dir: str) -> int:
+    """Fetch live URLs once (rate limited) and record them"""
+    with open(urls_file) as handle:
+        urls = [line.strip() for line in handle if line.strip() and not line.startswith('#')]
+    scraper = AmazonScraper()
+    use_cassette(scraper.session, cassette_dir, mode='record')
+    recorded = sum(scraper.make_request(url) is not None for url in urls)
+    scraper.shutdown()
+    return recorded
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def run(cassette_dir: str, parser: str, repeat: int, expected: dict) -> dict:
+    scraper = AmazonScraper(parser=parser, base_delay=0, max_delay=0)
+    adapter = use_cassette(scraper.session, cassette_dir, mode='replay')
+    urls = adapter.cassette.urls()
+
+    parse_times = []
+    original_parse = scraper.parse_response
+
+    def timed_parse(response, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_parse(response, **kwargs)
+        finally:
+            parse_times.append(time.perf_counter() - started)
+
+    scraper.parse_response = timed_parse
+
+    results = {}
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for url in urls:
+            results[url] = scraper.scrape_data(url)
+    elapsed = time.perf_counter() - started
+    scraper.shutdown()
+
+    fields_checked = fields_correct = pages_correct = pages_checked = 0
+    for url, result in results.items():
+        wanted = expected.get(url.rsplit('/', 1)[-1])
+        if wanted is None:
+            continue
+        data = result.get('data') or {}
+        matches = [data.get(field) == wanted.get(field) for field in EXTRACTED_FIELDS]
+        fields_checked += len(matches)
+        fields_correct += sum(matches)
+        pages_checked += 1
+        pages_correct += all(matches)
+
+    ordered = sorted(parse_times)
+    return {
+        'pages': len(urls) * repeat,
+        'pages_per_second': len(urls) * repeat / elapsed if elapsed else 0.0,
+        'succeeded': sum(result.get('status') == 'success' for result in results.values()),
+        'parse_ms': {
+            'mean': statistics.mean(ordered) * 1000 if ordered else 0.0,
+            'p50': percentile(ordered, 0.50) * 1000,
+            'p90': percentile(ordered, 0.90) * 1000,
+            'p99': percentile(ordered, 0.99) * 1000,
+            'max': (ordered[-1] if ordered else 0.0) * 1000
+        },
+        'accuracy': {
+            'fields': fields_correct / fields_checked if fields_checked else None,
+            'pages': f"{pages_correct}/{pages_checked}"
+        }
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('cassette', help='cassette directory holding the corpus')
+    arg_parser.add_argument('--import', dest='import_dir', help='add saved .html pages from this directory')
+    arg_parser.add_argument('--record', dest='urls_file', help='record live pages listed in this file first')
+    arg_parser.add_argument('--expected', help='JSON of expected fields per page name')
+    arg_parser.add_argument('--parser', choices=AmazonScraper.PARSERS + ('all',), default='all')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='passes over the corpus')
+    args = arg_parser.parse_args()
+
+    if args.import_dir:
+        print(f"Imported {import_pages(args.import_dir, args.cassette)} pages")
+    if args.urls_file:
+        print(f"Recorded {record(args.urls_file, args.cassette)} pages")
+
+    expected = {}
+    if args.expected:
+        with open(args.expected) as handle:
+            expected = json.load(handle)
+
+    parsers = AmazonScraper.PARSERS if args.parser == 'all' else (args.parser,)
+    for parser in parsers:
+        report = run(args.cassette, parser, args.repeat, expected)
+        parse_ms = report['parse_ms']
+        accuracy = report['accuracy']
+        field_accuracy = f"{accuracy['fields'] * 100:.1f}%" if accuracy['fields'] is not None else 'n/a'
+        print(f"{parser:>5}: {report['pages']} pages, {report['pages_per_second']:.1f} pages/s, "
+              f"{report['succeeded']} distinct pages parsed")
+        print(f"       parse ms mean {parse_ms['mean']:.2f} p50 {parse_ms['p50']:.2f} p90 {parse_ms['p90']:.2f} "
+              f"p99 {parse_ms['p99']:.2f} max {parse_ms['max']:.2f}")
+        print(f"       accuracy: fields {field_accuracy}, pages {accuracy['pages']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Any, Optional, List
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+MODES = ('record', 'replay', 'auto')
+
+# Recorded response headers (hop-by-hop and per-request headers are dropped)
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Retry-After', 'Location')
+
+
+class Cassette:
+    """
+    Recorded HTTP exchanges on disk: index.json maps 'METHOD URL' to the status,
+    headers and body file of the recorded response; bodies are stored as-is,
+    one file each.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._index_path = os.path.join(path, 'index.json')
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as handle:
+                self.entries = json.load(handle)
+
+    @staticmethod
+    def make_key(method: str, url: str) -> str:
+        return f"{method.upper()} {url}"
+
+    def urls(self, method: str = 'GET') -> List[str]:
+        prefix = f"{method.upper()} "
+        return [key[len(prefix):] for key in self.entries if key.startswith(prefix)]
+
+    def lookup(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(self.make_key(method, url))
+        if entry is None:
+            return None
+        with open(os.path.join(self.path, entry['body']), 'rb') as handle:
+            return {**entry, 'content': handle.read()}
+
+    def add(self, method: str, url: str, status: int, headers: Dict[str, str], content: bytes,
+            reason: str = 'OK'):
+        key = self.make_key(method, url)
+        body = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.body'
+        with open(os.path.join(self.path, body), 'wb') as handle:
+            handle.write(content)
+        with self._lock:
+            self.entries[key] = {
+                'status': status,
+                'reason': reason,
+                'headers': {name: headers[name] for name in RECORDED_HEADERS if headers.get(name)},
+                'body': body
+            }
+            self._save()
+
+    def _save(self):
+        temporary = self._index_path + '.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.entries, handle, indent=1, sort_keys=True)
+        os.replace(temporary, self._index_path)
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    requests transport adapter that replays recorded responses and, in record
+    or auto mode, records live ones through the adapter it wraps.
+
+    replay: only recorded responses; anything else fails like a connection error
+    record: always hits the network and (re-)records
+    auto:   replays what is recorded, records the rest
+    """
+
+    def __init__(self, cassette: Cassette, mode: str = 'replay', wrapped: Optional[BaseAdapter] = None):
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.wrapped = wrapped or HTTPAdapter()
+        self.logger = logging.getLogger('CassetteAdapter')
+        self.stats = {'replayed': 0, 'recorded': 0, 'missed': 0}
+
+    def send(self, request, **kwargs) -> requests.Response:
+        if self.mode != 'record':
+            recorded = self.cassette.lookup(request.method, request.url)
+            if recorded is not None:
+                self.stats['replayed'] += 1
+                return self._build_response(request, recorded)
+            if self.mode == 'replay':
+                self.stats['missed'] += 1
+                raise requests.exceptions.ConnectionError(f"No recorded response for {request.method} {request.url}",
+                                                          request=request)
+
+        response = self.wrapped.send(request, **kwargs)
+        self.cassette.add(request.method, request.url, response.status_code, response.headers,
+                          response.content, response.reason or '')
+        self.stats['recorded'] += 1
+        return response
+
+    def _build_response(self, request, recorded: Dict[str, Any]) -> requests.Response:
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('reason', '')
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response._content = recorded['content']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.wrapped.close()
+
+
+def use_cassette(session: requests.Session, path: str, mode: str = 'replay') -> CassetteAdapter:
+    """Route a session's http(s) traffic through a cassette, keeping its adapters for recording"""
+    adapter = CassetteAdapter(Cassette(path), mode, wrapped=session.get_adapter('https://'))
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, adapter)
+    return adapter
@@ -0,0 +1,280 @@
+import hashlib
+import logging
+import math
+import os
+import posixpath
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Iterable, Iterator, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = frozenset([
+    'ref', 'ref_', 'tag', 'psc', 'qid', 'sr', 'th', 'crid', 'sprefix', 'keywords', 'linkcode', 'linkid',
+    'camp', 'creative', 'creativeasin', 'ascsubtag', 'content-id', '_encoding', 'dchild', 'fbclid', 'gclid'
+])
+TRACKING_PREFIXES = ('utm_', 'pf_rd_', 'pd_rd_')
+
+# Amazon product pages have many URL shapes; the ASIN identifies the page
+_AMAZON_PRODUCT = re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/asin)/([A-Z0-9]{10})(?:[/?]|$)', re.IGNORECASE)
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form used for dedup: lowercase scheme and host, no default port,
+    fragment, tracking parameters or dot segments, sorted query, and Amazon
+    product URLs reduced to /dp/<ASIN>.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'http'
+    host = (parts.hostname or '').lower().rstrip('.')
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = posixpath.normpath(parts.path) if parts.path not in ('', '/') else '/'
+    if path.startswith('//'):
+        path = '/' + path.lstrip('/')
+    if parts.path.endswith('/') and path != '/':
+        path += '/'
+
+    if 'amazon.' in host:
+        product = _AMAZON_PRODUCT.search(path)
+        if product:
+            return urlunsplit((scheme, host, f"/dp/{product.group(1).upper()}", '', ''))
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings (double hashing on one blake2b digest).
+    A negative answer is definite; a positive one needs an exact check.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class CrawlFrontier:
+    """
+    Persistent crawl frontier deciding what to fetch next.
+
+    Every URL is canonicalized and checked against a Bloom filter, then against
+    the exact sqlite store, so duplicates are dropped cheaply and the store
+    holds each page once (up to max_urls). URLs are leased in batches from
+    the store, ordered by priority and then by how overdue they are (the oldest
+    recrawls first), into per-host queues. next_batch() round-robins over hosts
+    and caps in-flight requests per host, so one big host cannot starve the rest.
+
+    Fetched pages come back due after recrawl_after seconds. Failures are
+    retried with exponential backoff until max_failures. State lives in sqlite,
+    so a restarted crawl resumes where it stopped; leases that were in flight
+    are released on startup.
+    """
+
+    def __init__(self, db_path: str, recrawl_after: float = 24 * 3600, max_urls: int = 1_000_000,
+                 max_in_flight_per_host: int = 2, retry_delay: float = 300, max_failures: int = 3,
+                 lease_batch: int = 500, clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.recrawl_after = recrawl_after
+        self.max_urls = max_urls
+        self.max_in_flight_per_host = max_in_flight_per_host
+        self.retry_delay = retry_delay
+        self.max_failures = max_failures
+        self.lease_batch = lease_batch
+        self.clock = clock
+
+        self.logger = logging.getLogger('CrawlFrontier')
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY, host TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0,
+                depth INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT 'queued',
+                next_fetch_at REAL NOT NULL, last_fetched_at REAL, fetch_count INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0, discovered_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS frontier_due ON frontier (status, priority, next_fetch_at)")
+
+        # Resume: anything leased by a previous run goes back to the queue
+        self._db.execute("UPDATE frontier SET status = 'queued' WHERE status = 'leased'")
+        self._db.commit()
+
+        self.seen = BloomFilter(capacity=max(max_urls, 1000))
+        self.size = 0
+        for (url,) in self._db.execute("SELECT url FROM frontier"):
+            self.seen.add(url)
+            self.size += 1
+
+        self.host_queues: Dict[str, deque] = {}
+        self.in_flight: Dict[str, int] = {}
+        self._next_host = 0
+        self.stats = {'added': 0, 'duplicates': 0, 'rejected_full': 0, 'leased': 0, 'completed': 0, 'failed': 0}
+
+    # Discovery
+
+    def add(self, url: str, priority: int = 0, depth: int = 0) -> bool:
+        """Add a URL unless it (in canonical form) is already known; returns True if added"""
+        return self.add_many([url], priority=priority, depth=depth) == 1
+
+    def add_many(self, urls: Iterable[str], priority: int = 0, depth: int = 0) -> int:
+        now = self.clock()
+        rows, batch = [], set()
+        with self._lock:
+            for url in urls:
+                canonical = canonicalize_url(url)
+                if canonical in batch or (canonical in self.seen and self._known(canonical)):
+                    self.stats['duplicates'] += 1
+                    continue
+                if self.size + len(rows) >= self.max_urls:
+                    self.stats['rejected_full'] += 1
+                    continue
+                self.seen.add(canonical)
+                batch.add(canonical)
+                rows.append((canonical, urlsplit(canonical).netloc, priority, depth, now, now))
+
+            if rows:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO frontier (url, host, priority, depth, next_fetch_at, discovered_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                self._db.commit()
+                self.size += len(rows)
+                self.stats['added'] += len(rows)
+        return len(rows)
+
+    def _known(self, canonical: str) -> bool:
+        """Exact check behind a Bloom filter hit"""
+        return self._db.execute("SELECT 1 FROM frontier WHERE url = ?", (canonical,)).fetchone() is not None
+
+    # Scheduling
+
+    def _lease(self, limit: int) -> int:
+        """Move due URLs from the store into the per-host queues"""
+        rows = self._db.execute(
+            "SELECT url, host FROM frontier WHERE status = 'queued' AND next_fetch_at <= ? "
+            "ORDER BY priority DESC, next_fetch_at ASC, rowid ASC LIMIT ?", (self.clock(), limit)
+        ).fetchall()
+        if rows:
+            self._db.executemany("UPDATE frontier SET status = 'leased' WHERE url = ?", [(url,) for url, _ in rows])
+            self._db.commit()
+            for url, host in rows:
+                self.host_queues.setdefault(host, deque()).append(url)
+            self.stats['leased'] += len(rows)
+        return len(rows)
+
+    def next_batch(self, limit: int = 10) -> List[str]:
+        """Up to limit URLs to fetch now, round-robin across hosts with spare capacity"""
+        batch: List[str] = []
+        with self._lock:
+            if sum(len(queue) for queue in self.host_queues.values()) < limit:
+                self._lease(max(limit, self.lease_batch))
+
+            while len(batch) < limit:
+                hosts = [host for host, queue in self.host_queues.items()
+                         if queue and self.in_flight.get(host, 0) < self.max_in_flight_per_host]
+                if not hosts:
+                    break
+                host = hosts[self._next_host % len(hosts)]
+                self._next_host += 1
+                batch.append(self.host_queues[host].popleft())
+                self.in_flight[host] = self.in_flight.get(host, 0) + 1
+
+            for host in [host for host, queue in self.host_queues.items() if not queue]:
+                del self.host_queues[host]
+        return batch
+
+    def complete(self, url: str, success: bool = True, recrawl_after: Optional[float] = None):
+        """Record a fetch outcome and schedule the URL's next visit"""
+        now = self.clock()
+        with self._lock:
+            row = self._db.execute("SELECT host, failures FROM frontier WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            host, failures = row
+            if self.in_flight.get(host):
+                self.in_flight[host] -= 1
+
+            if success:
+                self._db.execute(
+                    "UPDATE frontier SET status = 'queued', last_fetched_at = ?, fetch_count = fetch_count + 1, "
+                    "failures = 0, next_fetch_at = ? WHERE url = ?",
+                    (now, now + (self.recrawl_after if recrawl_after is None else recrawl_after), url)
+                )
+                self.stats['completed'] += 1
+            else:
+                failures += 1
+                status = 'failed' if failures >= self.max_failures else 'queued'
+                self._db.execute(
+                    "UPDATE frontier SET status = ?, failures = ?, next_fetch_at = ? WHERE url = ?",
+                    (status, failures, now + self.retry_delay * 2 ** (failures - 1), url)
+                )
+                self.stats['failed'] += 1
+            self._db.commit()
+
+    def crawl(self, scraper, limit: int = 100, batch_size: int = 10) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Feed due URLs to a scraper's scrape_data, recording outcomes; yields (url, result)"""
+        fetched = 0
+        while fetched < limit:
+            batch = self.next_batch(min(batch_size, limit - fetched))
+            if not batch:
+                break
+            for url in batch:
+                try:
+                    result = scraper.scrape_data(url)
+                except Exception as e:
+                    self.logger.error(f"Error scraping {url}: {str(e)}")
+                    result = {'status': 'error', 'error': str(e)}
+                self.complete(url, success=result.get('status') == 'success')
+                fetched += 1
+                yield url, result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall())
+            due = self._db.execute("SELECT COUNT(*) FROM frontier WHERE status = 'queued' AND next_fetch_at <= ?",
+                                   (self.clock(),)).fetchone()[0]
+            return {
+                **self.stats,
+                'urls': self.size,
+                'due': due,
+                'by_status': counts,
+                'queued_hosts': len(self.host_queues),
+                'in_flight': sum(self.in_flight.values())
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+from typing import List, Optional, Iterable, Tuple
+
+from lxml import etree
+
+# Elements whose content is never extracted; dropped before parsing in partial mode
+SKIPPED_REGIONS = re.compile(
+    r'<(script|style|noscript|svg|template)\b[^>]*>.*?</\1\s*>|<!--.*?-->',
+    re.IGNORECASE | re.DOTALL
+)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+_HEADER_CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.IGNORECASE)
+_SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*)?((?:[#.][\w-]+)*)$')
+
+_TEXT = etree.XPath('.//text()[not(ancestor::script or ancestor::style)]')
+
+
+def css_to_xpath(selector: str) -> str:
+    """
+    Translate the CSS subset the scrapers use (tag, #id, .class, tag#id.class and
+    the descendant combinator) into XPath.
+    """
+    steps = []
+    for compound in selector.split():
+        match = _SIMPLE_SELECTOR.match(compound)
+        if not match or not (match.group(1) or match.group(2)):
+            raise ValueError(f"Unsupported selector: {selector!r}")
+
+        predicates = []
+        for kind, name in re.findall(r'([#.])([\w-]+)', match.group(2)):
+            if kind == '#':
+                predicates.append(f'@id="{name}"')
+            else:
+                predicates.append(f'contains(concat(" ", normalize-space(@class), " "), " {name} ")')
+        step = match.group(1) or '*'
+        if predicates:
+            step += '[' + ' and '.join(predicates) + ']'
+        steps.append(step)
+    return 'descendant::' + '/descendant::'.join(steps)
+
+
+@lru_cache(maxsize=None)
+def compiled_selector(selector: str) -> Tuple[etree.XPath, etree.XPath]:
+    """Compiled XPath pair for a selector: (first match, all matches)"""
+    expression = css_to_xpath(selector)
+    return etree.XPath(f'({expression})[1]'), etree.XPath(expression)
+
+
+def precompile(selectors: Iterable[str]):
+    for selector in selectors:
+        compiled_selector(selector)
+
+
+def header_charset(headers) -> Optional[str]:
+    """Charset declared in a Content-Type header, if any"""
+    match = _HEADER_CHARSET.search((headers or {}).get('Content-Type') or '')
+    return match.group(1) if match else None
+
+
+def detect_encoding(content: bytes, declared: Optional[str] = None) -> str:
+    """Declared charset, else a <meta charset> in the first 4 KB, else UTF-8"""
+    if declared:
+        return declared
+    match = _META_CHARSET.search(content[:4096])
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+
+class FastElement:
+    """
+    lxml element exposing the small BeautifulSoup surface the extractors use
+    (select_one, select, get_text, get), so the same extraction code runs on
+    either tree.
+    """
+
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    def select_one(self, selector: str) -> Optional['FastElement']:
+        found = compiled_selector(selector)[0](self.element)
+        return FastElement(found[0]) if found else None
+
+    def select(self, selector: str) -> List['FastElement']:
+        return [FastElement(element) for element in compiled_selector(selector)[1](self.element)]
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        strings = _TEXT(self.element)
+        if strip:
+            strings = [text.strip() for text in strings]
+            strings = [text for text in strings if text]
+        return separator.join(strings)
+
+    def get(self, attribute: str, default=None):
+        return self.element.get(attribute, default)
+
+    def __bool__(self) -> bool:
+        return True
+
+
+class FastDocument(FastElement):
+    """
+    A page parsed with lxml's C HTML parser.
+
+    With partial=True (the default) script, style, noscript, svg and template
+    blocks and comments are cut out of the markup before parsing, since nothing
+    is extracted from them and on retail pages they are most of the bytes.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, content: bytes, encoding: Optional[str] = None, partial: bool = True):
+        text = content.decode(detect_encoding(content, encoding), errors='replace')
+        if partial:
+            text = SKIPPED_REGIONS.sub('', text)
+        parser = etree.HTMLParser(remove_comments=True, remove_pis=True)
+        root = etree.fromstring(text, parser)
+        super().__init__(root if root is not None else etree.Element('html'))
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Callable, Sequence, Tuple
+
+from scrapers.fast_parser import SKIPPED_REGIONS
+
+# Attributes that change on every render without changing the content
+_VOLATILE_ATTRIBUTES = re.compile(
+    r'\s(?:data-[\w-]+|nonce|csrf[\w-]*|[\w-]*token[\w-]*|[\w-]*session[\w-]*)\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+)',
+    re.IGNORECASE
+)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def region_markup(text: str, start_markers: Sequence[str] = (), end_markers: Sequence[str] = ()) -> str:
+    """
+    The slice of a page between the first start marker and the first end marker
+    after it (the whole page if no start marker is found).
+    """
+    start = min((position for position in (text.find(marker) for marker in start_markers) if position >= 0),
+                default=0)
+    end = min((position for position in (text.find(marker, start) for marker in end_markers) if position > start),
+              default=len(text))
+    return text[start:end]
+
+
+def normalize_markup(text: str) -> str:
+    """Markup without scripts, styles, comments, volatile attributes or whitespace runs"""
+    text = SKIPPED_REGIONS.sub('', text)
+    text = _VOLATILE_ATTRIBUTES.sub('', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def fingerprint(content: bytes, start_markers: Sequence[str] = (),
+                end_markers: Sequence[str] = ()) -> Tuple[str, str]:
+    """(body hash, normalized region hash) of a page"""
+    body_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+    # latin-1 maps bytes one to one, so markup can be sliced without knowing the page encoding
+    region = normalize_markup(region_markup(content.decode('latin-1'), start_markers, end_markers))
+    region_hash = hashlib.blake2b(region.encode('latin-1'), digest_size=16).hexdigest()
+    return body_hash, region_hash
+
+
+class FingerprintStore:
+    """
+    Last fingerprints and parse of every scraped URL, in sqlite (in memory
+    when no path is given). A page whose body hash or product-region hash is
+    unchanged since the last parse reuses that parse instead of being parsed
+    and written downstream again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        if db_path and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path or ':memory:', check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY, body_hash TEXT NOT NULL, region_hash TEXT NOT NULL,
+                parsed TEXT NOT NULL, updated_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def unchanged(self, url: str, body_hash: str, region_hash: str) -> Optional[Dict[str, Any]]:
+        """The stored parse if either fingerprint matches the last one, else None"""
+        with self._lock:
+            row = self._db.execute("SELECT body_hash, region_hash, parsed FROM fingerprints WHERE url = ?",
+                                   (url,)).fetchone()
+            if row is None or (row[0] != body_hash and row[1] != region_hash):
+                return None
+            if row[0] != body_hash:
+                # Same product, different page chrome: remember the new body
+                self._db.execute("UPDATE fingerprints SET body_hash = ?, updated_at = ? WHERE url = ?",
+                                 (body_hash, self.clock(), url))
+                self._db.commit()
+        return json.loads(row[2])
+
+    def remember(self, url: str, body_hash: str, region_hash: str, parsed: Dict[str, Any]):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                             (url, body_hash, region_hash, json.dumps(parsed, default=str), self.clock()))
+            self._db.commit()
+
+    def forget(self, url: str):
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints WHERE url = ?", (url,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
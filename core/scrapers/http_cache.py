@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers kept with a cached body
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+
+
+class CacheEntry:
+    """Index row of a cached response"""
+
+    def __init__(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str],
+                 content_type: Optional[str], size: int, stored_at: float, parsed: Optional[str]):
+        self.key = key
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.size = size
+        self.stored_at = stored_at
+        self.parsed = parsed
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that revalidate this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache for scraper GET requests.
+
+    Bodies live in one file per URL under cache_dir; an sqlite index holds the
+    validators (ETag / Last-Modified), sizes, last-use times and, once a page has
+    been parsed, the parsed result. Cached pages are revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged page costs a 304 and the
+    stored parse is reused. Total body size is capped at max_bytes by evicting
+    least recently used entries.
+
+    freshness_seconds (off by default) serves entries younger than that without
+    any request at all, e.g. to replay a crawl in tests.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024,
+                 freshness_seconds: Optional[float] = None, clock: Callable[[], float] = time.time):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.freshness_seconds = freshness_seconds
+        self.clock = clock
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT,
+                content_type TEXT, size INTEGER NOT NULL, stored_at REAL NOT NULL,
+                last_used REAL NOT NULL, parsed TEXT
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        self.logger = logging.getLogger('HttpCache')
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        key = self.make_key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, url, etag, last_modified, content_type, size, stored_at, parsed "
+                "FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not os.path.exists(self._body_path(key)):
+            return None
+        return CacheEntry(*row)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.freshness_seconds is not None and self.clock() - entry.stored_at < self.freshness_seconds
+
+    def cacheable(self, response: requests.Response) -> bool:
+        """Only complete successful responses that can be revalidated (or any, under the freshness override)"""
+        if response.status_code != 200:
+            return False
+        if getattr(response, 'truncated', False) or not getattr(response, 'complete', True):
+            return False
+        return bool(self.freshness_seconds is not None
+                    or response.headers.get('ETag') or response.headers.get('Last-Modified'))
+
+    def store(self, url: str, response: requests.Response):
+        """Cache a fresh 200 response, replacing any previous body and parse"""
+        if not self.cacheable(response):
+            return
+
+        key = self.make_key(url)
+        body = response.content or b''
+        now = self.clock()
+        temporary = self._body_path(key) + '.tmp'
+        with open(temporary, 'wb') as handle:
+            handle.write(body)
+        os.replace(temporary, self._body_path(key))
+
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                (key, url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 response.headers.get('Content-Type'), len(body), now, now)
+            )
+            self.total_bytes += len(body) - (previous[0] if previous else 0)
+            self.stats['stores'] += 1
+            self._evict()
+            self._db.commit()
+
+    def store_parsed(self, url: str, parsed: Dict[str, Any]):
+        """Attach the parse of the cached body so revalidated hits skip parsing"""
+        with self._lock:
+            self._db.execute("UPDATE entries SET parsed = ? WHERE key = ?",
+                             (json.dumps(parsed, default=str), self.make_key(url)))
+            self._db.commit()
+
+    def parsed(self, entry: CacheEntry) -> Optional[Dict[str, Any]]:
+        return json.loads(entry.parsed) if entry.parsed else None
+
+    def touch(self, entry: CacheEntry, revalidated: bool = False):
+        """Mark an entry used; a revalidation (304) also restarts its freshness"""
+        now = self.clock()
+        with self._lock:
+            if revalidated:
+                self._db.execute("UPDATE entries SET last_used = ?, stored_at = ? WHERE key = ?",
+                                 (now, now, entry.key))
+                self.stats['revalidated'] += 1
+            else:
+                self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, entry.key))
+                self.stats['hits'] += 1
+            self._db.commit()
+
+    def to_response(self, entry: CacheEntry) -> requests.Response:
+        """Rebuild a 200 response from a cached body, flagged with from_cache"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry.url
+        with open(self._body_path(entry.key), 'rb') as handle:
+            response._content = handle.read()
+        response.headers = CaseInsensitiveDict({
+            name: value for name, value in (
+                ('ETag', entry.etag), ('Last-Modified', entry.last_modified), ('Content-Type', entry.content_type)
+            ) if value
+        })
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        response.cache_entry = entry
+        return response
+
+    def invalidate(self, url: str):
+        key = self.make_key(url)
+        with self._lock:
+            self._remove(key)
+            self._db.commit()
+
+    def _remove(self, key: str):
+        row = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.total_bytes -= row[0]
+        try:
+            os.remove(self._body_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        while self.total_bytes > self.max_bytes:
+            row = self._db.execute("SELECT key FROM entries ORDER BY last_used LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._remove(row[0])
+            self.stats['evictions'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {**self.stats, 'entries': entries, 'bytes': self.total_bytes, 'max_bytes': self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
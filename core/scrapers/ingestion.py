@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
+
+from infrastructure.persistence import MODELS_AVAILABLE, commit_or_rollback
+from analytics.trend_engine import OBSERVATION_DATA_TYPE
+
+if MODELS_AVAILABLE:
+    from sqlalchemy import insert, func, text
+    from infrastructure.persistence import Product, MarketData
+
+# Product columns refreshed when a scraped URL is already known
+PRODUCT_UPDATE_COLUMNS = ('name', 'price', 'description', 'image_url', 'updated_at')
+
+# Rows covered by the partial source_url unique index (products without a URL may repeat)
+SOURCE_URL_INDEX_WHERE = "source_url IS NOT NULL AND source_url <> ''"
+
+# Keeps multi-row upserts under SQLite's bound-parameter limit
+ROWS_PER_STATEMENT = 1000
+
+
+class IngestionSink:
+    """
+    Buffers scraped product pages and writes them in bulk.
+
+    Each successful scrape becomes a Product upsert keyed by source_url
+    (INSERT ... ON CONFLICT DO UPDATE on SQLite and PostgreSQL; a
+    select-then-bulk-write fallback elsewhere) plus one MarketData
+    'product_observation' row with price, rating and review count, which feeds
+    the time-series store and trend scoring. Results flagged 'unchanged' (HTTP
+    cache or fingerprint hits) are skipped, as are failed scrapes.
+
+    Records are flushed every batch_size records or flush_interval seconds,
+    one statement per table and one commit per batch, and stats report write
+    throughput.
+    """
+
+    def __init__(self, session_factory: Callable, batch_size: int = 500, flush_interval: float = 5.0,
+                 source: str = 'amazon', niche_id: Optional[int] = None, currency: str = 'USD',
+                 clock: Callable[[], float] = time.monotonic):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.source = source
+        self.niche_id = niche_id
+        self.currency = currency
+        self.clock = clock
+
+        self._buffer: Dict[str, Dict[str, Any]] = {}  # source_url -> latest scraped data
+        self._lock = threading.Lock()
+        self._last_flush = clock()
+        self._schema_checked = False
+        self._unique_source_url = False
+
+        self.logger = logging.getLogger('IngestionSink')
+        self.stats = {
+            'received': 0, 'skipped_unchanged': 0, 'skipped_invalid': 0, 'products_upserted': 0,
+            'observations_inserted': 0, 'batches': 0, 'failed': 0, 'write_seconds': 0.0
+        }
+
+    def add(self, url: str, result: Dict[str, Any]) -> bool:
+        """Buffer one scrape result; returns True if it will be written"""
+        with self._lock:
+            self.stats['received'] += 1
+            if result.get('unchanged'):
+                self.stats['skipped_unchanged'] += 1
+                return False
+            data = result.get('data') or {}
+            if result.get('status') != 'success' or not url or not data.get('title'):
+                self.stats['skipped_invalid'] += 1
+                return False
+
+            # A URL seen twice in one batch keeps its latest scrape
+            self._buffer[url] = data
+            due = len(self._buffer) >= self.batch_size or self.clock() - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+        return True
+
+    def consume(self, results: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Write every (url, result) pair, e.g. from ScrapePipeline.run or CrawlFrontier.crawl"""
+        for url, result in results:
+            self.add(url, result)
+        self.flush()
+        return self.snapshot()
+
+    def flush(self) -> int:
+        """Write the buffered records; returns the number written"""
+        with self._lock:
+            records, self._buffer = self._buffer, {}
+            self._last_flush = self.clock()
+        if not records or not MODELS_AVAILABLE:
+            return 0
+
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        products = [
+            {
+                'source_url': url,
+                'name': data['title'][:200],
+                'price': data.get('price'),
+                'description': data.get('description') or None,
+                'image_url': (data.get('images') or [None])[0],
+                'currency': self.currency,
+                'niche_id': self.niche_id,
+                'created_at': now,
+                'updated_at': now
+            }
+            for url, data in records.items()
+        ]
+        observations = [
+            {
+                'data_type': OBSERVATION_DATA_TYPE,
+                'source': self.source,
+                'product_name': data['title'][:200],
+                'niche_id': self.niche_id,
+                'data_payload': {
+                    'source_url': url,
+                    'price': data.get('price'),
+                    'rating': data.get('rating'),
+                    'review_count': data.get('review_count'),
+                    'availability': data.get('availability'),
+                    'scraped_at': data.get('scraped_at')
+                },
+                'trend_score': 0.0,
+                'confidence_score': 0.0,
+                'created_at': now
+            }
+            for url, data in records.items()
+        ]
+
+        with self.session_factory() as session:
+            if session is None:
+                return 0
+            try:
+                self._ensure_schema(session)
+                self._upsert_products(session, products)
+                session.execute(insert(MarketData.__table__), observations)
+            except Exception as e:
+                session.rollback()
+                self.stats['failed'] += len(records)
+                self.logger.error(f"Failed to write {len(records)} scraped records: {str(e)}")
+                return 0
+            if not commit_or_rollback(session, f"{len(records)} scraped records"):
+                self.stats['failed'] += len(records)
+                return 0
+
+        elapsed = time.perf_counter() - started
+        self.stats['products_upserted'] += len(products)
+        self.stats['observations_inserted'] += len(observations)
+        self.stats['batches'] += 1
+        self.stats['write_seconds'] += elapsed
+        self.logger.info("Wrote %d scraped records in %.0f ms", len(records), elapsed * 1000)
+        return len(records)
+
+    def _ensure_schema(self, session):
+        """
+        Create the partial source_url unique index on databases created before it existed.
+
+        Existing duplicate source_url rows (which other tables may reference)
+        are left alone: the index is not created and writes use the portable
+        select-then-write path instead of ON CONFLICT.
+        """
+        if self._schema_checked:
+            return
+        self._schema_checked = True
+
+        duplicate = session.query(Product.source_url).filter(
+            Product.source_url.isnot(None), Product.source_url != '').group_by(
+            Product.source_url).having(func.count(Product.id) > 1).first()
+        if duplicate is not None:
+            self.logger.warning(f"Products share source_url {duplicate[0]!r}; "
+                                f"not creating the unique index, upserts fall back to lookups")
+            return
+
+        try:
+            with session.begin_nested():
+                for index in Product.__table__.indexes:
+                    if index.unique and [column.name for column in index.columns] == ['source_url']:
+                        index.create(bind=session.connection(), checkfirst=True)
+        except Exception as e:
+            self.logger.warning(f"Could not create the source_url unique index, "
+                                f"upserts fall back to lookups: {str(e)}")
+            return
+        self._unique_source_url = True
+
+    def _upsert_products(self, session, products: List[Dict[str, Any]]):
+        dialect = session.get_bind().dialect.name
+        if self._unique_source_url and dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            for start in range(0, len(products), ROWS_PER_STATEMENT):
+                statement = dialect_insert(Product.__table__).values(products[start:start + ROWS_PER_STATEMENT])
+                statement = statement.on_conflict_do_update(
+                    index_elements=['source_url'],
+                    index_where=text(SOURCE_URL_INDEX_WHERE),
+                    set_={column: statement.excluded[column] for column in PRODUCT_UPDATE_COLUMNS}
+                )
+                session.execute(statement)
+            return
+
+        # Portable fallback: one lookup, then one bulk insert and one bulk update
+        # (with duplicate source_urls, the newest row is the one updated)
+        existing = dict(session.query(Product.source_url, Product.id).filter(
+            Product.source_url.in_([product['source_url'] for product in products])
+        ).order_by(Product.id).all())
+        session.bulk_insert_mappings(Product, [p for p in products if p['source_url'] not in existing])
+        session.bulk_update_mappings(Product, [
+            {'id': existing[p['source_url']], **{column: p[column] for column in PRODUCT_UPDATE_COLUMNS}}
+            for p in products if p['source_url'] in existing
+        ])
+
+    def snapshot(self) -> Dict[str, Any]:
+        written = self.stats['products_upserted']
+        seconds = self.stats['write_seconds']
+        return {
+            **self.stats,
+            'buffered': len(self._buffer),
+            'records_per_second': round(written / seconds, 1) if seconds else 0.0
+        }
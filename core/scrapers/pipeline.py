@@ -0,0 +1,192 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from requests.structures import CaseInsensitiveDict
+
+from scrapers.base_scraper import AmazonPageParser
+
+_FETCHER_DONE = object()
+
+# One parser per worker process, created on first use
+_worker_parsers: Dict[str, AmazonPageParser] = {}
+
+
+class RawPage:
+    """Fetched page bytes and headers, as shipped to a parse worker; header lookups ignore case"""
+
+    def __init__(self, url: str, content: bytes, headers: Dict[str, str]):
+        self.url = url
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+
+
+class _WorkerParser(AmazonPageParser):
+    """Amazon extraction without a network session, for parse workers"""
+
+    def __init__(self, parser: str):
+        self.parser = parser
+        self.logger = logging.getLogger('Scraper.parse-worker')
+        self.stats = {'data_points_collected': 0}
+
+
+def parse_amazon_page(url: str, content: bytes, headers: Dict[str, str], parser: str = 'fast') -> Dict[str, Any]:
+    """Parse one Amazon product page; module level so process pools can pickle it"""
+    worker = _worker_parsers.get(parser)
+    if worker is None:
+        worker = _worker_parsers[parser] = _WorkerParser(parser)
+    return worker.parse_response(RawPage(url, content, headers))
+
+
+class ScrapePipeline:
+    """
+    Two-stage scrape: fetch threads keep sockets busy while a process pool
+    parses. The stages are connected by a bounded queue of raw pages
+    (url, bytes, headers).
+
+    Fetchers block when the queue is full and at most max_pending pages are
+    being parsed at once, so memory stays bounded however far fetching gets
+    ahead. Parsing runs in parse_workers processes (spawned, since fetch threads
+    are already running), so CPU-bound extraction uses every core instead of
+    sharing the GIL with network I/O. parse_workers=0 parses inline.
+
+    `fetch` is any callable returning a response with .content and .headers
+    (or None), e.g. a BaseScraper's make_request, which brings its rate
+    limiting, HTTP cache and retries along.
+    """
+
+    def __init__(self, fetch: Callable[[str], Any], parse_function: Callable[..., Dict[str, Any]] = parse_amazon_page,
+                 fetch_workers: int = 8, parse_workers: Optional[int] = None, queue_size: int = 64,
+                 max_pending: Optional[int] = None, parser: str = 'fast'):
+        self.fetch = fetch
+        self.parse_function = parse_function
+        self.fetch_workers = fetch_workers
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.queue_size = queue_size
+        self.max_pending = max_pending or max(2 * self.parse_workers, 1)
+        self.parser = parser
+
+        self.logger = logging.getLogger('ScrapePipeline')
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {'fetched': 0, 'fetch_failed': 0, 'parsed': 0, 'parse_failed': 0, 'max_queued': 0, 'elapsed': 0.0}
+
+    def _fetcher(self, urls: queue.Queue, pages: queue.Queue, stop: threading.Event):
+        try:
+            while not stop.is_set():
+                try:
+                    url = urls.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    response = self.fetch(url)
+                except Exception as e:
+                    self.logger.error(f"Fetch failed for {url}: {str(e)}")
+                    response = None
+                # Plain dicts pickle cheaply but are case-sensitive; ship lower-cased names
+                item = (url, response.content, {name.lower(): value for name, value in response.headers.items()}) \
+                    if response is not None else (url, None, None)
+
+                while not stop.is_set():
+                    try:
+                        pages.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            # Once the consumer has stopped nobody reads the queue; don't block on a full one
+            while True:
+                try:
+                    pages.put(_FETCHER_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stop.is_set():
+                        break
+
+    def run(self, urls: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Fetch and parse every URL; yields (url, result) as parses finish"""
+        self.stats = self._empty_stats()
+        started = time.perf_counter()
+
+        url_queue: queue.Queue = queue.Queue()
+        for url in urls:
+            url_queue.put(url)
+        pages: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        pool = None
+        if self.parse_workers > 0:
+            pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context('spawn'))
+
+        fetchers = [threading.Thread(target=self._fetcher, args=(url_queue, pages, stop), daemon=True,
+                                     name=f'scrape-fetch-{index}')
+                    for index in range(max(1, min(self.fetch_workers, url_queue.qsize())))]
+        for thread in fetchers:
+            thread.start()
+
+        pending: Dict[Future, str] = {}
+        running = len(fetchers)
+        try:
+            while running or pending:
+                # Feed the parse stage while it has room
+                while running and len(pending) < self.max_pending:
+                    try:
+                        item = pages.get(timeout=0.05 if pending else None)
+                    except queue.Empty:
+                        break
+                    if item is _FETCHER_DONE:
+                        running -= 1
+                        continue
+
+                    self.stats['max_queued'] = max(self.stats['max_queued'], pages.qsize() + 1)
+                    url, content, headers = item
+                    if content is None:
+                        self.stats['fetch_failed'] += 1
+                        yield url, {'status': 'error', 'error': 'Failed to fetch page'}
+                        continue
+
+                    self.stats['fetched'] += 1
+                    if pool is None:
+                        yield url, self._record(self._parse_inline(url, content, headers))
+                    else:
+                        pending[pool.submit(self.parse_function, url, content, headers, self.parser)] = url
+
+                if pending:
+                    done, _ = wait(list(pending), timeout=0.05, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = {'status': 'error', 'error': str(e)}
+                        yield url, self._record(result)
+        finally:
+            stop.set()
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            self.stats['elapsed'] = time.perf_counter() - started
+
+    def _parse_inline(self, url: str, content: bytes, headers: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            return self.parse_function(url, content, headers, self.parser)
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    def _record(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if result.get('status') == 'success':
+            self.stats['parsed'] += 1
+        else:
+            self.stats['parse_failed'] += 1
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = self.stats['elapsed']
+        return {**self.stats, 'pages_per_second': self.stats['parsed'] / elapsed if elapsed else 0.0}
@@ -0,0 +1,240 @@
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+from infrastructure.persistence import MODELS_AVAILABLE, commit_or_rollback
+
+if MODELS_AVAILABLE:
+    from infrastructure.persistence import Product, MarketData
+
+# MarketData.data_type of recorded price deltas
+PRICE_CHANGE_DATA_TYPE = 'price_change'
+
+
+class WatchedProduct:
+    """A tracked product URL and the last price seen for it"""
+
+    def __init__(self, product_id: int, name: str, url: str, last_price: Optional[float]):
+        self.product_id = product_id
+        self.name = name
+        self.url = url
+        self.last_price = last_price
+        self.last_checked: Optional[float] = None
+        self.next_check = 0.0
+
+
+class PriceWatcher:
+    """
+    Periodically re-scrapes tracked Product.source_url pages and records price
+    changes only.
+
+    Products sit in a min-heap by next check time, so each pass touches only the
+    products that are due. Unchanged prices cost nothing beyond the fetch; a change
+    writes one MarketData 'price_change' delta row, updates Product.price (both in
+    one bulk commit per pass) and appends to the price time series. Changes of at
+    least alert_threshold_percent are returned as alerts.
+    """
+
+    def __init__(self, fetch_price: Callable[[str], Optional[float]],
+                 session_factory: Optional[Callable] = None, timeseries=None,
+                 check_interval: float = 6 * 3600, sync_interval: float = 600,
+                 min_change_percent: float = 0.5, alert_threshold_percent: float = 10.0,
+                 batch_size: int = 200, max_workers: int = 4,
+                 clock: Callable[[], float] = time.time):
+        self.fetch_price = fetch_price
+        self.session_factory = session_factory
+        self.timeseries = timeseries
+        self.check_interval = check_interval
+        self.sync_interval = sync_interval
+        self.min_change_percent = min_change_percent
+        self.alert_threshold_percent = alert_threshold_percent
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.clock = clock
+
+        self.products: Dict[int, WatchedProduct] = {}
+        self._schedule: List[tuple] = []  # (next_check, product_id)
+        self._last_sync: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger('PriceWatcher')
+        self.stats = {'checks': 0, 'changes': 0, 'failures': 0, 'alerts': 0, 'record_failures': 0}
+
+    def track(self, product_id: int, name: str, url: str, last_price: Optional[float] = None):
+        with self._lock:
+            watched = self.products.get(product_id)
+            if watched is not None:
+                watched.name, watched.url = name, url
+                return
+            watched = self.products[product_id] = WatchedProduct(product_id, name, url, last_price)
+            watched.next_check = self.clock()
+            heapq.heappush(self._schedule, (watched.next_check, product_id))
+
+    def untrack(self, product_id: int):
+        # Its schedule entry is skipped lazily when popped
+        with self._lock:
+            self.products.pop(product_id, None)
+
+    def sync_products(self, force: bool = False) -> int:
+        """Track every Product with a source_url; throttled to sync_interval"""
+        now = self.clock()
+        if not force and self._last_sync is not None and now - self._last_sync < self.sync_interval:
+            return 0
+        self._last_sync = now
+
+        if not MODELS_AVAILABLE or self.session_factory is None:
+            return 0
+
+        with self.session_factory() as session:
+            if session is None:
+                return 0
+            rows = session.query(Product.id, Product.name, Product.source_url, Product.price).filter(
+                Product.source_url.isnot(None), Product.source_url != ''
+            ).all()
+
+        current = set()
+        for product_id, name, url, price in rows:
+            current.add(product_id)
+            self.track(product_id, name, url, price)
+        for product_id in set(self.products) - current:
+            self.untrack(product_id)
+        return len(rows)
+
+    def due(self, now: Optional[float] = None) -> List[WatchedProduct]:
+        """Pop up to batch_size products whose next check time has come"""
+        now = self.clock() if now is None else now
+        batch = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now and len(batch) < self.batch_size:
+                next_check, product_id = heapq.heappop(self._schedule)
+                watched = self.products.get(product_id)
+                if watched is not None and watched.next_check == next_check:
+                    batch.append(watched)
+        return batch
+
+    def _reschedule(self, watched: WatchedProduct, now: float):
+        watched.last_checked = now
+        watched.next_check = now + self.check_interval
+        with self._lock:
+            if watched.product_id in self.products:
+                heapq.heappush(self._schedule, (watched.next_check, watched.product_id))
+
+    def run_due(self) -> Dict[str, Any]:
+        """Check every due product and record the price changes found"""
+        self.sync_products()
+        batch = self.due()
+        if not batch:
+            return {'checked': 0, 'changed': [], 'failed': 0, 'alerts': []}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='price-watch') as pool:
+            prices = list(pool.map(self._safe_fetch, batch))
+
+        now = self.clock()
+        detected, failed = [], 0
+        for watched, price in zip(batch, prices):
+            self._reschedule(watched, now)
+            if price is None:
+                failed += 1
+                continue
+
+            change = self.detect_change(watched, price)
+            if change:
+                detected.append((watched, change))
+
+        # The baseline only moves once a change is persisted, so slow drift still adds up
+        # and a change whose commit failed is detected again on the next check
+        changes = [change for _, change in detected]
+        if changes and not self.record_changes(changes):
+            self.stats['record_failures'] += 1
+            detected, changes = [], []
+        for watched, change in detected:
+            watched.last_price = change['new_price']
+
+        alerts = [change for change in changes if abs(change['change_percent']) >= self.alert_threshold_percent]
+
+        self.stats['checks'] += len(batch)
+        self.stats['changes'] += len(changes)
+        self.stats['failures'] += failed
+        self.stats['alerts'] += len(alerts)
+        self.logger.info("Checked %d prices: %d changed, %d failed, %d alerts", len(batch), len(changes), failed, len(alerts))
+
+        return {'checked': len(batch), 'changed': changes, 'failed': failed, 'alerts': alerts}
+
+    def _safe_fetch(self, watched: WatchedProduct) -> Optional[float]:
+        try:
+            return self.fetch_price(watched.url)
+        except Exception as e:
+            self.logger.warning(f"Price check failed for {watched.url}: {str(e)}")
+            return None
+
+    def detect_change(self, watched: WatchedProduct, price: float) -> Optional[Dict[str, Any]]:
+        """The delta from the last seen price, or None if it moved less than min_change_percent"""
+        previous = watched.last_price
+        if previous is None:
+            # First price for a product without one is recorded, but never alerts
+            change, change_percent = None, 0.0
+        elif previous <= 0:
+            return None
+        else:
+            change_percent = (price - previous) / previous * 100
+            if abs(change_percent) < self.min_change_percent:
+                return None
+            change = round(price - previous, 2)
+
+        return {
+            'product_id': watched.product_id,
+            'product_name': watched.name,
+            'source_url': watched.url,
+            'old_price': previous,
+            'new_price': price,
+            'change': change,
+            'change_percent': round(change_percent, 2)
+        }
+
+    def record_changes(self, changes: List[Dict[str, Any]]) -> bool:
+        """Persist deltas and new prices in one commit and extend the price series; False if not persisted"""
+        if not changes:
+            return True
+
+        observed_at = datetime.utcnow()
+        if MODELS_AVAILABLE and self.session_factory is not None:
+            try:
+                with self.session_factory() as session:
+                    if session is None:
+                        return False
+
+                    session.bulk_insert_mappings(MarketData, [
+                        {
+                            'data_type': PRICE_CHANGE_DATA_TYPE,
+                            'source': 'price_watch',
+                            'product_name': change['product_name'],
+                            'data_payload': change,
+                            'created_at': observed_at
+                        }
+                        for change in changes
+                    ])
+                    session.bulk_update_mappings(Product, [
+                        {'id': change['product_id'], 'price': change['new_price'], 'updated_at': observed_at}
+                        for change in changes
+                    ])
+                    if not commit_or_rollback(session, f"{len(changes)} price changes"):
+                        return False
+            except Exception as e:
+                self.logger.error(f"Failed to record price changes: {str(e)}")
+                return False
+
+        # The series is only extended after the commit, so a retried change is not appended twice
+        if self.timeseries is not None:
+            for change in changes:
+                self.timeseries.append(change['product_name'], 'price', observed_at, change['new_price'])
+            self.timeseries.flush()
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            next_due = self._schedule[0][0] if self._schedule else None
+            return {**self.stats, 'tracked': len(self.products), 'next_due': next_due}
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# Statuses that mean the host wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket for one host: `rate` tokens per second, up to `capacity` banked
+    for bursts. Callers reserve a token and are told how long to wait for it, so
+    the bucket never blocks while holding its lock.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.configured_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        # No tokens accrue while the host has us paused
+        elapsed = max(0.0, now - max(self.updated, self.blocked_until))
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take a token (possibly borrowed from the future); returns seconds to wait"""
+        self._refill(now)
+        self.tokens -= 1
+        # Borrowed tokens are repaid after any pause, so requests queued behind a
+        # Retry-After are spaced out at the rate instead of all firing when it ends
+        return max(0.0, self.blocked_until - now) + max(0.0, -self.tokens) / self.rate
+
+    def slow_down(self, now: float, factor: float, min_rate: float, retry_after: Optional[float]):
+        self._refill(now)
+        self.throttled += 1
+        self.rate = max(min_rate, self.rate * factor)
+        # One request may go as soon as the pause ends; the rest queue at the new rate
+        self.tokens = min(self.tokens, 1.0)
+        pause = retry_after if retry_after is not None else 1.0 / self.rate
+        self.blocked_until = max(self.blocked_until, now + pause)
+
+    def recover(self, now: float, step: float):
+        """Additive increase back toward the configured rate after a successful response"""
+        if self.rate < self.configured_rate:
+            self._refill(now)
+            self.rate = min(self.configured_rate, self.rate + self.configured_rate * step)
+
+
+class HostRateLimiter:
+    """
+    Per-host token buckets shared by scrapers.
+
+    Every host gets its own bucket, so many hosts are crawled in parallel, each
+    at its own allowed rate (host_rates overrides the default per host). A 429
+    or 503 halves that host's rate (down to min_rate) and pauses it for the
+    Retry-After duration; successful responses then raise the rate additively
+    back to its configured value. A default_rate of None disables limiting.
+    """
+
+    def __init__(self, default_rate: Optional[float] = 1.0, burst: float = 3.0,
+                 host_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+                 min_rate: float = 0.05, slowdown_factor: float = 0.5, recovery_step: float = 0.1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.host_rates = dict(host_rates or {})
+        self.min_rate = min_rate
+        self.slowdown_factor = slowdown_factor
+        self.recovery_step = recovery_step
+        self.clock = clock
+
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('HostRateLimiter')
+
+    def configure(self, host: str, rate: float, burst: Optional[float] = None):
+        """Set a host's allowed rate (requests/second) and burst size"""
+        with self._lock:
+            self.host_rates[host] = (rate, burst if burst is not None else self.burst)
+            self.buckets.pop(host, None)
+
+    def _bucket(self, host: str) -> Optional[TokenBucket]:
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            rate, burst = self.host_rates.get(host, (self.default_rate, self.burst))
+            if not rate:
+                return None
+            bucket = self.buckets[host] = TokenBucket(rate, burst, self.clock())
+        return bucket
+
+    def reserve(self, host: str) -> float:
+        """Reserve the next request slot for a host; returns seconds to wait before sending"""
+        with self._lock:
+            bucket = self._bucket(host)
+            return bucket.reserve(self.clock()) if bucket is not None else 0.0
+
+    def acquire(self, host: str) -> float:
+        wait = self.reserve(host)
+        if wait > 0:
+            self.logger.debug("Rate limiting %s: sleeping for %.2f seconds", host, wait)
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, host: str) -> float:
+        wait = self.reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_response(self, host: str, status: int, headers: Optional[Dict[str, str]] = None) -> bool:
+        """Adapt a host's rate to a response; returns True if the host asked us to back off"""
+        with self._lock:
+            bucket = self._bucket(host)
+            if bucket is None:
+                return status in THROTTLE_STATUSES
+
+            now = self.clock()
+            if status in THROTTLE_STATUSES:
+                retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+                bucket.slow_down(now, self.slowdown_factor, self.min_rate, retry_after)
+                self.logger.info("%s throttled us (HTTP %s); rate now %.2f/s", host, status, bucket.rate)
+                return True
+            if status < 400:
+                bucket.recover(now, self.recovery_step)
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self.clock()
+            return {
+                host: {
+                    'rate': round(bucket.rate, 4),
+                    'configured_rate': bucket.configured_rate,
+                    'throttled': bucket.throttled,
+                    'paused_for': round(max(0.0, bucket.blocked_until - now), 3)
+                }
+                for host, bucket in self.buckets.items()
+            }
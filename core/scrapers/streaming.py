@@ -0,0 +1,78 @@
+from typing import Optional, Sequence, Tuple
+
+# Bodies are read in chunks and never held beyond max_bytes (decoded size)
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+# (connect, read) timeouts: read applies between chunks, download_timeout to the whole body
+DEFAULT_TIMEOUT = (5.0, 20.0)
+DEFAULT_DOWNLOAD_TIMEOUT = 60.0
+
+
+def capped_timeout(timeout, remaining: Optional[float]):
+    """A requests timeout (seconds or a (connect, read) pair) capped at the remaining deadline"""
+    if remaining is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class BodyReader:
+    """
+    Accumulates a streamed response body, shared by the blocking and async
+    scrapers.
+
+    feed() returns True once reading should stop: either max_bytes have been
+    read (the body is cut there and flagged truncated) or, when region markers
+    are given, an end marker has arrived after a start marker, i.e. the product
+    region is complete and the rest of the page (reviews, recommendations,
+    footer) is not needed. Without a start marker the whole page is read.
+    Marker scans only cover newly arrived bytes.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = DEFAULT_MAX_BYTES, start_markers: Sequence[str] = (),
+                 end_markers: Sequence[str] = ()):
+        self.max_bytes = max_bytes
+        self.start_markers = [marker.encode('latin-1') for marker in start_markers]
+        self.end_markers = [marker.encode('latin-1') for marker in end_markers]
+        self._overlap = max((len(marker) for marker in self.start_markers + self.end_markers), default=1) - 1
+
+        self.body = bytearray()
+        self.truncated = False
+        self.region_complete = False
+        self._scanned = 0
+        self._region_start = None if self.start_markers else 0
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.max_bytes is not None and len(self.body) + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - len(self.body)]
+            self.truncated = True
+        self.body += chunk
+
+        if self.end_markers and not self.region_complete:
+            self.region_complete = self._scan()
+        return self.truncated or self.region_complete
+
+    def _scan(self) -> bool:
+        offset = max(0, self._scanned - self._overlap)
+        self._scanned = len(self.body)
+
+        if self._region_start is None:
+            found = [position for position in (self.body.find(marker, offset) for marker in self.start_markers)
+                     if position >= 0]
+            if not found:
+                return False
+            self._region_start = min(found)
+            offset = self._region_start
+
+        offset = max(offset, self._region_start + 1)
+        return any(self.body.find(marker, offset) >= 0 for marker in self.end_markers)
+
+    @property
+    def stopped_early(self) -> bool:
+        return self.region_complete and not self.truncated
+
+    def content(self) -> bytes:
+        return bytes(self.body)
+
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Tests for the market analytics agent and its data pipeline
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the core directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+core_dir = os.path.join(current_dir, 'core')
+sys.path.insert(0, core_dir)
+
+from infrastructure.market_data_cache import MarketDataCache
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_market_data_cache_serves_stale_while_refreshing():
+    now = [datetime(2024, 1, 1)]
+    cache = MarketDataCache(freshness_seconds=60, stale_seconds=60, now=lambda: now[0])
+    calls = []
+    cache.register('product_trend', lambda niche: calls.append(niche) or {'version': len(calls)})
+
+    assert cache.get('Home Fitness', 'product_trend') == ({'version': 1}, MarketDataCache.MISS)
+    assert cache.get(' home  fitness', 'product_trend') == ({'version': 1}, MarketDataCache.FRESH)
+
+    # Stale: served immediately, refreshed once in the background
+    now[0] += timedelta(seconds=90)
+    assert cache.get('home fitness', 'product_trend') == ({'version': 1}, MarketDataCache.STALE)
+    assert wait_for(lambda: cache.snapshot()['refreshes'] == 1)
+    assert cache.get('home fitness', 'product_trend') == ({'version': 2}, MarketDataCache.FRESH)
+
+    # Too old to serve: reloaded inline
+    now[0] += timedelta(seconds=500)
+    assert cache.get('home fitness', 'product_trend') == ({'version': 3}, MarketDataCache.MISS)
+    assert calls == ['Home Fitness', 'home fitness', 'home fitness']
+    cache.shutdown()
+
+
+def test_market_data_cache_survives_restart_via_market_data(app):
+    from src.models import db
+    from src.models.niche import Niche
+    from src.models.agent_models import MarketData
+    from infrastructure.persistence import database_session
+
+    with app.app_context():
+        db.session.add(Niche(name='Home Fitness'))
+        db.session.commit()
+
+    session_factory = lambda: database_session(app)
+    first = MarketDataCache(freshness_seconds=3600, session_factory=session_factory)
+    first.register('competitor_analysis', lambda niche: {'opportunity_score': 0.68})
+    first.get('home fitness', 'competitor_analysis')
+    first.get('home fitness', 'competitor_analysis')
+
+    restarted = MarketDataCache(freshness_seconds=3600, session_factory=session_factory)
+    restarted.register('competitor_analysis', lambda niche: {'opportunity_score': 0.0})
+    assert restarted.get('Home Fitness', 'competitor_analysis') == ({'opportunity_score': 0.68}, MarketDataCache.FRESH)
+
+    with app.app_context():
+        rows = MarketData.query.all()
+        assert len(rows) == 1
+        assert rows[0].niche_id is not None and rows[0].expires_at > datetime.utcnow()
+    first.shutdown()
+    restarted.shutdown()
+
+
+def test_market_data_cache_matches_niches_exactly_and_bounds_lookups(app):
+    from src.models import db
+    from src.models.niche import Niche
+    from infrastructure.persistence import database_session
+
+    with app.app_context():
+        db.session.add(Niche(name='HomeXFitness'))
+        db.session.commit()
+
+    now = [datetime(2024, 1, 1)]
+    cache = MarketDataCache(freshness_seconds=60, stale_seconds=3600, recheck_seconds=300,
+                            session_factory=lambda: database_session(app), now=lambda: now[0])
+    cache.register('product_trend', lambda niche: {'niche': niche})
+
+    # '_' is not a wildcard: the niche is stored by name, not under HomeXFitness
+    cache.get('home_fitness', 'product_trend')
+    with database_session(app) as session:
+        assert cache._query(session, cache.make_key('home_fitness', 'product_trend'))[0] is None
+    assert cache._load_locks == {}
+
+    # A stale entry is rechecked against MarketData at most once per recheck_seconds
+    lookups = []
+    original_load = cache._load_stored
+    cache._load_stored = lambda key: lookups.append(key) or original_load(key)
+    cache.refresh_async = lambda niche, data_type: True
+    now[0] += timedelta(seconds=120)
+    for _ in range(5):
+        assert cache.get('home_fitness', 'product_trend')[1] == MarketDataCache.STALE
+    assert len(lookups) == 1
+    now[0] += timedelta(seconds=300)
+    cache.get('home_fitness', 'product_trend')
+    assert len(lookups) == 2
+    cache.shutdown()
+
+
+def test_market_research_reuses_cached_sub_analyses():
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    agent = MarketAnalyticsAgent()
+    calls = []
+    original = agent.fetch_trending_products
+    agent.market_data_cache.register('product_trend', lambda niche: calls.append(niche) or original(niche))
+
+    first = agent.perform_market_research({'niche': 'home fitness'})
+    second = agent.perform_market_research({'niche': 'home fitness'})
+
+    assert first['status'] == second['status'] == 'success'
+    assert first['data']['trending_products'] == second['data']['trending_products']
+    assert calls == ['home fitness']
+    agent.market_data_cache.shutdown()
+
+
+def test_market_research_fans_out_with_partial_results():
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    agent = MarketAnalyticsAgent()
+    agent.source_timeouts['competitor_analysis'] = 0.2
+
+    def slow_trends(data):
+        time.sleep(0.3)
+        return {'status': 'success', 'insights': {'overall_trend': 'upward'}}
+
+    def hung_competition(data):
+        time.sleep(1.0)
+        return {'status': 'success', 'analysis': {}}
+
+    def slow_products(data):
+        time.sleep(0.3)
+        raise ConnectionError('source unavailable')
+
+    agent.analyze_trends = slow_trends
+    agent.analyze_competition = hung_competition
+    agent.discover_trending_products = slow_products
+
+    started = time.monotonic()
+    result = agent.perform_market_research({'niche': 'home fitness'})
+    elapsed = time.monotonic() - started
+
+    assert result['status'] == 'success'
+    data = result['data']
+    assert data['partial'] is True
+    assert data['market_insights'] == {'overall_trend': 'upward'}
+    assert set(data['errors']) == {'trending_products', 'competitor_analysis'}
+    assert 'timed out' in data['errors']['competitor_analysis']
+    assert elapsed < 0.6  # concurrent: bounded by the slowest source, not the sum
+
+    agent.analyze_trends = lambda data: {'status': 'error', 'error': 'down'}
+    agent.source_timeouts['competitor_analysis'] = 0.01
+    assert agent.perform_market_research({'niche': 'home fitness'})['status'] == 'error'
+    agent.shutdown()
+
+
+def test_scheduled_analysis_refreshes_stale_niches_once_per_window(app):
+    from src.models import db
+    from src.models.niche import Niche
+    from src.models.agent_models import BlogInstance, AgentState
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    with app.app_context():
+        fitness = Niche(name='home fitness')
+        db.session.add_all([fitness, Niche(name='gardening'), Niche(name='retired', active=False)])
+        db.session.flush()
+        hidden = Niche(name='sleep', active=False)
+        db.session.add(hidden)
+        db.session.flush()
+        db.session.add(BlogInstance(name='Sleep Blog', niche_id=hidden.id, status='active'))
+        db.session.commit()
+
+    agent = MarketAnalyticsAgent()
+    agent.attach_app(app)
+    assert agent.active_niches() == ['gardening', 'home fitness', 'sleep']
+
+    # gardening is already fresh
+    for data_type in agent.SCHEDULED_DATA_TYPES:
+        agent.market_data_cache.put('gardening', data_type, {})
+
+    window_start = datetime(2024, 1, 1, 6, 30)
+    first = agent.perform_scheduled_analysis(now=window_start)
+    assert first['status'] == 'success'
+    assert sorted(first['refreshed']) == ['home fitness', 'sleep'] and first['fresh'] == 1
+    assert agent.perform_scheduled_analysis(now=window_start + timedelta(hours=5))['status'] == 'skipped'
+
+    # The window and watermarks survive a restart
+    restarted = MarketAnalyticsAgent()
+    restarted.attach_app(app)
+    assert restarted.restore_state()
+    assert restarted.state_data['last_analysis_window'] == '2024-01-01T06:00:00'
+    assert set(restarted.state_data['niche_watermarks']) == {'home fitness', 'sleep'}
+    assert restarted.perform_scheduled_analysis(now=window_start)['status'] == 'skipped'
+
+    # Next window: everything cached is still fresh, nothing is re-scraped
+    second = restarted.perform_scheduled_analysis(now=window_start + timedelta(hours=6))
+    assert second['status'] == 'success' and second['refreshed'] == {} and second['fresh'] == 3
+
+    # A niche that fails stays eligible within the window; finished niches are not redone
+    third_window = window_start + timedelta(hours=12)
+    restarted.stale_data_types = lambda niche: list(restarted.SCHEDULED_DATA_TYPES)
+    attempts = []
+    original_refresh = restarted.refresh_niche
+
+    def flaky_refresh(niche, data_types):
+        attempts.append(niche)
+        if niche == 'sleep' and attempts.count('sleep') == 1:
+            raise RuntimeError('source down')
+        return original_refresh(niche, data_types)
+
+    restarted.refresh_niche = flaky_refresh
+    third = restarted.perform_scheduled_analysis(now=third_window)
+    assert third['status'] == 'partial' and list(third['failed']) == ['sleep']
+    assert restarted.state_data['last_analysis_window'] == second['window']
+    assert restarted.perform_scheduled_analysis(now=third_window + timedelta(minutes=1))['status'] == 'skipped'
+
+    retry = restarted.perform_scheduled_analysis(now=third_window + timedelta(minutes=15))
+    assert retry['status'] == 'success' and list(retry['refreshed']) == ['sleep']
+    assert sorted(attempts) == ['gardening', 'home fitness', 'sleep', 'sleep']
+    assert restarted.perform_scheduled_analysis(now=third_window + timedelta(minutes=30))['status'] == 'skipped'
+
+    with app.app_context():
+        assert AgentState.query.filter_by(agent_name='market_analytics').count() == 1
+    agent.shutdown()
+    restarted.shutdown()
+
+
+def test_trend_engine_scores_many_series_in_one_pass():
+    import numpy as np
+    from analytics.trend_engine import TrendEngine
+
+    engine = TrendEngine(season_length=7)
+    days = np.arange(28)
+    series = {
+        'rising': 100 + 10 * days,
+        'falling': 500 - 10 * days,
+        'flat': np.full(28, 200.0),
+        'weekly': 300 + 50 * np.sin(2 * np.pi * days / 7),
+        'spike': np.concatenate([np.full(27, 100.0) + (days[:27] % 3), [400.0]]),
+        'new': np.array([10.0, 12.0])
+    }
+    keys = [name for name, values in series.items() for _ in values]
+    values = np.concatenate(list(series.values()))
+
+    scores = engine.score_series(keys, values)
+
+    assert scores['rising']['trend_score'] > 0.8 > 0.2 > scores['falling']['trend_score']
+    assert abs(scores['flat']['trend_score'] - 0.5) < 1e-9
+    assert scores['weekly']['seasonality'] > 0.5 > scores['rising']['seasonality']
+    assert scores['spike']['anomaly'] and not scores['rising']['anomaly']
+    assert scores['new']['observations'] == 2
+    assert scores['new']['confidence_score'] < scores['rising']['confidence_score']
+
+
+def test_trend_scores_written_back_to_market_data(app):
+    from src.models import db
+    from src.models.agent_models import MarketData
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    with app.app_context():
+        base = datetime(2024, 1, 1)
+        for day in range(10):
+            for name, volume in (('Rowing Machine', 1000 + 200 * day), ('Ab Roller', 5000 - 300 * day)):
+                db.session.add(MarketData(data_type='product_observation', source='amazon', product_name=name,
+                                          data_payload={'search_volume': volume},
+                                          created_at=base + timedelta(days=day)))
+        db.session.commit()
+
+    agent = MarketAnalyticsAgent()
+    agent.attach_app(app)
+    assert agent.score_market_trends()['products_scored'] == 2
+
+    with app.app_context():
+        latest = {
+            row.product_name: row for row in
+            MarketData.query.filter(MarketData.confidence_score > 0).all()
+        }
+        assert set(latest) == {'Rowing Machine', 'Ab Roller'}
+        assert latest['Rowing Machine'].created_at == datetime(2024, 1, 10)
+        assert latest['Rowing Machine'].trend_score > 0.7 > 0.3 > latest['Ab Roller'].trend_score
+
+    agent.market_data_cache.put('home fitness', 'product_trend', [
+        {'name': 'Rowing Machine', 'trend_score': 0.1},
+        {'name': 'Ab Roller', 'trend_score': 0.95}
+    ])
+    products = agent.discover_trending_products({'niche': 'home fitness'})['products']
+    assert [product['name'] for product in products] == ['Rowing Machine']
+    agent.shutdown()
+
+
+def test_sentiment_engine_handles_negation_and_batches():
+    from analytics.sentiment_engine import SentimentEngine
+
+    engine = SentimentEngine()
+    scores = engine.score([
+        'Great headphones',
+        'Not great, honestly',
+        'Not bad at all',
+        'Not cheap. But really excellent',
+        'arrived on tuesday',
+        ''
+    ])
+    assert scores[0] > 0.3 and scores[1] < 0 and scores[2] > 0 and scores[3] > 0.3
+    assert scores[4] == scores[5] == 0.0
+    # Negation stops at clause boundaries
+    assert engine.score(['not happy'])[0] < 0 < engine.score(['not slow. happy'])[0]
+
+    reviews = [
+        'Great value for money and excellent build quality.',
+        'Excellent build quality, great value for money!',
+        'Shipping delays and a complex setup process. Disappointed.',
+        'Terrible: complex setup process, shipping delays.',
+        'It arrived.'
+    ] * 2000
+    result = engine.analyze(reviews)
+    assert result['reviews_analyzed'] == 10000
+    assert (result['positive_mentions'], result['negative_mentions'], result['neutral_mentions']) == (4000, 4000, 2000)
+    assert set(result['key_positive_themes'][:2]) == {'great value', 'excellent build'}
+    assert {'complex setup', 'shipping delays'} <= set(result['key_negative_themes'])
+
+
+def test_market_sentiment_uses_review_texts():
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    agent = MarketAnalyticsAgent()
+    result = agent.analyze_market_sentiment({
+        'target': 'Rowing Machine',
+        'reviews': [{'text': 'Sturdy and quiet, highly recommend'}, 'Works great, easy to assemble']
+    })
+    assert result['status'] == 'success'
+    assert result['sentiment']['overall_sentiment'] == 'positive'
+    assert agent.analyze_market_sentiment({'target': 'Unknown'})['status'] == 'error'
+    agent.shutdown()
+
+
+def test_top_k_ranker_streams_and_dedupes():
+    import random
+    from analytics.ranking import TopKRanker
+
+    def feed():
+        rng = random.Random(7)
+        for index in range(20000):
+            yield {'name': f'Product {index % 5000}', 'trend_score': rng.random(), 'source': f'feed{index % 4}'}
+        yield {'name': '  PRODUCT-42 ', 'trend_score': 5.0, 'source': 'late'}
+
+    ranker = TopKRanker(10, min_score=0.5).extend(feed())
+    top = ranker.results()
+
+    assert len(top) == 10 and len(ranker._heap) <= 20
+    assert top[0]['source'] == 'late'
+    assert len({product['name'].strip().lower().replace('-', ' ') for product in top}) == 10
+    assert [product['trend_score'] for product in top] == sorted((p['trend_score'] for p in top), reverse=True)
+
+    # Matches a full sort over the best report of each product
+    best = {}
+    rng = random.Random(7)
+    for index in range(20000):
+        name, score = f'product {index % 5000}', rng.random()
+        best[name] = max(best.get(name, 0), score)
+    best['product 42'] = 5.0
+    expected = sorted((score for score in best.values() if score >= 0.5), reverse=True)[:10]
+    assert [product['trend_score'] for product in top] == expected
+
+    # Ties keep the earlier candidate
+    tied = TopKRanker(1).extend([{'name': 'a', 'trend_score': 1.0}, {'name': 'b', 'trend_score': 1.0}])
+    assert [product['name'] for product in tied.results()] == ['a']
+
+
+def test_timeseries_store_ranges_rollups_and_reload(tmp_path):
+    from infrastructure.timeseries_store import TimeSeriesStore
+
+    store = TimeSeriesStore(root_dir=str(tmp_path))
+    start = datetime(2024, 3, 1)
+    for minute in range(0, 180, 15):
+        store.append('Rowing Machine', 'price', start + timedelta(minutes=minute), 300 - minute / 15)
+    store.append('Rowing Machine', 'price', start + timedelta(minutes=5), 999.0)  # late arrival
+
+    timestamps, values = store.range('Rowing Machine', 'price', start, start + timedelta(hours=1))
+    assert len(values) == 5 and values[1] == 999.0
+    assert (timestamps[1:] >= timestamps[:-1]).all()
+
+    hourly = store.rollup('Rowing Machine', 'price', 'hourly')
+    assert hourly['count'].tolist() == [5, 4, 4]
+    assert hourly['high'][0] == 999.0 and hourly['close'][2] == 289.0
+    assert store.rollup('Rowing Machine', 'price', 'daily')['count'].tolist() == [13]
+
+    # Scoring reads a bounded window of each column
+    assert store.value_columns('price', last=3)['Rowing Machine'].tolist() == [291.0, 290.0, 289.0]
+    assert len(store.value_columns('price', since=start + timedelta(hours=2))['Rowing Machine']) == 4
+
+    # Appends are buffered until flushed
+    assert not os.listdir(str(tmp_path))
+    store.flush()
+
+    reloaded = TimeSeriesStore(root_dir=str(tmp_path))
+    assert reloaded.products('price') == ['Rowing Machine']
+    assert reloaded.range('Rowing Machine', 'price')[1].tolist() == store.range('Rowing Machine', 'price')[1].tolist()
+
+
+def test_trend_scoring_reads_observation_columns(app, tmp_path):
+    from src.models import db
+    from src.models.agent_models import MarketData
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    def add_days(days, offset=0):
+        with app.app_context():
+            for day in days:
+                db.session.add(MarketData(data_type='product_observation', source='amazon',
+                                          product_name='Kettlebell',
+                                          data_payload={'search_volume': 100 + 50 * day, 'price': 40.0 + day},
+                                          created_at=datetime(2024, 1, 1) + timedelta(days=day)))
+            db.session.commit()
+
+    agent = MarketAnalyticsAgent(timeseries_dir=str(tmp_path))
+    agent.attach_app(app)
+    add_days(range(5))
+    assert agent.score_market_trends()['products_scored'] == 1
+    add_days(range(5, 8))
+    agent.score_market_trends()
+
+    # Only new rows are decoded on the second pass
+    assert len(agent.timeseries.get('Kettlebell', 'search_volume')) == 8
+    assert agent.timeseries.last_ingested_id == 8
+
+    # A restarted store resumes after the rows its files already hold
+    from infrastructure.timeseries_store import TimeSeriesStore
+    restarted = TimeSeriesStore(root_dir=str(tmp_path))
+    assert restarted.last_ingested_id == 8
+    assert restarted.ingest_market_data(agent.db_session, 'product_observation', ['search_volume', 'price']) == 0
+    assert len(restarted.get('Kettlebell', 'search_volume')) == 8
+
+    history = agent.get_metric_history({'product_name': 'Kettlebell', 'metric': 'price'})
+    assert [point['close'] for point in history['points']] == [40.0 + day for day in range(8)]
+    assert history['points'][0]['timestamp'] == '2024-01-01T00:00:00'
+
+    with app.app_context():
+        latest = MarketData.query.order_by(MarketData.id.desc()).first()
+        assert latest.trend_score > 0.5 and latest.confidence_score > 0
+    agent.shutdown()
+
+
+def test_price_watch_stores_only_changes_and_alerts(app):
+    from src.models import db
+    from src.models.product import Product
+    from src.models.agent_models import MarketData
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    with app.app_context():
+        db.session.add_all([
+            Product(name='Rowing Machine', price=300.0, source_url='https://shop.example/rower'),
+            Product(name='Kettlebell', price=40.0, source_url='https://shop.example/kettlebell'),
+            Product(name='Yoga Mat', price=None, source_url='https://shop.example/mat'),
+            Product(name='Offline Item', price=10.0)
+        ])
+        db.session.commit()
+
+    agent = MarketAnalyticsAgent()
+    agent.attach_app(app)
+    now = [1000.0]
+    agent.price_watcher.clock = lambda: now[0]
+    prices = {'https://shop.example/rower': 300.0, 'https://shop.example/kettlebell': 40.1,
+              'https://shop.example/mat': 25.0}
+    agent.fetch_product_price = lambda url: prices[url]
+    agent.price_watcher.fetch_price = lambda url: agent.fetch_product_price(url)
+    decisions = []
+    agent.make_autonomous_decision = lambda data: decisions.append(data)
+
+    first = agent.monitor_prices({'sync': True})
+    assert (first['checked'], first['changed'], first['alerts']) == (3, 1, [])  # only the mat's first price
+
+    # Nothing is due until the check interval passes
+    assert agent.monitor_prices()['checked'] == 0
+
+    now[0] += agent.price_watcher.check_interval
+    prices['https://shop.example/rower'] = 249.0
+    second = agent.monitor_prices()
+    assert second['changed'] == 1 and second['alerts'][0]['change_percent'] == -17.0
+    assert decisions[0]['type'] == 'market_alert' and decisions[0]['changes'][0]['product_name'] == 'Rowing Machine'
+
+    with app.app_context():
+        deltas = MarketData.query.filter_by(data_type='price_change').all()
+        assert sorted(row.product_name for row in deltas) == ['Rowing Machine', 'Yoga Mat']
+        assert db.session.get(Product, 1).price == 249.0 and db.session.get(Product, 2).price == 40.0
+
+    assert agent.timeseries.range('Rowing Machine', 'price')[1].tolist() == [249.0]
+    agent.shutdown()
+
+
+def test_price_watch_keeps_baseline_when_commit_fails():
+    import threading
+    from scrapers.price_watch import PriceWatcher
+    from agents.market_analytics_agent import MarketAnalyticsAgent
+
+    prices = {'https://shop.example/rower': 250.0}
+    watcher = PriceWatcher(lambda url: prices[url], clock=lambda: 0.0, check_interval=0)
+    watcher.track(1, 'Rowing Machine', 'https://shop.example/rower', last_price=300.0)
+    outcomes = [False, True]
+    watcher.record_changes = lambda changes: outcomes.pop(0)
+
+    failed = watcher.run_due()
+    assert failed['changed'] == [] and failed['alerts'] == []
+    assert watcher.products[1].last_price == 300.0 and watcher.stats['record_failures'] == 1
+
+    # The same move is detected again and only then becomes the baseline
+    retried = watcher.run_due()
+    assert retried['changed'][0]['old_price'] == 300.0
+    assert watcher.products[1].last_price == 250.0
+
+    # Price passes run off the loop thread, one at a time
+    agent = MarketAnalyticsAgent()
+    release = threading.Event()
+    agent.monitor_prices = lambda monitoring_data=None: release.wait(2)
+    assert agent.schedule_price_check() and not agent.schedule_price_check()
+    release.set()
+    assert wait_for(lambda: agent.price_watch_pass.done())
+    assert agent.schedule_price_check()
+    agent.shutdown()
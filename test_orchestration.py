@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Tests for the orchestration infrastructure used by the agent system
+"""
+
+import os
+import sys
+
+# Add the core directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+core_dir = os.path.join(current_dir, 'core')
+sys.path.insert(0, core_dir)
+
+from infrastructure.capability_index import CapabilityIndex
+
+
+def test_capability_index_tracks_registration_and_status():
+    index = CapabilityIndex()
+    index.add_agent('market_a', ['market_research', 'trend_analysis'])
+    index.add_agent('market_b', ['market_research'])
+
+    assert sorted(index.agents_for('market_research')) == ['market_a', 'market_b']
+    assert index.agents_for('trend_analysis') == ['market_a']
+
+    index.set_active('market_a', False)
+    assert index.agents_for('market_research') == ['market_b']
+    assert index.agents_for('trend_analysis') == []
+
+    index.set_active('market_a', True)
+    index.remove_agent('market_b')
+    assert index.agents_for('market_research') == ['market_a']
+    assert index.select('content_generation') is None
+
+
+def test_capability_index_prefers_less_loaded_agents():
+    index = CapabilityIndex(strategy='least_loaded')
+    index.add_agent('fast', ['content_generation'])
+    index.add_agent('slow', ['content_generation'])
+
+    for task_id in ('t1', 't2', 't3'):
+        index.task_started('slow', task_id)
+
+    assert index.select('content_generation') == 'fast'
+    assert index.select('content_generation', exclude=['fast']) == 'slow'
+
+    assert index.task_finished('slow', 't1') is not None
+    assert index.get_load('slow')['in_flight'] == 2
+
+
+def test_power_of_two_choices_spreads_work():
+    index = CapabilityIndex()
+    agents = [f'agent_{i}' for i in range(8)]
+    for name in agents:
+        index.add_agent(name, ['market_research'])
+
+    for i in range(400):
+        index.task_started(index.select('market_research'), f'task_{i}')
+
+    in_flight = [index.get_load(name)['in_flight'] for name in agents]
+    assert sum(in_flight) == 400
+    assert max(in_flight) - min(in_flight) <= 4
+
+
+def test_lazy_payload_truncates_large_dicts():
+    from infrastructure.logging_setup import LazyPayload
+
+    rendered = str(LazyPayload({'items': list(range(1000))}, max_length=50))
+    assert rendered.startswith('{"items": [0, 1, 2')
+    assert rendered.endswith('chars truncated]')
+    assert str(LazyPayload({'type': 'ping'})) == '{"type": "ping"}'
+
+    # Rendered as of the log call, even if the caller mutates the dict before the listener formats it
+    state = {'status': 'idle'}
+    payload = LazyPayload(state)
+    state['status'] = 'busy'
+    state['extra'] = 1
+    assert str(payload) == '{"status": "idle"}'
+
+
+def test_sampling_filter_rate_limits_per_message_template():
+    import logging
+    from infrastructure.logging_setup import SamplingFilter
+
+    sampler = SamplingFilter(sample_rates={'agents.noisy': 10}, rate_limits={'orchestrator': 5.0})
+
+    def record(name, msg, level=logging.INFO):
+        return logging.LogRecord(name, level, __file__, 0, msg, (), None)
+
+    kept = sum(sampler.filter(record('agents.noisy.worker', 'tick %s')) for _ in range(100))
+    assert kept == 10
+
+    kept = sum(sampler.filter(record('orchestrator.orchestrator', 'Received %s')) for _ in range(100))
+    assert kept == 5
+    assert sampler.filter(record('orchestrator.orchestrator', 'Task %s completed'))
+    assert sampler.filter(record('orchestrator.orchestrator', 'Received %s', logging.WARNING))
+    assert sampler.filter(record('MessageBroker', 'anything'))
+
+    # Per-template state is bounded; the least recently seen templates are dropped
+    bounded = SamplingFilter(rate_limits={'orchestrator': 5.0}, max_keys=3)
+    for n in range(50):
+        bounded.filter(record('orchestrator.orchestrator', f'Task {n} completed'))
+    assert len(bounded._buckets) == 3
+    assert list(bounded._buckets)[-1] == ('orchestrator.orchestrator', 'Task 49 completed')
+
+
+def build_content_workflow(workflow_id='wf_test'):
+    from infrastructure.workflow_engine import Workflow, WorkflowNode
+
+    return Workflow(workflow_id, [
+        WorkflowNode('market', 'market_research', 'market_research'),
+        WorkflowNode('seo', 'keyword_research', 'seo_optimization'),
+        WorkflowNode('content', 'content_generation', 'content_generation',
+                     depends_on=['market', 'seo'], allow_partial=True)
+    ], context={'blog_instance_id': 1, 'priority': 5})
+
+
+def test_workflow_engine_dispatches_dependents_with_upstream_results():
+    from infrastructure.workflow_engine import WorkflowEngine
+
+    dispatched = []
+
+    def dispatch(workflow, node):
+        dispatched.append((node.node_id, workflow.upstream_results(node)))
+        return True
+
+    engine = WorkflowEngine(dispatch)
+    workflow = engine.start(build_content_workflow())
+
+    # Independent research branches go out together; content waits for both
+    assert sorted(node_id for node_id, _ in dispatched) == ['market', 'seo']
+
+    engine.handle_task_result('wf_test_market', {'status': 'success', 'data': {'niche': 'fitness'}})
+    assert len(dispatched) == 2
+
+    engine.handle_task_result('wf_test_seo', {'status': 'success', 'keywords': ['rowing machine']})
+    assert dispatched[-1] == ('content', {
+        'market': {'status': 'success', 'data': {'niche': 'fitness'}},
+        'seo': {'status': 'success', 'keywords': ['rowing machine']}
+    })
+
+    engine.handle_task_result('wf_test_content', {'status': 'success'})
+    assert workflow.status == 'completed'
+    assert engine.get_workflow('wf_test') is None
+
+
+def test_workflow_engine_handles_failures_and_missing_agents():
+    import pytest
+    from infrastructure.workflow_engine import WorkflowEngine, Workflow, WorkflowNode, WorkflowError
+
+    # No SEO agent: the node is skipped and content still runs on partial inputs
+    engine = WorkflowEngine(lambda workflow, node: node.capability != 'seo_optimization')
+    workflow = engine.start(build_content_workflow())
+    assert workflow.nodes['seo'].status == 'skipped'
+
+    engine.handle_task_result('wf_test_market', None, error='scraper down')
+    assert workflow.nodes['content'].status == 'dispatched'
+
+    # A required dependency failing blocks the dependent
+    strict = Workflow('wf_strict', [
+        WorkflowNode('a', 'market_research', 'market_research'),
+        WorkflowNode('b', 'content_generation', 'content_generation', depends_on=['a'])
+    ])
+    strict_engine = WorkflowEngine(lambda workflow, node: True)
+    strict_engine.start(strict)
+    strict_engine.handle_task_result('wf_strict_a', {'status': 'error', 'error': 'boom'})
+    assert strict.nodes['b'].status == 'failed'
+    assert strict.status == 'failed'
+
+    with pytest.raises(WorkflowError):
+        Workflow('wf_cycle', [
+            WorkflowNode('a', 'x', 'x', depends_on=['b']),
+            WorkflowNode('b', 'x', 'x', depends_on=['a'])
+        ])
+
+
+def test_workflow_state_persists_to_agent_tasks(app):
+    from infrastructure.persistence import database_session
+    from infrastructure.workflow_engine import Workflow, WorkflowNode, WorkflowEngine
+    from src.models.agent_models import AgentTask
+
+    engine = WorkflowEngine(lambda workflow, node: True, session_factory=lambda: database_session(app))
+    engine.start(build_content_workflow('wf_db'))
+    engine.handle_task_result('wf_db_market', {'status': 'success'})
+    engine.start(Workflow('wf_done', [WorkflowNode('only', 'market_research', 'market_research')]))
+    engine.handle_task_result('wf_done_only', {'status': 'success'})
+
+    with app.app_context():
+        tasks = {task.task_data['node_id']: task for task in AgentTask.query.all()}
+        assert tasks['market'].status == 'completed'
+        assert tasks['seo'].status == 'in_progress'
+        assert tasks['content'].status == 'pending'
+        assert tasks['content'].task_data['depends_on'] == ['market', 'seo']
+
+    # A fresh engine picks the workflow back up and re-dispatches in-flight work
+    redispatched = []
+    restored_engine = WorkflowEngine(
+        lambda workflow, node: redispatched.append(node.node_id) or True,
+        session_factory=lambda: database_session(app)
+    )
+    assert restored_engine.restore() == 1
+    assert redispatched == ['seo']
+
+    restored_engine.handle_task_result('wf_db_seo', {'status': 'success'})
+    assert redispatched == ['seo', 'content']
+
+    restored_engine.handle_task_result('wf_db_content', {'status': 'success'})
+
+    # Restored before any agent re-registered: nodes stay pending instead of being skipped
+    engine.start(build_content_workflow('wf_early'))
+    agents = set()
+    early_dispatched = []
+
+    def dispatch_when_registered(workflow, node):
+        if node.capability not in agents:
+            return False
+        early_dispatched.append(node.node_id)
+        return True
+
+    early_engine = WorkflowEngine(dispatch_when_registered, session_factory=lambda: database_session(app))
+    assert early_engine.restore() == 1
+    with app.app_context():
+        statuses = {task.task_data['node_id']: task.status for task in AgentTask.query.all()
+                    if task.task_data['workflow_id'] == 'wf_early'}
+        assert statuses == {'market': 'pending', 'seo': 'pending', 'content': 'pending'}
+
+    agents.update(['market_research', 'seo_optimization'])
+    assert early_engine.retry_pending(['market_research']) == 1
+    assert early_engine.retry_pending() == 1
+    assert early_dispatched == ['market', 'seo']
+    early_engine.handle_task_result('wf_early_market', {'status': 'success'})
+    early_engine.handle_task_result('wf_early_seo', {'status': 'success'})
+    assert early_engine.get_workflow('wf_early').nodes['content'].status == 'pending'
+    agents.add('content_generation')
+    assert early_engine.retry_pending() == 1 and early_dispatched[-1] == 'content'
+
+
+def make_decision(decision_type, impact_level, agent_name='market_analytics', **decision_data):
+    return {
+        'decision_type': decision_type,
+        'agent_name': agent_name,
+        'impact_level': impact_level,
+        'decision_data': decision_data,
+        'requires_approval': impact_level != 'low'
+    }
+
+
+def test_approval_rules_decide_pending_requests_in_one_pass():
+    from infrastructure.approval_store import ApprovalStore, ApprovalRulesEngine, DEFAULT_APPROVAL_RULES
+
+    store = ApprovalStore()
+    low = store.add(make_decision('content_priority_adjustment', 'low'))
+    small_alert = store.add(make_decision('market_trend_alert', 'medium', change_percent=4))
+    big_alert = store.add(make_decision('market_trend_alert', 'medium', change_percent=40))
+    spend = store.add(make_decision('budget_allocation', 'high', agent_name='monetization'))
+
+    rules = ApprovalRulesEngine(DEFAULT_APPROVAL_RULES + [
+        {'name': 'small_trend_alerts', 'action': 'approve',
+         'match': {'decision_type': 'market_trend_alert', 'impact_level': 'medium'},
+         'conditions': [('decision_data.change_percent', '<', 10)]},
+        {'name': 'no_unreviewed_spend', 'action': 'reject',
+         'match': {'agent_name': 'monetization'}}
+    ])
+    outcome = rules.evaluate(store)
+
+    assert sorted(outcome['approve']) == sorted([(low, 'auto_approve_low_impact'), (small_alert, 'small_trend_alerts')])
+    assert outcome['reject'] == [(spend, 'no_unreviewed_spend')]
+
+    store.set_status([decision_id for decision_id, _ in outcome['approve']], 'approved', 'auto')
+    assert sorted(d['decision_id'] for d in store.query(status='pending')) == sorted([big_alert, spend])
+    assert store.query(status='pending', impact='high', agent='monetization')[0]['decision_id'] == spend
+    assert store.evict('approved') == 2
+    assert store.count('pending') == 2
+
+
+def test_approval_store_syncs_with_agent_decisions(app):
+    from infrastructure.approval_store import ApprovalStore
+    from infrastructure.persistence import database_session
+    from src.models import db
+    from src.models.agent_models import AgentDecision
+
+    store = ApprovalStore(session_factory=lambda: database_session(app))
+    first = store.add(make_decision('market_trend_alert', 'medium'))
+    second = store.add(make_decision('content_publish', 'high'))
+
+    # A restarted store sees the requests still pending in the database
+    restarted = ApprovalStore(session_factory=lambda: database_session(app))
+    assert sorted(d['decision_id'] for d in restarted.query(status='pending', impact='high')) == [second]
+    assert restarted.count('pending') == 2
+
+    with app.app_context():
+        assert AgentDecision.query.filter_by(approval_status='pending').count() == 2
+        # Someone approves through the API
+        db.session.get(AgentDecision, int(second)).approval_status = 'approved'
+        db.session.commit()
+
+    changed = store.refresh(force=True)
+    assert [d['decision_id'] for d in changed] == [second]
+
+    store.set_status([first], 'rejected', 'admin', reason='not now')
+    with app.app_context():
+        rejected = db.session.get(AgentDecision, int(first))
+        assert rejected.approval_status == 'rejected'
+        assert rejected.decision_data['rejection_reason'] == 'not now'
+
+
+def test_bulk_approve_endpoint_updates_matching_decisions(app):
+    from src.models import db
+    from src.models.agent_models import AgentDecision
+    from src.routes.agent_routes import agent_bp
+
+    app.register_blueprint(agent_bp, url_prefix='/api')
+    with app.app_context():
+        for impact in ('low', 'low', 'high'):
+            db.session.add(AgentDecision(agent_name='market_analytics', decision_type='alert',
+                                         decision_data={}, impact_level=impact))
+        db.session.commit()
+
+    client = app.test_client()
+    response = client.post('/api/decisions/bulk-approve', json={'filter': {'impact_level': 'low'}, 'approved_by': 'ops'})
+    assert response.status_code == 200
+    assert response.get_json()['decision_ids'] == [1, 2]
+
+    response = client.post('/api/decisions/bulk-reject', json={'decision_ids': [1, 3], 'reason': 'too risky'})
+    assert response.get_json()['decision_ids'] == [3]
+
+    with app.app_context():
+        statuses = [d.approval_status for d in AgentDecision.query.order_by(AgentDecision.id)]
+        assert statuses == ['approved', 'approved', 'rejected']
+        assert db.session.get(AgentDecision, 3).decision_data == {'rejection_reason': 'too risky'}
+
+
+def test_orchestrator_loads_pending_approvals_once_the_app_is_attached(app):
+    from agents.orchestrator_agent import OrchestratorAgent
+    from infrastructure.approval_store import ApprovalStore
+    from infrastructure.persistence import database_session
+
+    earlier = ApprovalStore(session_factory=lambda: database_session(app))
+    pending = earlier.add(make_decision('content_publish', 'high'))
+
+    # The agent manager constructs agents before attaching the app
+    orchestrator = OrchestratorAgent()
+    assert orchestrator.approval_store.count('pending') == 0
+    orchestrator.attach_app(app)
+    assert [d['decision_id'] for d in orchestrator.approval_store.query(status='pending')] == [pending]
+
+    # A store whose database only becomes reachable later loads on its next refresh
+    app_ref = [None]
+    late = ApprovalStore(session_factory=lambda: database_session(app_ref[0]))
+    app_ref[0] = app
+    late.refresh(force=True)
+    assert late.count('pending') == 1
+
+
+def test_timer_wheel_expires_only_passed_deadlines():
+    import random
+    from infrastructure.timer_wheel import HierarchicalTimerWheel
+
+    wheel = HierarchicalTimerWheel(tick=1.0, start_time=0.0)
+    deadlines = {f'agent_{i}': random.Random(i).randint(1, 20000) for i in range(500)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+
+    # Heartbeats push some deadlines out before they expire
+    wheel.schedule('agent_0', 30000)
+    deadlines['agent_0'] = 30000
+    wheel.cancel('agent_1')
+    del deadlines['agent_1']
+
+    fired = {}
+    for now in range(0, 30010, 7):
+        for key in wheel.advance(now):
+            fired[key] = now
+
+    assert set(fired) == set(deadlines)
+    for key, deadline in deadlines.items():
+        assert deadline <= fired[key] < deadline + 7
+    assert len(wheel) == 0
+
+
+def test_orchestrator_fails_over_unresponsive_agents():
+    from agents.orchestrator_agent import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent()
+    sent, broadcasts = [], []
+    orchestrator.send_message = lambda agent, message: sent.append((agent, message)) or True
+    orchestrator.broadcast_message = lambda message: broadcasts.append(message) or True
+
+    now = [orchestrator.clock()]
+    orchestrator.clock = lambda: now[0]
+
+    for name in ('writer_a', 'writer_b'):
+        orchestrator.register_agent({'agent_name': name, 'agent_type': 'content', 'capabilities': ['content_generation']})
+
+    result = orchestrator.coordinate_content_generation({'blog_instance_id': 1})
+    busy_agent = result['workflow']['nodes']['content']['assigned_agent']
+    other_agent = 'writer_b' if busy_agent == 'writer_a' else 'writer_a'
+
+    # Only the agent holding the task goes quiet
+    now[0] += orchestrator.heartbeat_timeout - 60
+    orchestrator.record_heartbeat(other_agent)
+    assert orchestrator.check_agent_liveness() == []
+
+    now[0] += 120
+    assert orchestrator.check_agent_liveness() == [busy_agent]
+    assert broadcasts[-1]['type'] == 'agent_unresponsive'
+    assert broadcasts[-1]['requeued_tasks'] == 1
+    assert orchestrator.find_agents_by_capability('content_generation') == [other_agent]
+    assert sent[-1][0] == other_agent
+
+    report = orchestrator.perform_system_health_check()
+    assert report['overall_status'] == 'degraded'
+    assert report['agents'][busy_agent]['status'] == 'unresponsive'
+
+    orchestrator.record_heartbeat(busy_agent)
+    assert orchestrator.perform_system_health_check()['overall_status'] == 'healthy'
+
+
+def test_result_cache_single_flight_and_ttl():
+    from infrastructure.result_cache import ResultCache
+
+    now = [0.0]
+    cache = ResultCache(ttl_seconds=60, clock=lambda: now[0])
+    key = ResultCache.make_key('market_research', {'niche': ' Home  Fitness', 'task_id': 'a', 'blog_instance_id': 1})
+    assert key == ResultCache.make_key('market_research', {'blog_instance_id': 1, 'niche': 'home fitness', 'task_id': 'b'})
+
+    assert cache.lookup(key, 'a') == (ResultCache.LEADER, None)
+    assert cache.lookup(key, 'b') == (ResultCache.JOINED, 'a')
+    assert cache.lookup(key, 'a') == (ResultCache.LEADER, None)
+    assert cache.resolve(key, {'status': 'success'}) == ['b']
+    assert cache.lookup(key, 'c') == (ResultCache.HIT, {'status': 'success'})
+
+    now[0] = 61.0
+    assert cache.lookup(key, 'd') == (ResultCache.LEADER, None)
+    assert cache.fail(key) == []
+    assert cache.get(key) is None
+
+    # A leader that never reports back stops blocking the key after inflight_ttl
+    cache = ResultCache(ttl_seconds=60, inflight_ttl=30, clock=lambda: now[0])
+    assert cache.lookup(key, 'e') == (ResultCache.LEADER, None)
+    assert cache.lookup(key, 'f') == (ResultCache.JOINED, 'e')
+    now[0] += 31
+    assert cache.lookup(key, 'g') == (ResultCache.LEADER, None)
+    assert cache.waiting(key) == ['f']
+    now[0] += 31
+    assert cache.expire_inflight() == [(key, 'g', ['f'])]
+    assert cache.snapshot()['inflight'] == 0 and cache.snapshot()['stale_inflight'] == 2
+
+
+def test_concurrent_workflows_share_one_research_run():
+    from agents.orchestrator_agent import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent()
+    sent = []
+    orchestrator.send_message = lambda agent, message: sent.append(message) or True
+    orchestrator.broadcast_message = lambda message: True
+    orchestrator.register_agent({'agent_name': 'market_analytics', 'agent_type': 'market_analytics',
+                                 'capabilities': ['market_research']})
+    orchestrator.register_agent({'agent_name': 'writer', 'agent_type': 'content',
+                                 'capabilities': ['content_generation']})
+
+    first = orchestrator.coordinate_content_generation({'blog_instance_id': 7})['workflow_id']
+    second = orchestrator.coordinate_content_generation({'blog_instance_id': 7})['workflow_id']
+    assert [message['task_type'] for message in sent] == ['market_research']
+
+    orchestrator.handle_task_result({
+        'task_id': f'{first}_market', 'workflow_id': first, 'result': {'status': 'success', 'data': {'niche': 'fitness'}}
+    }, 'market_analytics')
+
+    content_tasks = [message for message in sent if message['task_type'] == 'content_generation']
+    assert sorted(task['workflow_id'] for task in content_tasks) == sorted([first, second])
+    for task in content_tasks:
+        assert task['upstream_results']['market']['data'] == {'niche': 'fitness'}
+
+    # A later workflow for the same blog is served from the cache without dispatching research
+    orchestrator.coordinate_content_generation({'blog_instance_id': 7})
+    assert [message['task_type'] for message in sent].count('market_research') == 1
+    assert orchestrator.research_cache.snapshot()['hits'] == 1
+
+
+def test_cancelling_the_leading_workflow_keeps_shared_research_running():
+    from agents.orchestrator_agent import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent()
+    sent, broadcasts = [], []
+    orchestrator.send_message = lambda agent, message: sent.append(message) or True
+    orchestrator.broadcast_message = lambda message: broadcasts.append(message) or True
+    orchestrator.register_agent({'agent_name': 'market_analytics', 'agent_type': 'market_analytics',
+                                 'capabilities': ['market_research']})
+    orchestrator.register_agent({'agent_name': 'writer', 'agent_type': 'content',
+                                 'capabilities': ['content_generation']})
+
+    first = orchestrator.coordinate_content_generation({'blog_instance_id': 7})['workflow_id']
+    second = orchestrator.coordinate_content_generation({'blog_instance_id': 7})['workflow_id']
+    research = [message for message in sent if message['task_type'] == 'market_research']
+    assert [task['cancel_token'] for task in research] == [f'shared:{first}_market']
+
+    def cancels():
+        return [message['cancel_token'] for message in broadcasts if message['type'] == 'cancel_tasks']
+
+    orchestrator.cancel_workflow(first, 'user request')
+    assert cancels() == [first]
+
+    orchestrator.handle_task_result({
+        'task_id': f'{first}_market', 'workflow_id': first, 'result': {'status': 'success', 'data': {}}
+    }, 'market_analytics')
+    content_tasks = [message for message in sent if message['task_type'] == 'content_generation']
+    assert [task['workflow_id'] for task in content_tasks] == [second]
+
+    # With nobody else waiting, cancelling the leader cancels the shared task too
+    orchestrator.research_cache.invalidate()
+    third = orchestrator.coordinate_content_generation({'blog_instance_id': 7})['workflow_id']
+    orchestrator.cancel_workflow(third)
+    assert cancels()[-2:] == [f'shared:{third}_market', third]
+    assert orchestrator.research_leaders == {}
+
+
+def test_agents_drop_cancelled_and_expired_work():
+    from datetime import datetime, timedelta
+    from agents.base_agent import BaseAgent
+    from infrastructure.cancellation import CancellationToken, current_token
+    from scrapers.base_scraper import BaseScraper
+
+    class RecordingAgent(BaseAgent):
+        def __init__(self):
+            super().__init__('worker', 'test')
+            self.executed = []
+
+        def get_capabilities(self):
+            return ['testing']
+
+        def execute_task(self, task_data):
+            self.executed.append((task_data['task_id'], current_token().token_id))
+            return {'status': 'success'}
+
+    agent = RecordingAgent()
+    sent = []
+    agent.send_message = lambda recipient, message: sent.append(message) or True
+
+    future = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+    past = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    agent.handle_task_assignment({'task_id': 't1', 'assigned_by': 'orchestrator', 'deadline': past, 'cancel_token': 'wf1'})
+    agent.handle_incoming_message({'sender': 'orchestrator', 'data': {'type': 'cancel_tasks', 'cancel_token': 'wf2', 'reason': 'user request'}})
+    agent.handle_task_assignment({'task_id': 't2', 'assigned_by': 'orchestrator', 'deadline': future, 'cancel_token': 'wf2'})
+    agent.handle_task_assignment({'task_id': 't3', 'assigned_by': 'orchestrator', 'deadline': future, 'cancel_token': 'wf3'})
+
+    assert agent.executed == [('t3', 'wf3')]
+    assert [(m['task_id'], m.get('status')) for m in sent] == [('t1', 'cancelled'), ('t2', 'cancelled'), ('t3', None)]
+    assert sent[0]['error'] == 'deadline exceeded'
+    assert sent[1]['error'] == 'cancelled: user request'
+
+    class NullScraper(BaseScraper):
+        def scrape_data(self, target, **kwargs):
+            return {}
+
+        def parse_response(self, response, **kwargs):
+            return {}
+
+    scraper = NullScraper('null', base_delay=0, max_delay=0)
+    calls = []
+    scraper.session.request = lambda method, url, **kwargs: calls.append(kwargs)
+    expired = CancellationToken('wf1', datetime.utcnow() - timedelta(seconds=1))
+    assert scraper.make_request('https://example.com', cancel_token=expired) is None
+    assert calls == [] and scraper.stats['cancelled_requests'] == 1
+
+
+def test_timezone_aware_deadlines_and_generation_timeouts():
+    from datetime import datetime, timedelta, timezone
+    import httpx
+    import openai
+    import pytest
+    from agents.orchestrator_agent import OrchestratorAgent
+    from infrastructure.cancellation import CancellationToken, DeadlineExceeded, parse_deadline, use_token
+    from src.services.content_generator import ContentGenerator
+
+    assert parse_deadline('2026-10-19T12:00:00Z') == datetime(2026, 10, 19, 12, 0)
+    assert parse_deadline('2026-10-19T14:00:00+02:00') == datetime(2026, 10, 19, 12, 0)
+    assert parse_deadline('tomorrow') is None
+
+    orchestrator = OrchestratorAgent()
+    orchestrator.send_message = lambda agent, message: True
+    orchestrator.broadcast_message = lambda message: True
+    orchestrator.register_agent({'agent_name': 'writer', 'agent_type': 'content',
+                                 'capabilities': ['content_generation']})
+    deadline = (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat().replace('+00:00', 'Z')
+    result = orchestrator.coordinate_content_generation({'blog_instance_id': 1, 'deadline': deadline})
+    token = orchestrator.workflow_token(orchestrator.workflow_engine.get_workflow(result['workflow_id']))
+    assert 200 < token.remaining() <= 300 and not token.expired
+
+    # The running task's token reaches the generator; a timeout at its deadline is a cancellation
+    class TimingOutCompletions:
+        def create(self, **kwargs):
+            assert kwargs['timeout'] <= 60
+            raise openai.APITimeoutError(request=httpx.Request('POST', 'https://api.openai.com'))
+
+    generator = ContentGenerator()
+    generator.openai_client = type('Client', (), {'chat': type('Chat', (), {'completions': TimingOutCompletions()})})
+    product = {'name': 'Kettlebell', 'description': '', 'category': 'fitness', 'price': 40}
+    with use_token(CancellationToken.with_timeout(60, 'wf')):
+        with pytest.raises(DeadlineExceeded):
+            generator.generate_article(product)
+
+
+def test_orchestrator_cancels_workflows_past_deadline():
+    from agents.orchestrator_agent import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent()
+    sent, broadcasts = [], []
+    orchestrator.send_message = lambda agent, message: sent.append((agent, message)) or True
+    orchestrator.broadcast_message = lambda message: broadcasts.append(message) or True
+
+    now = [orchestrator.clock()]
+    orchestrator.clock = lambda: now[0]
+
+    for name, capability in (('researcher', 'market_research'), ('writer', 'content_generation')):
+        orchestrator.register_agent({'agent_name': name, 'agent_type': 'test', 'capabilities': [capability]})
+
+    workflow_id = orchestrator.coordinate_content_generation({'blog_instance_id': 1, 'timeout_seconds': 30})['workflow_id']
+    envelope = sent[-1][1]
+    # Research may be shared with other workflows, so it carries its own token
+    assert envelope['cancel_token'] == f"shared:{envelope['task_id']}" and envelope['deadline']
+
+    now[0] += 10
+    assert orchestrator.check_workflow_deadlines() == []
+
+    now[0] += 25
+    assert orchestrator.check_workflow_deadlines() == [workflow_id]
+    assert orchestrator.workflow_engine.get_workflow(workflow_id) is None
+    cancel = [m for m in broadcasts if m['type'] == 'cancel_tasks'][-1]
+    assert cancel == {'type': 'cancel_tasks', 'cancel_token': workflow_id, 'reason': 'deadline exceeded'}
+    assert [m for m in broadcasts if m['type'] == 'workflow_completed'][-1]['status'] == 'failed'
+
+    # A late cancelled report from the agent is absorbed quietly
+    orchestrator.handle_task_result({'task_id': envelope['task_id'], 'workflow_id': workflow_id,
+                                     'status': 'cancelled', 'error': 'deadline exceeded'}, 'researcher')
+    assert orchestrator.capability_index.get_load('researcher')['in_flight'] == 0
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Tests for the scraping layer
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the core directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+core_dir = os.path.join(current_dir, 'core')
+sys.path.insert(0, core_dir)
+
+from aiohttp import web
+
+from scrapers.async_scraper import AsyncAmazonScraper, FetchedPage
+
+PRODUCT_PAGE = """
+<html><body>
+  <span id="productTitle"> Adjustable Dumbbell {n} </span>
+  <div id="availability"><span>In Stock</span></div>
+</body></html>
+"""
+
+
+async def serve(routes):
+    """Start a local aiohttp app; returns (runner, base_url)"""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_async_scraper_fetches_concurrently_with_host_cap_and_retries():
+    state = {'in_flight': 0, 'peak': 0, 'flaky_calls': 0}
+
+    async def product(request):
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        await asyncio.sleep(0.05)
+        state['in_flight'] -= 1
+        return web.Response(text=PRODUCT_PAGE.format(n=request.match_info['n']), content_type='text/html')
+
+    async def flaky(request):
+        state['flaky_calls'] += 1
+        if state['flaky_calls'] == 1:
+            return web.Response(status=503)
+        return web.Response(text=PRODUCT_PAGE.format(n='flaky'), content_type='text/html')
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def crawl():
+        runner, base = await serve([web.get('/dp/{n}', product), web.get('/flaky', flaky),
+                                    web.get('/missing', missing)])
+        scraper = AsyncAmazonScraper(base_delay=0, per_host_limit=4, backoff_factor=0.01)
+        try:
+            urls = [f"{base}/dp/{n}" for n in range(12)] + [f"{base}/flaky", f"{base}/missing"]
+            return await scraper.scrape_many(urls), scraper
+        finally:
+            await scraper.close()
+            await runner.cleanup()
+
+    results, scraper = asyncio.run(crawl())
+
+    assert [r['data']['title'] for r in results[:12]] == [f"Adjustable Dumbbell {n}" for n in range(12)]
+    assert results[12]['data']['availability'] == 'In Stock'
+    assert results[13] == {'error': 'Failed to fetch product page'}
+    assert 1 < state['peak'] <= 4
+
+    stats = scraper.get_statistics()
+    assert (stats['requests_made'], stats['successful_requests'], stats['failed_requests'], stats['retries']) == (15, 13, 1, 1)
+    assert stats['data_points_collected'] == 13
+
+    # Pages are parsed on the scraper's worker threads, not on the event loop
+    import threading
+    parsed_on = []
+    original_parse = AsyncAmazonScraper.parse_response
+
+    class Recording(AsyncAmazonScraper):
+        def parse_response(self, response, **kwargs):
+            parsed_on.append(threading.current_thread().name)
+            return original_parse(self, response, **kwargs)
+
+    async def parse_one():
+        scraper = Recording(base_delay=0)
+        page = FetchedPage('https://shop.example/dp/1', 200, {}, PRODUCT_PAGE.format(n=1).encode())
+        try:
+            return await scraper.parse_page(page)
+        finally:
+            await scraper.close()
+
+    assert asyncio.run(parse_one())['data']['title'] == 'Adjustable Dumbbell 1'
+    assert parsed_on[0].startswith('AsyncAmazon-parse')
+
+
+def test_host_rate_limiter_bursts_per_host_and_backs_off_when_throttled():
+    from scrapers.base_scraper import BaseScraper
+    from scrapers.rate_limiter import HostRateLimiter, parse_retry_after
+
+    now = [100.0]
+    limiter = HostRateLimiter(default_rate=2.0, burst=2, host_rates={'slow.example': (0.5, 1)},
+                              min_rate=0.25, clock=lambda: now[0])
+
+    # Burst capacity is spent first, then requests are spaced at the host's rate
+    assert [limiter.reserve('a.example') for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    # Other hosts have their own buckets and configured rates
+    assert limiter.reserve('b.example') == 0.0
+    assert [limiter.reserve('slow.example') for _ in range(2)] == [0.0, 2.0]
+
+    # A 429 with Retry-After halves the rate and pauses the host
+    now[0] += 10
+    assert limiter.record_response('b.example', 429, {'Retry-After': '7'})
+    assert limiter.snapshot()['b.example']['rate'] == 1.0
+    assert limiter.reserve('b.example') == 7.0
+    assert limiter.reserve('a.example') == 0.0
+
+    # Requests queued behind a Retry-After are spaced at the reduced rate, not released together
+    limiter.configure('c.example', 1.0)
+    assert limiter.record_response('c.example', 429, {'Retry-After': '60'})
+    assert [limiter.reserve('c.example') for _ in range(3)] == [60.0, 62.0, 64.0]
+    now[0] += 30
+    assert limiter.reserve('c.example') == 66.0 - 30
+
+    # Successes recover the rate additively, never past the configured rate
+    for _ in range(20):
+        assert not limiter.record_response('b.example', 200)
+    assert limiter.snapshot()['b.example']['rate'] == 2.0
+
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:30 GMT') == 0.0
+    assert parse_retry_after('garbage') is None
+
+    class Response:
+        def __init__(self, status_code, headers=None):
+            self.status_code = status_code
+            self.headers = headers or {}
+
+        def raise_for_status(self):
+            pass
+
+        def close(self):
+            pass
+
+    class NullScraper(BaseScraper):
+        def scrape_data(self, target, **kwargs):
+            return {}
+
+        def parse_response(self, response, **kwargs):
+            return {}
+
+    scraper = NullScraper('null', base_delay=0, max_delay=0)
+    replies = [Response(503, {'Retry-After': '0'}), Response(200)]
+    scraper.session.request = lambda method, url, **kwargs: replies.pop(0)
+    assert scraper.make_request('https://example.com/p').status_code == 200
+    assert (scraper.stats['requests_made'], scraper.stats['throttled_requests']) == (2, 1)
+
+
+def make_response(status, body=b'', headers=None, url='https://shop.example/'):
+    import requests
+
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    response.url = url
+    return response
+
+
+def test_http_cache_revalidates_and_skips_parsing_unchanged_pages(tmp_path):
+    from scrapers.base_scraper import AmazonScraper
+    from scrapers.http_cache import HttpCache
+
+    page = PRODUCT_PAGE.format(n=1).encode()
+    ticks = iter(range(1000))
+    cache = HttpCache(str(tmp_path / 'http'), max_bytes=len(page) + 50, clock=lambda: next(ticks))
+    scraper = AmazonScraper(base_delay=0, max_delay=0, http_cache=cache)
+    sent = []
+
+    def request(method, url, **kwargs):
+        sent.append(kwargs.get('headers') or {})
+        if sent[-1].get('If-None-Match') == '"v1"':
+            return make_response(304, url=url)
+        return make_response(200, page, {'ETag': '"v1"', 'Content-Type': 'text/html'}, url=url)
+
+    scraper.session.request = request
+    parses = []
+    original_parse = scraper.parse_response
+    scraper.parse_response = lambda response, **kwargs: parses.append(response.url) or original_parse(response)
+
+    first = scraper.scrape_data('https://shop.example/dp/1')
+    second = scraper.scrape_data('https://shop.example/dp/1')
+    assert second == {**first, 'unchanged': True} and first['data']['title'] == 'Adjustable Dumbbell 1'
+    assert sent == [{}, {'If-None-Match': '"v1"'}]
+    assert len(parses) == 1
+    assert (scraper.stats['not_modified'], scraper.stats['parses_skipped']) == (1, 1)
+
+    # The size bound evicts the least recently used body
+    scraper.scrape_data('https://shop.example/dp/2')
+    snapshot = cache.snapshot()
+    assert snapshot['evictions'] == 1 and snapshot['bytes'] == len(page)
+    assert cache.lookup('https://shop.example/dp/1') is None
+    assert cache.lookup('https://shop.example/dp/2') is not None
+
+    # The freshness override serves cached pages without a request
+    replay = AmazonScraper(base_delay=0, max_delay=0,
+                           http_cache=HttpCache(str(tmp_path / 'http'), freshness_seconds=3600, clock=lambda: 1000))
+    replay.session.request = lambda method, url, **kwargs: pytest_fail(url)
+    assert replay.scrape_data('https://shop.example/dp/2')['data']['title'] == 'Adjustable Dumbbell 1'
+    assert replay.stats['cache_hits'] == 1
+
+
+def pytest_fail(url):
+    raise AssertionError(f"unexpected request to {url}")
+
+
+def test_fast_parser_matches_soup_parser_on_fixture_pages():
+    import json
+    from scrapers.base_scraper import AmazonScraper
+    from scrapers.fast_parser import css_to_xpath, FastDocument
+
+    fixtures = os.path.join(core_dir, 'scrapers', 'fixtures')
+    with open(os.path.join(fixtures, 'expected.json')) as handle:
+        expected = json.load(handle)
+
+    for name, fields in expected.items():
+        with open(os.path.join(fixtures, name), 'rb') as handle:
+            page = make_response(200, handle.read(), {'Content-Type': 'text/html'})
+        for parser in AmazonScraper.PARSERS:
+            data = AmazonScraper(parser=parser, base_delay=0, max_delay=0).parse_response(page)['data']
+            data.pop('scraped_at')
+            assert data == fields, (name, parser)
+
+    assert css_to_xpath('#availability span') == 'descendant::*[@id="availability"]/descendant::span'
+    document = FastDocument('<p class="a b">café <script>x()</script><b> ok </b></p>'.encode('latin-1'), 'latin-1')
+    assert document.select_one('p.b').get_text(strip=True) == 'caféok'
+    assert document.select('script') == [] and document.select_one('.missing') is None
+
+
+def test_crawl_frontier_dedups_schedules_per_host_and_resumes(tmp_path):
+    from scrapers.crawl_frontier import CrawlFrontier, canonicalize_url
+
+    assert canonicalize_url('HTTPS://www.Amazon.com:443/Some-Name/dp/b001arynps/ref=sr_1_3?qid=1&sr=8-3#reviews') \
+        == canonicalize_url('https://www.amazon.com/gp/product/B001ARYNPS?psc=1') \
+        == 'https://www.amazon.com/dp/B001ARYNPS'
+    assert canonicalize_url('https://shop.example/a/./b/../c?utm_source=x&b=2&a=1') == 'https://shop.example/a/c?a=1&b=2'
+
+    now = [1000.0]
+    db_path = str(tmp_path / 'frontier.sqlite')
+    frontier = CrawlFrontier(db_path, recrawl_after=3600, max_urls=6, max_in_flight_per_host=2,
+                             retry_delay=60, max_failures=2, clock=lambda: now[0])
+
+    added = frontier.add_many([f'https://big.example/p/{n}' for n in range(4)]
+                              + ['https://big.example/p/0?utm_medium=email', 'https://small.example/x'])
+    assert added == 5 and frontier.stats['duplicates'] == 1
+    assert frontier.add('https://small.example/y', priority=5)
+    assert not frontier.add('https://other.example/z')  # frontier is full
+    assert frontier.stats['rejected_full'] == 1
+
+    # Round-robin across hosts, at most two in flight per host, priority first
+    batch = frontier.next_batch(10)
+    assert batch[0] == 'https://small.example/y'
+    assert sorted(batch) == ['https://big.example/p/0', 'https://big.example/p/1',
+                             'https://small.example/x', 'https://small.example/y']
+    assert frontier.next_batch(10) == []
+
+    frontier.complete('https://big.example/p/0')
+    frontier.complete('https://small.example/x', success=False)
+    assert frontier.next_batch(10) == ['https://big.example/p/2']
+    frontier.close()
+
+    # A restart releases leases; completed pages wait for their recrawl, failures for their retry
+    frontier = CrawlFrontier(db_path, recrawl_after=3600, max_urls=6, max_in_flight_per_host=2,
+                             retry_delay=60, max_failures=2, clock=lambda: now[0])
+    assert not frontier.add('https://big.example/p/3')
+    assert sorted(frontier.next_batch(10)) == ['https://big.example/p/1', 'https://big.example/p/2',
+                                               'https://small.example/y']
+    now[0] += 60
+    assert frontier.next_batch(10) == ['https://small.example/x']
+    frontier.complete('https://small.example/x', success=False)
+    assert frontier.snapshot()['by_status']['failed'] == 1
+
+    class Scraper:
+        def scrape_data(self, url):
+            return {'status': 'success', 'data': {'title': url}}
+
+    for url in ('https://big.example/p/1', 'https://big.example/p/2', 'https://small.example/y'):
+        frontier.complete(url)
+    now[0] += 3600
+    crawled = [url for url, result in frontier.crawl(Scraper(), limit=10)]
+    assert sorted(crawled) == ['https://big.example/p/0', 'https://big.example/p/1', 'https://big.example/p/2',
+                               'https://big.example/p/3', 'https://small.example/y']
+    # Within a priority, the most overdue page comes first
+    assert [url for url in crawled if 'big' in url] == ['https://big.example/p/3', 'https://big.example/p/0',
+                                                        'https://big.example/p/1', 'https://big.example/p/2']
+    frontier.close()
+
+
+def test_fingerprints_skip_reparsing_when_only_page_chrome_changes():
+    from scrapers.base_scraper import AmazonScraper
+    from scrapers.fingerprints import FingerprintStore
+
+    with open(os.path.join(core_dir, 'scrapers', 'fixtures', 'amazon_product.html'), 'rb') as handle:
+        page = handle.read()
+    rotated = page.replace(b'Customer 3', b'Customer 99').replace(b'<script type="text/javascript">',
+                                                                   b'<script nonce="abc">', 1)
+    repriced = page.replace(b'429<span class="a-price-decimal">', b'399<span class="a-price-decimal">')
+    bodies = [page, page, rotated.replace(b'id="productTitle"', b'data-csrf="t1" id="productTitle"'), repriced]
+
+    scraper = AmazonScraper(parser='fast', base_delay=0, max_delay=0, fingerprints=FingerprintStore())
+    scraper.session.request = lambda method, url, **kwargs: make_response(200, bodies.pop(0), url=url)
+    parses = []
+    original_parse = scraper.parse_response
+    scraper.parse_response = lambda response, **kwargs: parses.append(1) or original_parse(response)
+
+    results = [scraper.scrape_data('https://www.amazon.com/dp/B001ARYNPS') for _ in range(4)]
+    assert [result.get('unchanged', False) for result in results] == [False, True, True, False]
+    assert [result['data']['price'] for result in results] == [429.0, 429.0, 429.0, 399.0]
+    assert len(parses) == 2 and scraper.stats['unchanged_skipped'] == 2
+
+
+def test_scrape_pipeline_parses_in_worker_processes_with_bounded_queues():
+    import threading
+    from scrapers.pipeline import ScrapePipeline
+
+    with open(os.path.join(core_dir, 'scrapers', 'fixtures', 'amazon_product.html'), 'rb') as handle:
+        page = handle.read()
+
+    def fetch(url):
+        if url.endswith('/missing'):
+            return None
+        body = page.replace(b'Bowflex SelectTech 552', url.rsplit('/', 1)[1].encode())
+        return make_response(200, body, {'Content-Type': 'text/html; charset=utf-8'}, url=url)
+
+    urls = [f'https://www.amazon.com/dp/item{n}' for n in range(12)] + ['https://www.amazon.com/missing']
+    pipeline = ScrapePipeline(fetch, fetch_workers=4, parse_workers=2, queue_size=3)
+    results = dict(pipeline.run(urls))
+
+    assert results.keys() == set(urls)
+    assert all(results[url]['data']['title'].startswith(url.rsplit('/', 1)[1]) for url in urls[:-1])
+    assert results[urls[-1]]['status'] == 'error'
+    stats = pipeline.snapshot()
+    assert (stats['fetched'], stats['fetch_failed'], stats['parsed']) == (12, 1, 12)
+    assert stats['max_queued'] <= 3 and stats['pages_per_second'] > 0
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('scrape-fetch')]
+
+    # Inline parsing gives the same results
+    inline = dict(ScrapePipeline(fetch, fetch_workers=2, parse_workers=0).run(urls[:3]))
+    assert [inline[url]['data']['price'] for url in urls[:3]] == [429.0] * 3
+
+    # A charset declared in a lower-case header survives the trip to the parser
+    from scrapers.pipeline import parse_amazon_page
+    latin1 = PRODUCT_PAGE.format(n='Caf\u00e9').encode('latin-1')
+    parsed = parse_amazon_page('https://shop.example/dp/1', latin1, {'content-type': 'text/html; charset=iso-8859-1'})
+    assert parsed['data']['title'] == 'Adjustable Dumbbell Caf\u00e9'
+
+
+def test_ingestion_sink_bulk_upserts_products_and_observations(app):
+    from infrastructure.persistence import database_session
+    from scrapers.ingestion import IngestionSink
+    from src.models import db
+    from src.models.product import Product
+    from src.models.agent_models import MarketData
+
+    with app.app_context():
+        db.session.add(Product(name='Old name', price=50.0, source_url='https://www.amazon.com/dp/A'))
+        db.session.add(Product(name='Manual product'))
+        db.session.commit()
+
+    def scraped(title, price):
+        return {'status': 'success', 'data': {'title': title, 'price': price, 'rating': 4.5, 'review_count': 10,
+                                              'images': [f'https://img.example/{title}.jpg'], 'description': ''}}
+
+    sink = IngestionSink(lambda: database_session(app), batch_size=3, flush_interval=3600)
+    summary = sink.consume([
+        ('https://www.amazon.com/dp/A', scraped('Kettlebell', 45.0)),
+        ('https://www.amazon.com/dp/B', scraped('Yoga Mat', 20.0)),
+        ('https://www.amazon.com/dp/B', scraped('Yoga Mat', 19.0)),
+        ('https://www.amazon.com/dp/C', {**scraped('Rower', 300.0), 'unchanged': True}),
+        ('https://www.amazon.com/dp/D', {'error': 'Failed to fetch product page'}),
+        ('https://www.amazon.com/dp/E', scraped('Bench', 120.0)),
+        ('https://www.amazon.com/dp/F', scraped('Jump Rope', 9.0)),
+    ])
+
+    assert (summary['received'], summary['skipped_unchanged'], summary['skipped_invalid']) == (7, 1, 1)
+    assert summary['batches'] == 2 and summary['products_upserted'] == 4 and summary['buffered'] == 0
+    assert summary['records_per_second'] > 0
+
+    with app.app_context():
+        products = {p.source_url: p for p in Product.query.all()}
+        assert len(products) == 5
+        assert (products['https://www.amazon.com/dp/A'].name, products['https://www.amazon.com/dp/A'].price) \
+            == ('Kettlebell', 45.0)
+        assert products['https://www.amazon.com/dp/B'].price == 19.0
+        assert products['https://www.amazon.com/dp/B'].image_url == 'https://img.example/Yoga Mat.jpg'
+        observations = MarketData.query.filter_by(data_type='product_observation').all()
+        assert sorted(o.product_name for o in observations) == ['Bench', 'Jump Rope', 'Kettlebell', 'Yoga Mat']
+        assert all(o.data_payload['rating'] == 4.5 for o in observations)
+
+
+def test_products_without_source_url_do_not_collide(app):
+    from infrastructure.persistence import database_session
+    from scrapers.ingestion import IngestionSink
+    from src.models.product import Product
+    from src.routes.blog import blog_bp
+
+    app.register_blueprint(blog_bp, url_prefix='/api')
+    client = app.test_client()
+    for name in ('Manual one', 'Manual two'):
+        response = client.post('/api/products', json={'name': name, 'price': 10.0, 'source_url': ''})
+        assert response.status_code == 200 and response.get_json()['product']['source_url'] is None
+
+    # Rows written with an empty URL directly are outside the partial index too
+    with app.app_context():
+        from src.models import db
+        db.session.add_all([Product(name='Legacy one', source_url=''), Product(name='Legacy two', source_url='')])
+        db.session.commit()
+
+    sink = IngestionSink(lambda: database_session(app), batch_size=10, flush_interval=3600)
+    for price in (45.0, 44.0):
+        sink.consume([('https://www.amazon.com/dp/A', {'status': 'success',
+                                                       'data': {'title': 'Kettlebell', 'price': price}})])
+    with app.app_context():
+        assert Product.query.count() == 5
+        assert Product.query.filter_by(source_url='https://www.amazon.com/dp/A').one().price == 44.0
+
+
+def test_ingestion_sink_falls_back_when_source_urls_are_duplicated(app):
+    from infrastructure.persistence import database_session
+    from scrapers.ingestion import IngestionSink
+    from src.models import db
+    from src.models.product import Product
+
+    # A database from before the unique index, already holding a duplicate URL
+    with app.app_context():
+        db.session.execute(db.text('DROP INDEX ix_products_source_url'))
+        db.session.add_all([Product(name='First copy', source_url='https://www.amazon.com/dp/A'),
+                            Product(name='Second copy', source_url='https://www.amazon.com/dp/A')])
+        db.session.commit()
+
+    sink = IngestionSink(lambda: database_session(app), batch_size=10, flush_interval=3600)
+    summary = sink.consume([
+        ('https://www.amazon.com/dp/A', {'status': 'success', 'data': {'title': 'Kettlebell', 'price': 45.0}}),
+        ('https://www.amazon.com/dp/B', {'status': 'success', 'data': {'title': 'Yoga Mat', 'price': 20.0}}),
+    ])
+
+    assert summary['failed'] == 0 and summary['products_upserted'] == 2
+    with app.app_context():
+        names = [p.name for p in Product.query.order_by(Product.id)]
+        assert names == ['First copy', 'Kettlebell', 'Yoga Mat']
+
+
+def test_cassette_records_then_replays_offline_and_benchmarks_fixtures(tmp_path):
+    import json
+    from requests.adapters import BaseAdapter
+    from scrapers.base_scraper import AmazonScraper
+    from scrapers.benchmark_replay import import_pages, run
+    from scrapers.cassette import use_cassette
+
+    class FakeNetwork(BaseAdapter):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        def send(self, request, **kwargs):
+            self.calls += 1
+            page = PRODUCT_PAGE.format(n=self.calls).encode()
+            return make_response(200, page, {'Content-Type': 'text/html; charset=utf-8', 'Set-Cookie': 'x=1'},
+                                 url=request.url)
+
+        def close(self):
+            pass
+
+    network = FakeNetwork()
+    recorder = AmazonScraper(base_delay=0, max_delay=0)
+    recorder.session.mount('https://', network)
+    recording = use_cassette(recorder.session, str(tmp_path / 'tape'), mode='record')
+    assert recorder.scrape_data('https://www.amazon.com/dp/1')['data']['title'] == 'Adjustable Dumbbell 1'
+    assert recording.stats['recorded'] == 1 and network.calls == 1
+    assert recording.cassette.lookup('GET', 'https://www.amazon.com/dp/1')['headers'] == \
+        {'Content-Type': 'text/html; charset=utf-8'}
+
+    # Replay serves the recording without touching the network; unrecorded URLs fail like a dead connection
+    replayer = AmazonScraper(base_delay=0, max_delay=0)
+    replaying = use_cassette(replayer.session, str(tmp_path / 'tape'), mode='replay')
+    assert replayer.scrape_data('https://www.amazon.com/dp/1')['data']['title'] == 'Adjustable Dumbbell 1'
+    assert replayer.make_request('https://www.amazon.com/dp/2') is None
+    assert (replaying.stats['replayed'], replaying.stats['missed'], network.calls) == (1, 1, 1)
+
+    # The benchmark replays the saved fixture pages and scores them against expected.json
+    fixtures = os.path.join(core_dir, 'scrapers', 'fixtures')
+    assert import_pages(fixtures, str(tmp_path / 'corpus')) == 2
+    with open(os.path.join(fixtures, 'expected.json')) as handle:
+        expected = json.load(handle)
+    report = run(str(tmp_path / 'corpus'), 'fast', repeat=2, expected=expected)
+    assert report['pages'] == 4 and report['succeeded'] == 2
+    assert report['accuracy'] == {'fields': 1.0, 'pages': '2/2'}
+    assert 0 < report['parse_ms']['p50'] <= report['parse_ms']['max']
+
+
+def test_streamed_downloads_are_capped_timed_out_and_stop_after_the_product_region(tmp_path):
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from scrapers.base_scraper import AmazonScraper
+    from scrapers.http_cache import HttpCache
+
+    fixtures = os.path.join(core_dir, 'scrapers', 'fixtures')
+    with open(os.path.join(fixtures, 'amazon_product.html'), 'rb') as handle:
+        product_page = handle.read()
+    with open(os.path.join(fixtures, 'expected.json')) as handle:
+        expected = json.load(handle)['amazon_product.html']
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.end_headers()
+            try:
+                if self.path == '/product':
+                    self.wfile.write(product_page)
+                elif self.path == '/huge':
+                    for _ in range(256):
+                        self.wfile.write(b'<p>' + b'x' * 4093)
+                elif self.path == '/stalled':
+                    self.wfile.write(b'<html>')
+                    self.wfile.flush()
+                    time.sleep(1)
+                elif self.path == '/trickle':
+                    for _ in range(40):
+                        self.wfile.write(b'<p>.</p>')
+                        self.wfile.flush()
+                        time.sleep(0.05)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        scraper = AmazonScraper(base_delay=0, max_delay=0, max_bytes=64 * 1024, timeout=(1, 0.3),
+                                download_timeout=0.5)
+
+        # Reading stops with the chunk holding the first end marker after the product region starts
+        response = scraper.make_request(f"{base}/product")
+        assert product_page.startswith(response.content) and len(response.content) < len(product_page)
+        data = scraper.parse_response(response)['data']
+        data.pop('scraped_at')
+        assert data == expected
+
+        # Oversized bodies are cut at max_bytes
+        huge = scraper.make_request(f"{base}/huge")
+        assert len(huge.content) == 64 * 1024 and huge.truncated
+
+        # A stalled body hits the read timeout, a trickling one the download timeout
+        assert scraper.make_request(f"{base}/stalled") is None
+        assert scraper.make_request(f"{base}/trickle") is None
+
+        stats = scraper.get_statistics()
+        assert (stats['early_terminated_downloads'], stats['truncated_downloads'], stats['aborted_downloads']) \
+            == (1, 1, 1)
+        assert stats['failed_requests'] == 2
+
+        # A body cut at max_bytes is never cached; one stopped after a complete product region is
+        cache = HttpCache(str(tmp_path / 'http'), freshness_seconds=3600)
+        cached = AmazonScraper(base_delay=0, max_delay=0, max_bytes=64 * 1024, http_cache=cache)
+        assert cached.make_request(f"{base}/huge").truncated
+        assert cached.make_request(f"{base}/product").complete
+        assert cache.lookup(f"{base}/huge") is None and cache.lookup(f"{base}/product") is not None
+
+        # Early termination is a hook: without it the whole page is read
+        full = AmazonScraper(base_delay=0, max_delay=0, stop_after_region=False).make_request(f"{base}/product")
+        assert full.content == product_page
+
+        # The async scraper applies the same limits
+        async def fetch():
+            async with AsyncAmazonScraper(base_delay=0, max_delay=0, max_bytes=64 * 1024) as async_scraper:
+                pages = [await async_scraper.make_request(f"{base}/{path}") for path in ('product', 'huge')]
+                return pages, async_scraper.stats
+
+        (product, huge), async_stats = asyncio.run(fetch())
+        assert product.content == response.content and len(huge.content) == 64 * 1024
+        assert (async_stats['early_terminated_downloads'], async_stats['truncated_downloads']) == (1, 1)
+    finally:
+        server.shutdown()
+        server.server_close()